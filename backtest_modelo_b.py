@@ -0,0 +1,69 @@
+"""
+Validación walk-forward (fuera de muestra) del Modelo B.
+
+En cada semana reajusta alpha/beta solo con las semanas anteriores, con
+ventana expansiva o móvil, y pronostica la semana siguiente como lo hace la
+herramienta. Reporta MAE, RMSE y MAPE por bloque de semanas y en total, junto
+al error del ajuste en muestra (las estimaciones de la tabla del Modelo B),
+que es la cifra que describe la presentación del menú.
+
+Todos los orígenes se evalúan con sumas acumuladas: el costo es O(n) aunque
+haya un reajuste por semana (ver motor_modelo_b.pronosticos_walk_forward).
+
+Uso:
+    python backtest_modelo_b.py Datos.xlsx
+    python backtest_modelo_b.py datos.csv --ventana 104 --bloque 26 --salida backtest
+"""
+import sys
+import argparse
+import utilidades
+
+def _fmt(valor, sufijo=""):
+    return "-" if valor != valor else f"{valor:.2f}{sufijo}"
+
+def imprimir_total(total):
+    print(f"Ventana {total['esquema']}: {total['pronosticos']} pronósticos a una semana")
+    print(f"  {'':<28} {'MAE':>10} {'RMSE':>10} {'MAPE':>10}")
+    filas = [("Fuera de muestra sin int.", total["sin_int"]),
+             ("Fuera de muestra con int.", total["con_int"]),
+             ("En muestra sin int.", total["en_muestra_sin_int"]),
+             ("En muestra con int.", total["en_muestra_con_int"])]
+    for nombre, m in filas:
+        print(f"  {nombre:<28} {_fmt(m['mae']):>10} {_fmt(m['rmse']):>10} {_fmt(m['mape'], '%'):>10}")
+
+def imprimir_bloques(bloques, claves):
+    print(f"\n{'Grupo':<24} {'Bloque':>6} {'Desde':>10} {'Hasta':>10} {'N':>5} "
+          f"{'MAE con':>9} {'RMSE con':>9} {'MAPE con':>9} {'MAPE sin':>9}")
+    for fila in bloques.itertuples(index=False):
+        d = fila._asdict()
+        grupo = " / ".join(str(d[c]) for c in claves) or "-"
+        print(f"{grupo[:24]:<24} {d['bloque']:>6} {d['desde']:%d/%m/%Y} {d['hasta']:%d/%m/%Y} {d['pronosticos']:>5} "
+              f"{_fmt(d['mae_con_int']):>9} {_fmt(d['rmse_con_int']):>9} "
+              f"{_fmt(d['mape_con_int'], '%'):>9} {_fmt(d['mape_sin_int'], '%'):>9}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest walk-forward del Modelo B.")
+    parser.add_argument("archivo", help="Excel o CSV con las columnas de la plantilla")
+    parser.add_argument("-v", "--ventana", type=int, default=None,
+                        help="Semanas de la ventana móvil (por defecto, ventana expansiva)")
+    parser.add_argument("-m", "--minimo", type=int, default=3, help="Pares mínimos para pronosticar")
+    parser.add_argument("-b", "--bloque", type=int, default=52, help="Pronósticos por bloque del reporte")
+    parser.add_argument("-s", "--salida", help="Prefijo de los CSV <salida>_detalle.csv y <salida>_bloques.csv")
+    args = parser.parse_args(argv)
+
+    df = utilidades.cargar_tabla(args.archivo)
+    detalle, bloques, total = utilidades.calcular_backtest_modelo_b(df, args.ventana, args.minimo, args.bloque)
+    if not total["pronosticos"]:
+        print("No hay semanas suficientes para pronosticar fuera de muestra.", file=sys.stderr)
+        return 1
+
+    imprimir_total(total)
+    imprimir_bloques(bloques, utilidades.columnas_grupo(detalle))
+    if args.salida:
+        utilidades.para_archivo(detalle).to_csv(f"{args.salida}_detalle.csv", index=False)
+        bloques.to_csv(f"{args.salida}_bloques.csv", index=False)
+        print(f"\nDetalle y bloques -> {args.salida}_detalle.csv, {args.salida}_bloques.csv")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+Benchmark del motor del Modelo B.
+
+Compara el cálculo original fila por fila (iloc dentro de un for) contra el
+motor vectorizado de motor_modelo_b, verifica que ambos den el mismo resultado
+y muestra cómo escala el motor de 100 a 10 millones de filas.
+
+También compara el ajuste OLS en lote (muchas series en una sola llamada)
+contra un LinearRegression de sklearn por serie, si sklearn está instalado.
+
+Uso:
+    python benchmark_modelo_b.py
+"""
+import time
+import numpy as np
+import pandas as pd
+import motor_modelo_b
+
+TAMANOS = [100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+MAX_FILAS_LEGADO = 10_000  # El bucle original es demasiado lento más allá de esto
+ALPHA = 1.5
+BETA = 0.8
+
+def generar_serie(n, semilla=0):
+    rng = np.random.default_rng(semilla)
+    indice = rng.uniform(0, 100, n)
+    casos = np.round(rng.normal(60, 15, n))
+    # Huecos para verificar el manejo de NaN
+    indice[rng.random(n) < 0.02] = np.nan
+    casos[rng.random(n) < 0.01] = np.nan
+    return indice, casos
+
+def estimaciones_legado(indice, casos, alpha, beta):
+    """Copia del cálculo original con iloc (referencia de exactitud y tiempo)."""
+    df_calc = pd.DataFrame({"Indice_t": indice, "Casos_t": casos})
+    df_calc["Indice_t_1"] = df_calc["Indice_t"].shift(1)
+    lista_sin = [0.0] * len(df_calc)
+    lista_con = [0.0] * len(df_calc)
+    for i in range(1, len(df_calc)):
+        casos_prev = df_calc.iloc[i - 1]["Casos_t"]
+        ind_t1_actual = df_calc.iloc[i]["Indice_t_1"]
+        ind_t1_prev = df_calc.iloc[i - 1]["Indice_t_1"]
+        delta_ind = 0
+        if pd.notna(ind_t1_actual) and pd.notna(ind_t1_prev):
+            delta_ind = ind_t1_actual - ind_t1_prev
+        lista_sin[i] = casos_prev + beta * delta_ind
+        lista_con[i] = casos_prev + alpha + beta * delta_ind
+    return np.array(lista_sin), np.array(lista_con)
+
+def medir(funcion, *args, repeticiones=3):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(*args)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+def main():
+    print(f"{'Filas':>12} | {'Legado (s)':>12} | {'Vectorizado (s)':>16} | {'Aceleración':>11}")
+    print("-" * 62)
+    for n in TAMANOS:
+        indice, casos = generar_serie(n)
+        t_vec = medir(motor_modelo_b.calcular_estimaciones, indice, casos, ALPHA, BETA)
+
+        if n <= MAX_FILAS_LEGADO:
+            t_leg = medir(estimaciones_legado, indice, casos, ALPHA, BETA, repeticiones=1)
+            esperado = estimaciones_legado(indice, casos, ALPHA, BETA)
+            obtenido = motor_modelo_b.calcular_estimaciones(indice, casos, ALPHA, BETA)
+            for e, o in zip(esperado, obtenido):
+                np.testing.assert_allclose(o, e, rtol=0, atol=0, equal_nan=True)
+            print(f"{n:>12,} | {t_leg:>12.4f} | {t_vec:>16.6f} | {t_leg / t_vec:>10.0f}x")
+        else:
+            print(f"{n:>12,} | {'-':>12} | {t_vec:>16.6f} | {'-':>11}")
+
+def benchmark_ols(n_series=2_000, semanas=52):
+    try:
+        from sklearn.linear_model import LinearRegression
+    except ImportError:
+        print("\nsklearn no está instalado: se omite la comparación OLS.")
+        return
+
+    rng = np.random.default_rng(1)
+    indices = rng.uniform(0, 100, (n_series, semanas))
+    casos = np.round(rng.normal(60, 15, (n_series, semanas)))
+    indices[rng.random(indices.shape) < 0.02] = np.nan
+
+    def con_sklearn():
+        res = []
+        for i in range(n_series):
+            _, d_ind, d_casos = motor_modelo_b.calcular_deltas(indices[i], casos[i])
+            validos = ~(np.isnan(d_ind) | np.isnan(d_casos))
+            modelo = LinearRegression(fit_intercept=True)
+            modelo.fit(d_ind[validos].reshape(-1, 1), d_casos[validos])
+            res.append((modelo.intercept_, modelo.coef_[0]))
+        return np.array(res)
+
+    t_sk = medir(con_sklearn, repeticiones=1)
+    t_lote = medir(motor_modelo_b.ajustar_modelo_b, indices, casos)
+
+    esperado = con_sklearn()
+    alpha, beta = motor_modelo_b.ajustar_modelo_b(indices, casos)
+    np.testing.assert_allclose(alpha, esperado[:, 0], rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(beta, esperado[:, 1], rtol=1e-9, atol=1e-9)
+
+    print(f"\nOLS de {n_series:,} series x {semanas} semanas")
+    print(f"  sklearn (una por una): {t_sk:.4f} s")
+    print(f"  Lote vectorizado:      {t_lote:.6f} s ({t_sk / t_lote:.0f}x)")
+
+if __name__ == "__main__":
+    main()
+    benchmark_ols()
@@ -0,0 +1,153 @@
+"""
+Benchmark del refresco de la tabla tras una edición.
+
+Sobre una serie de 50,000 semanas aplica ediciones, altas y bajas como lo hacen
+el gestor y el Modelo B (bitacora.aplicar_operacion + reajuste + estimaciones)
+y mide la latencia por cambio de:
+
+  * Reconstruir un ttk.Treeview completo (borrar todo e insertar con iterrows,
+    como se hacía antes).
+  * Actualizar la TablaVirtual con el cambio: conserva el desplazamiento y solo
+    llama a tree.item en los renglones visibles cuyo texto cambió.
+
+Necesita una pantalla (Tk); sin ella solo mide el recálculo del modelo.
+
+Uso:
+    python benchmark_tabla.py
+"""
+import time
+import numpy as np
+import pandas as pd
+import utilidades
+import bitacora
+
+FILAS = 50_000
+CAMBIOS = 200
+CAMBIOS_LEGADO = 3  # Reconstruir 50k filas tarda segundos por cambio
+
+def generar_datos(n, semilla=0):
+    rng = np.random.default_rng(semilla)
+    return pd.DataFrame({
+        utilidades.COL_SEMANA: np.arange(1, n + 1),
+        utilidades.COL_PERIODO: pd.date_range("1990-01-07", periods=n, freq="7D"),
+        utilidades.COL_INDICE: rng.uniform(0, 100, n).round(1),
+        utilidades.COL_INDICE_PREV: 0.0,
+        utilidades.COL_CASOS: np.round(rng.normal(60, 15, n)),
+    })
+
+def generar_cambios(df, cantidad, semilla=1):
+    """Mezcla de ediciones (70%), altas (15%) y bajas (15%) en posiciones aleatorias."""
+    rng = np.random.default_rng(semilla)
+    n = len(df)
+    cambios = []
+    for _ in range(cantidad):
+        tipo = rng.choice(["edicion", "alta", "baja"], p=[0.7, 0.15, 0.15])
+        idx = int(rng.integers(1, n - 1))
+        if tipo == "edicion":
+            cambios.append(bitacora.op_edicion(idx, {
+                utilidades.COL_INDICE: float(rng.uniform(0, 100)),
+                utilidades.COL_CASOS: float(rng.integers(20, 100)),
+            }))
+        elif tipo == "alta":
+            fecha = df[utilidades.COL_PERIODO].iloc[idx] + pd.Timedelta(days=3)
+            cambios.append(bitacora.op_alta({
+                utilidades.COL_SEMANA: str(idx), utilidades.COL_PERIODO: fecha,
+                utilidades.COL_INDICE: float(rng.uniform(0, 100)), utilidades.COL_INDICE_PREV: 0,
+                utilidades.COL_CASOS: float(rng.integers(20, 100)),
+            }))
+            n += 1
+        else:
+            cambios.append(bitacora.op_baja(idx))
+            n -= 1
+    return cambios
+
+def recalcular(df):
+    """Lo que hace actualizar_tabla_ui antes de pintar: Indice_t_1, reajuste y estimaciones."""
+    df[utilidades.COL_INDICE_PREV] = df[utilidades.COL_INDICE].shift(1)
+    alpha, beta = utilidades.calcular_coeficientes(df)
+    return utilidades.aplicar_estimaciones(df, alpha, beta)
+
+def reconstruir_treeview(tabla, df):
+    """Copia del refresco original (referencia)."""
+    for row in tabla.get_children():
+        tabla.delete(row)
+    for i, row in df.iterrows():
+        fecha_str = row[utilidades.COL_PERIODO].strftime('%d/%m/%Y') if isinstance(row[utilidades.COL_PERIODO], pd.Timestamp) else str(row[utilidades.COL_PERIODO])
+        ind_t1 = row.get(utilidades.COL_INDICE_PREV, 0)
+        ind_t1_str = f"{ind_t1:.1f}" if pd.notna(ind_t1) else "0.0"
+        est_sin = row.get(utilidades.COL_EST_SIN, 0)
+        est_con = row.get(utilidades.COL_EST_CON, 0)
+        str_sin = f"{est_sin:.2f}" if est_sin != 0 else "-"
+        str_con = f"{est_con:.2f}" if est_con != 0 else "-"
+        tabla.insert("", "end", iid=str(i), values=[
+            row[utilidades.COL_SEMANA], fecha_str, row[utilidades.COL_INDICE], ind_t1_str, row[utilidades.COL_CASOS], str_sin, str_con
+        ])
+
+def resumen(nombre, tiempos):
+    t = np.array(tiempos) * 1000
+    print(f"  {nombre:<28} mediana {np.median(t):>9.2f} ms | p95 {np.percentile(t, 95):>9.2f} ms | máx {t.max():>9.2f} ms")
+
+def medir_modelo(df, cambios):
+    tiempos = []
+    for op in cambios:
+        inicio = time.perf_counter()
+        df = recalcular(bitacora.aplicar_operacion(df, op))
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+def main():
+    df = recalcular(generar_datos(FILAS))
+    cambios = generar_cambios(df, CAMBIOS)
+    print(f"Refresco por cambio sobre {FILAS:,} filas ({CAMBIOS} cambios)")
+    resumen("Cambio + reajuste", medir_modelo(df.copy(), cambios))
+
+    try:
+        import tkinter as tk
+        from tkinter import ttk
+        import tabla_virtual
+        root = tk.Tk()
+    except Exception as e:
+        print(f"\nSin pantalla para Tk ({e}): se omite la medición de la tabla.")
+        return
+    root.geometry("900x700")
+    cols = [utilidades.COL_SEMANA, utilidades.COL_PERIODO, utilidades.COL_INDICE, utilidades.COL_INDICE_PREV,
+            utilidades.COL_CASOS, utilidades.COL_EST_SIN, utilidades.COL_EST_CON]
+
+    # --- Tabla virtual: se desplaza a la mitad y se aplican los cambios ahí ---
+    virtual = tabla_virtual.TablaVirtual(root, cols)
+    virtual.pack(fill="both", expand=True)
+    root.update()
+    virtual.cargar_df(df, cols, tabla_virtual.FORMATOS_MODELO_B)
+    virtual.seleccionar(len(df) // 2, emitir=False)  # Desplaza la vista a la mitad
+    root.update()
+
+    df_v = df.copy()
+    tiempos, repintados = [], []
+    for op in cambios:
+        inicio = time.perf_counter()
+        cambio = bitacora.posicion_operacion(df_v, op)
+        df_v = recalcular(bitacora.aplicar_operacion(df_v, op))
+        virtual.actualizar_df(df_v, cols, tabla_virtual.FORMATOS_MODELO_B, cambio)
+        root.update_idletasks()
+        tiempos.append(time.perf_counter() - inicio)
+        repintados.append(virtual.ultimos_repintados)
+    resumen("TablaVirtual (diferencias)", tiempos)
+    print(f"  {'':<28} renglones tocados por cambio: mediana {int(np.median(repintados))}, máx {max(repintados)}")
+    virtual.destroy()
+
+    # --- Treeview completo (comportamiento anterior) ---
+    arbol = ttk.Treeview(root, columns=cols, show="headings")
+    arbol.pack(fill="both", expand=True)
+    df_l = df.copy()
+    tiempos = []
+    for op in cambios[:CAMBIOS_LEGADO]:
+        inicio = time.perf_counter()
+        df_l = recalcular(bitacora.aplicar_operacion(df_l, op))
+        reconstruir_treeview(arbol, df_l)
+        root.update_idletasks()
+        tiempos.append(time.perf_counter() - inicio)
+    resumen(f"Treeview completo ({CAMBIOS_LEGADO} cambios)", tiempos)
+    root.destroy()
+
+if __name__ == "__main__":
+    main()
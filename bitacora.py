@@ -0,0 +1,226 @@
+import os
+import json
+import math
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+import utilidades
+
+# ===================== BITÁCORA DE CAMBIOS (WAL) =====================
+# Cada alta/edición/baja se agrega como una línea JSON a "<libro>.diario" en
+# lugar de reescribir todo el .xlsx. El libro se compacta (se reescribe con
+# todos los cambios) en segundo plano cada cierto número de cambios o al
+# guardar explícitamente. Si la aplicación se cierra de golpe, al abrir el
+# libro se vuelven a aplicar los cambios que quedaron en la bitácora.
+#
+# "<libro>.diario.base" guarda el último número de secuencia incluido en el
+# libro junto con el hash del libro escrito; así, si el proceso muere entre
+# escribir el libro y recortar la bitácora, no se aplica nada dos veces.
+
+EXT_DIARIO = ".diario"
+EXT_BASE = ".diario.base"
+
+# ===================== OPERACIONES =====================
+def _a_json(valor):
+    if isinstance(valor, pd.Timestamp):
+        return None if pd.isna(valor) else {"__fecha__": valor.isoformat()}
+    if isinstance(valor, np.generic):
+        valor = valor.item()
+    if isinstance(valor, float) and math.isnan(valor):
+        return None
+    return valor
+
+def _de_json(valor):
+    if isinstance(valor, dict) and "__fecha__" in valor:
+        return pd.Timestamp(valor["__fecha__"])
+    return np.nan if valor is None else valor
+
+def op_alta(fila):
+    return {"op": "alta", "fila": {k: _a_json(v) for k, v in fila.items()}}
+
+def op_edicion(idx, valores):
+    return {"op": "edicion", "idx": int(idx), "valores": {k: _a_json(v) for k, v in valores.items()}}
+
+def op_baja(idx):
+    return {"op": "baja", "idx": int(idx)}
+
+def posicion_operacion(df, op):
+    """
+    Fila que toca la operación sobre el DataFrame ordenado (antes de aplicarla)
+    y cuántas filas agrega: +1 alta, -1 baja, 0 edición.
+    """
+    tipo = op["op"]
+    if tipo == "alta":
+        if df is None or df.empty:
+            return 0, 1
+        fecha = _de_json(op["fila"].get(utilidades.COL_PERIODO))
+        return int(df[utilidades.COL_PERIODO].searchsorted(fecha, side="right")), 1
+    if tipo == "baja":
+        return op["idx"], -1
+    return op["idx"], 0
+
+def ordenar(df):
+    """Orden estable por Periodo: reordenar datos ya ordenados no los mueve."""
+    return df.sort_values(by=utilidades.COL_PERIODO, kind="stable").reset_index(drop=True)
+
+def aplicar_operacion(df, op):
+    """Aplica una operación a un DataFrame ordenado y devuelve el resultado ordenado."""
+    tipo = op["op"]
+    if tipo == "alta":
+        # El JSON no conserva los tipos: se validan y convierten al esquema
+        fila = utilidades.fila_esquema({k: _de_json(v) for k, v in op["fila"].items()})
+        if df is None or df.empty:
+            return ordenar(fila)
+        return ordenar(pd.concat([df, fila], ignore_index=True))
+    if tipo == "edicion":
+        for col, valor in op["valores"].items():
+            df.at[op["idx"], col] = utilidades.valor_esquema(col, _de_json(valor))
+        return ordenar(df)
+    if tipo == "baja":
+        return df.drop(df.index[op["idx"]]).reset_index(drop=True)
+    raise ValueError(f"Operación desconocida en la bitácora: {tipo}")
+
+# ===================== BITÁCORA =====================
+def _hash_archivo(ruta):
+    h = hashlib.sha1()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+def _leer_lineas(ruta):
+    ops = []
+    if not os.path.exists(ruta):
+        return ops
+    with open(ruta, "r", encoding="utf-8") as f:
+        for linea in f:
+            linea = linea.strip()
+            if not linea:
+                continue
+            try:
+                ops.append(json.loads(linea))
+            except ValueError:
+                # Última línea a medio escribir por un cierre abrupto
+                break
+    return ops
+
+class Bitacora:
+    """Bitácora de escritura anticipada asociada a un libro de Excel."""
+
+    def __init__(self, ruta_excel):
+        self.ruta_excel = ruta_excel
+        self.ruta_diario = ruta_excel + EXT_DIARIO
+        self.ruta_base = ruta_excel + EXT_BASE
+        self._lock = threading.Lock()
+        self._hilo = None
+        self.ultimo_error = None
+
+        ops = _leer_lineas(self.ruta_diario)
+        base = self._leer_base()
+        self.seq = max([op["seq"] for op in ops] + [base["seq"]])
+        self.pendientes = len(ops)
+
+    def _leer_base(self):
+        try:
+            with open(self.ruta_base, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"seq": 0, "hash": None}
+
+    def registrar(self, op):
+        """Agrega la operación al final de la bitácora y la fuerza a disco."""
+        with self._lock:
+            self.seq += 1
+            linea = json.dumps({"seq": self.seq, **op}, ensure_ascii=False)
+            with open(self.ruta_diario, "a", encoding="utf-8") as f:
+                f.write(linea + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.pendientes += 1
+
+    def descartar(self):
+        """Borra la bitácora cuando el libro ya contiene todos los cambios."""
+        with self._lock:
+            for ruta in (self.ruta_diario, self.ruta_base):
+                if os.path.exists(ruta):
+                    os.remove(ruta)
+            self.pendientes = 0
+
+    def recuperar(self, df):
+        """
+        Aplica al DataFrame recién leído del libro los cambios que no llegaron a
+        compactarse. Devuelve (df, número de cambios recuperados).
+        """
+        ops = _leer_lineas(self.ruta_diario)
+        if not ops:
+            return df, 0
+        base = self._leer_base()
+        seq_en_libro = 0
+        if base["hash"] and os.path.exists(self.ruta_excel) and _hash_archivo(self.ruta_excel) == base["hash"]:
+            seq_en_libro = base["seq"]
+
+        aplicadas = 0
+        for op in ops:
+            if op["seq"] <= seq_en_libro:
+                continue
+            df = aplicar_operacion(df, op)
+            aplicadas += 1
+        return df, aplicadas
+
+    def _compactar(self, df, seq_snap, escribir):
+        base, ext = os.path.splitext(self.ruta_excel)
+        tmp = f"{base}.compactando{ext}"
+        try:
+            escribir(df, tmp)
+            marca = {"seq": seq_snap, "hash": _hash_archivo(tmp)}
+            with open(self.ruta_base + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(marca, f)
+            os.replace(self.ruta_base + ".tmp", self.ruta_base)
+            os.replace(tmp, self.ruta_excel)
+        except Exception as e:
+            self.ultimo_error = e
+            if os.path.exists(tmp):
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+            raise
+
+        # Recortar la bitácora: solo quedan los cambios posteriores a la copia
+        with self._lock:
+            restantes = [op for op in _leer_lineas(self.ruta_diario) if op["seq"] > seq_snap]
+            with open(self.ruta_diario + ".tmp", "w", encoding="utf-8") as f:
+                for op in restantes:
+                    f.write(json.dumps(op, ensure_ascii=False) + "\n")
+            os.replace(self.ruta_diario + ".tmp", self.ruta_diario)
+            self.pendientes = len(restantes)
+        self.ultimo_error = None
+
+    def _compactar_en_hilo(self, df, seq_snap, escribir):
+        try:
+            self._compactar(df, seq_snap, escribir)
+        except Exception:
+            pass  # La bitácora queda intacta; ultimo_error indica el motivo
+
+    def compactando(self):
+        return self._hilo is not None and self._hilo.is_alive()
+
+    def compactar(self, df, escribir, en_segundo_plano=True):
+        """
+        Reescribe el libro con el estado actual usando escribir(df, ruta).
+        En segundo plano trabaja sobre una copia y no bloquea la interfaz; en
+        primer plano espera a que termine cualquier compactación en curso y
+        propaga los errores (p. ej. PermissionError si el Excel está abierto).
+        """
+        if en_segundo_plano and self.compactando():
+            return
+        snapshot = df.copy()
+        seq_snap = self.seq  # Cambios incluidos en la copia
+        if en_segundo_plano:
+            self._hilo = threading.Thread(target=self._compactar_en_hilo, args=(snapshot, seq_snap, escribir), daemon=True)
+            self._hilo.start()
+            return
+        if self._hilo is not None:
+            self._hilo.join()
+        self._compactar(snapshot, seq_snap, escribir)
@@ -0,0 +1,249 @@
+import os
+import json
+import hashlib
+import warnings
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+# ===================== CACHÉ DE EXCEL =====================
+# Guarda una copia columnar (.npz) de cada hoja leída en una carpeta junto al
+# libro. Las siguientes aperturas cargan esa copia en lugar de volver a parsear
+# el .xlsx con openpyxl, que es lo más lento de abrir un archivo grande.
+#
+# Cada entrada se valida con (ruta, mtime, tamaño) y, si estos cambian, con el
+# hash del contenido: un archivo tocado pero idéntico sigue siendo un acierto.
+#
+# El .npz no lleva objetos de Python (se carga con allow_pickle=False): las
+# columnas de texto o mixtas se guardan como códigos enteros más el texto de
+# cada valor distinto y una letra con su tipo.
+
+CARPETA_CACHE = ".cache_excel"
+LIMITE_BYTES = 256 * 1024 * 1024  # Tamaño máximo de cada carpeta de caché
+VERSION = 1
+
+# Tipo de cada valor distinto de una columna de objetos: letra -> lectura desde texto
+_TIPOS_VALOR = {
+    "s": str,
+    "i": int,
+    "f": float,
+    "b": lambda texto: texto == "True",
+    "t": pd.Timestamp,
+}
+
+CONTADORES = {"aciertos": 0, "fallos": 0}
+
+def _carpeta(ruta_excel):
+    return os.path.join(os.path.dirname(os.path.abspath(ruta_excel)), CARPETA_CACHE)
+
+def _clave(ruta_excel, hoja):
+    ruta_norm = os.path.normcase(os.path.abspath(ruta_excel))
+    return hashlib.sha1(f"{ruta_norm}|{hoja}".encode("utf-8")).hexdigest()[:20]
+
+def _rutas_entrada(ruta_excel, hoja):
+    base = os.path.join(_carpeta(ruta_excel), _clave(ruta_excel, hoja))
+    return base + ".json", base + ".npz"
+
+def _hash_contenido(ruta_excel):
+    h = hashlib.sha1()
+    with open(ruta_excel, "rb") as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+def _leer_meta(ruta_meta):
+    try:
+        with open(ruta_meta, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _escribir_atomico(ruta, escribir):
+    tmp = ruta + ".tmp"
+    escribir(tmp)
+    os.replace(tmp, ruta)
+
+def _escribir_meta(ruta_meta, meta):
+    def escribir(tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+    _escribir_atomico(ruta_meta, escribir)
+
+def _texto_valor(valor):
+    """(letra de tipo, texto) de un valor de una columna de objetos."""
+    if isinstance(valor, (bool, np.bool_)):
+        return "b", str(bool(valor))
+    if isinstance(valor, (int, np.integer)):
+        return "i", str(int(valor))
+    if isinstance(valor, (float, np.floating)):
+        return "f", repr(float(valor))
+    if isinstance(valor, str):
+        return "s", valor
+    if isinstance(valor, datetime):
+        return "t", pd.Timestamp(valor).isoformat()
+    raise TypeError(f"valor de tipo {type(valor).__name__} no admitido en la caché")
+
+def _codificar(serie):
+    """
+    Columna de objetos o categórica -> (códigos int32, textos, tipos, clase).
+    El código -1 es un valor faltante.
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codigos, valores, clase = serie.cat.codes.to_numpy(), serie.cat.categories, "categoria"
+    else:
+        codigos, valores = pd.factorize(serie, use_na_sentinel=True)
+        clase = "objeto"
+    pares = [_texto_valor(v) for v in valores]
+    tipos = np.array([t for t, _ in pares], dtype=str)
+    textos = np.array([x for _, x in pares], dtype=str)
+    return codigos.astype(np.int32), textos, tipos, clase
+
+def _decodificar(codigos, textos, tipos, clase):
+    valores = [_TIPOS_VALOR[t](x) for t, x in zip(tipos.tolist(), textos.tolist())]
+    if clase == "categoria":
+        return pd.Categorical.from_codes(codigos, categories=valores)
+    tabla = np.empty(len(valores) + 1, dtype=object)
+    tabla[:-1] = valores
+    tabla[-1] = np.nan  # Índice -1: faltante
+    return tabla[codigos]
+
+def _guardar_entrada(ruta_excel, hoja, df, stat, hash_contenido):
+    ruta_meta, ruta_datos = _rutas_entrada(ruta_excel, hoja)
+    os.makedirs(os.path.dirname(ruta_meta), exist_ok=True)
+
+    columnas, clases = {}, []
+    for i, col in enumerate(df.columns):
+        serie = df[col]
+        datos = serie.to_numpy()
+        if datos.dtype == object or isinstance(serie.dtype, pd.CategoricalDtype):
+            codigos, textos, tipos, clase = _codificar(serie)
+            columnas[f"c{i}"], columnas[f"t{i}"], columnas[f"k{i}"] = codigos, textos, tipos
+        else:
+            columnas[f"c{i}"], clase = datos, ""
+        clases.append(clase)
+    meta = {
+        "version": VERSION,
+        "ruta": os.path.abspath(ruta_excel),
+        "hoja": hoja,
+        "mtime_ns": stat.st_mtime_ns,
+        "tamano": stat.st_size,
+        "hash": hash_contenido,
+        "columnas": [str(c) for c in df.columns],
+        "tipos_columna": [type(c).__name__ for c in df.columns],
+        "codificadas": clases,
+    }
+
+    def escribir_datos(tmp):
+        with open(tmp, "wb") as f:
+            np.savez(f, **columnas)
+
+    _escribir_atomico(ruta_datos, escribir_datos)
+    _escribir_meta(ruta_meta, meta)
+    _aplicar_limite(os.path.dirname(ruta_meta))
+
+def _cargar_entrada(ruta_datos, meta):
+    with np.load(ruta_datos, allow_pickle=False) as datos:
+        columnas = {}
+        for i, (nombre, tipo, clase) in enumerate(zip(meta["columnas"], meta["tipos_columna"], meta["codificadas"])):
+            if tipo == "int":
+                nombre = int(nombre)
+            if clase:
+                columnas[nombre] = _decodificar(datos[f"c{i}"], datos[f"t{i}"], datos[f"k{i}"], clase)
+            else:
+                columnas[nombre] = datos[f"c{i}"]
+    # Marcar como usado recientemente para la política de desalojo (LRU)
+    os.utime(ruta_datos, None)
+    return pd.DataFrame(columnas)
+
+def _aplicar_limite(carpeta, limite=None):
+    """Desaloja las entradas menos usadas hasta que la carpeta quepa en el límite."""
+    limite = LIMITE_BYTES if limite is None else limite
+    entradas = []
+    total = 0
+    for nombre in os.listdir(carpeta):
+        if not nombre.endswith(".npz"):
+            continue
+        ruta_datos = os.path.join(carpeta, nombre)
+        ruta_meta = ruta_datos[:-4] + ".json"
+        try:
+            st = os.stat(ruta_datos)
+            tam = st.st_size + (os.path.getsize(ruta_meta) if os.path.exists(ruta_meta) else 0)
+        except OSError:
+            continue
+        entradas.append((st.st_mtime, tam, ruta_datos, ruta_meta))
+        total += tam
+
+    entradas.sort()
+    for _, tam, ruta_datos, ruta_meta in entradas:
+        if total <= limite:
+            break
+        for ruta in (ruta_meta, ruta_datos):
+            try:
+                os.remove(ruta)
+            except OSError:
+                pass
+        total -= tam
+
+def leer_excel(ruta_excel, hoja=0):
+    """
+    Equivalente a pd.read_excel(ruta_excel, sheet_name=hoja) con caché en disco.
+    Los errores de lectura del .xlsx se propagan igual que con pandas; los de la
+    caché nunca impiden abrir el archivo.
+    """
+    stat = os.stat(ruta_excel)
+    ruta_meta, ruta_datos = _rutas_entrada(ruta_excel, hoja)
+    meta = _leer_meta(ruta_meta)
+    hash_contenido = None
+
+    if meta and meta.get("version") == VERSION and os.path.exists(ruta_datos):
+        vigente = meta["mtime_ns"] == stat.st_mtime_ns and meta["tamano"] == stat.st_size
+        if not vigente and meta["tamano"] == stat.st_size:
+            hash_contenido = _hash_contenido(ruta_excel)
+            vigente = hash_contenido == meta["hash"]
+            if vigente:
+                meta["mtime_ns"] = stat.st_mtime_ns
+                try:
+                    _escribir_meta(ruta_meta, meta)
+                except OSError:
+                    pass
+        if vigente:
+            try:
+                df = _cargar_entrada(ruta_datos, meta)
+                CONTADORES["aciertos"] += 1
+                return df
+            except Exception:
+                pass
+
+    CONTADORES["fallos"] += 1
+    df = pd.read_excel(ruta_excel, sheet_name=hoja)
+    try:
+        if hash_contenido is None:
+            hash_contenido = _hash_contenido(ruta_excel)
+        _guardar_entrada(ruta_excel, hoja, df, stat, hash_contenido)
+    except Exception as e:
+        # La lectura ya tuvo éxito; solo se avisa que la próxima no será más rápida
+        warnings.warn(f"No se pudo escribir la caché de {ruta_excel}: {e}", RuntimeWarning, stacklevel=2)
+    return df
+
+def invalidar(ruta_excel, hoja=0):
+    """Borra la entrada de un libro, o toda la caché de su carpeta si hoja es None."""
+    if hoja is None:
+        carpeta = _carpeta(ruta_excel)
+        if os.path.isdir(carpeta):
+            for nombre in os.listdir(carpeta):
+                try:
+                    os.remove(os.path.join(carpeta, nombre))
+                except OSError:
+                    pass
+        return
+    for ruta in _rutas_entrada(ruta_excel, hoja):
+        try:
+            os.remove(ruta)
+        except OSError:
+            pass
+
+def estadisticas():
+    """Aciertos, fallos y tasa de aciertos de la caché en esta sesión."""
+    total = CONTADORES["aciertos"] + CONTADORES["fallos"]
+    tasa = CONTADORES["aciertos"] / total if total else 0.0
+    return {**CONTADORES, "tasa_aciertos": tasa}
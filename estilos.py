@@ -43,6 +43,16 @@ def aplicar_tema(root):
                     foreground="white")
     style.map("Treeview", background=[('selected', COLOR_ACCENT)])
 
+def crear_ventana(maestro=None):
+    """Ventana de una herramienta: Toplevel del menú si hay maestro, si no una Tk propia."""
+    return tk.Toplevel(maestro) if maestro is not None else tk.Tk()
+
+def traer_al_frente(ventana):
+    """Muestra una ventana que ya estaba abierta (aunque esté minimizada)."""
+    ventana.deiconify()
+    ventana.lift()
+    ventana.focus_force()
+
 # ===================== WIDGETS PERSONALIZADOS =====================
 def crear_boton(parent, text, command, tipo="primary", width=30):
     """Crea un botón estilizado."""
@@ -1,84 +1,284 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
+from tkinter import messagebox, filedialog, simpledialog
 import pandas as pd
+import numpy as np
 import datetime
-import os
 try:
     from tkcalendar import DateEntry
 except ImportError:
     messagebox.showerror("Error", "Falta tkcalendar. Instala: pip install tkcalendar")
 import utilidades
 import estilos
+import tabla_virtual
+import motor_modelo_b
+import sesion
+import registro_referencias
+import tareas
+import importar_trends
+import importar_boletines
 
 # ===================== VARIABLES GLOBALES =====================
+root = None
 df_datos = None
 ruta_actual = None  # Ruta del archivo de trabajo actual
 modelo_alpha = 0.0
 modelo_beta = 0.0
 modelo_listo = False
+# Estadísticos suficientes del ajuste; se corrigen localmente en cada alta/edición/baja
+regresion = motor_modelo_b.RegresionIncremental()
 
-# Variables para el modelo de referencia (Cold Start)
-ref_alpha = None
-ref_beta = None
-ref_nombre = None
+# Modelo de referencia (Cold Start): entrada de registro_referencias o None
+ref_actual = None
+
+# Recálculo diferido: una ráfaga de altas/ediciones/bajas se refleja en un solo
+# recálculo de estimaciones y repintado de la tabla
+RETARDO_RECALCULO_MS = 150
+recalculo_id = None       # after() del recálculo agendado
+cambios_pendientes = []   # (fila, filas agregadas) de cada cambio aún no reflejado
 
 # ===================== LÓGICA =====================
 def inicializar_nuevo():
     """Inicializa el gestor con una tabla vacía."""
     global df_datos, ruta_actual
-    df_datos = pd.DataFrame(columns=[utilidades.COL_SEMANA, utilidades.COL_PERIODO, utilidades.COL_INDICE, utilidades.COL_INDICE_PREV, utilidades.COL_CASOS])
+    df_datos = utilidades.tabla_vacia()
     ruta_actual = None
+    regresion.reiniciar()
+    cancelar_recalculo()
     actualizar_tabla_ui()
     sugerir_siguientes_datos()
 
+def usar_referencia(entrada):
+    """Fija la referencia (entrada del registro o None) y la recuerda para la siguiente sesión."""
+    global ref_actual
+    ref_actual = entrada
+    registro_referencias.fijar_actual(entrada["clave"] if entrada else None)
+    if entrada is None:
+        lbl_ref_status.config(text="Referencia: Automática (temporadas similares del registro)", fg=estilos.COLOR_TEXTO_SEC)
+    else:
+        lbl_ref_status.config(text=f"Referencia: {entrada['nombre']}", fg=estilos.COLOR_SUCCESS)
+
 def cargar_modelo_referencia():
-    """Carga un Excel antiguo para usar su fórmula."""
-    global ref_alpha, ref_beta, ref_nombre
+    """Ajusta un Excel antiguo, lo agrega al registro y usa su fórmula."""
     ruta = filedialog.askopenfilename(
         title="Selecciona un Excel ANTERIOR (Modelo de Referencia)",
         filetypes=[("Excel", "*.xlsx *.xls")]
     )
     if not ruta:
-        return
+        return None
 
     try:
-        df_ref = pd.read_excel(ruta)
-        # Normalizar columnas (intento básico)
-        df_ref = df_ref.rename(columns={
-            "Numero de Semana Epidemiologica": utilidades.COL_SEMANA,
-            "Indice": utilidades.COL_INDICE,
-            "Indice t-1": utilidades.COL_INDICE_PREV,
-            "Casos Reportados": utilidades.COL_CASOS
-        })
-        
-        alpha, beta = utilidades.calcular_coeficientes(df_ref)
-        
-        if alpha is not None:
-            ref_alpha = alpha
-            ref_beta = beta
-            ref_nombre = os.path.basename(ruta)
-            lbl_ref_status.config(text=f"Referencia: {ref_nombre}", fg=estilos.COLOR_SUCCESS)
-            messagebox.showinfo("Referencia Cargada", f"Se usará la fórmula de:\n{ref_nombre}\n\nCuando no haya suficientes datos nuevos.")
-        else:
-            messagebox.showwarning("Error", "El archivo seleccionado no tiene suficientes datos para crear un modelo.")
+        # Si el contenido ya está registrado no se vuelve a leer el libro
+        entrada = registro_referencias.registrar(
+            ruta, lambda: utilidades.normalizar_columnas(sesion.leer_excel(ruta)))
     except Exception as e:
         messagebox.showerror("Error", f"No se pudo cargar la referencia:\n{e}")
+        return None
+    if entrada is None:
+        messagebox.showwarning("Error", "El archivo seleccionado no tiene suficientes datos para crear un modelo.")
+        return None
+    usar_referencia(entrada)
+    messagebox.showinfo("Referencia Cargada", f"Se usará la fórmula de:\n{entrada['nombre']}\n\nCuando no haya suficientes datos nuevos.")
+    return entrada
+
+def elegir_modelo_referencia():
+    """Ventana con las referencias registradas para elegir, agregar o quitar."""
+    top = tk.Toplevel(root)
+    top.title("Modelos de Referencia Registrados")
+    estilos.aplicar_tema(top)
+    estilos.crear_label_subtitulo(top, "Modelos de Referencia Registrados").pack(pady=10)
+
+    cols_ref = ["nombre", "desde", "hasta", "pares", "alpha", "beta", "r2", "registrado"]
+    titulos = {"nombre": "Archivo", "desde": "Desde", "hasta": "Hasta", "pares": "Pares",
+               "alpha": "Alpha", "beta": "Beta", "r2": "R²", "registrado": "Registrado"}
+    tabla_ref = tabla_virtual.TablaVirtual(top, cols_ref, titulos=titulos, ancho=110)
+    tabla_ref.column("nombre", width=220, anchor="w")
+    tabla_ref.pack(fill="both", expand=True, padx=20, pady=5)
+    formatos = [tabla_virtual.fmt_texto] * 4 + [tabla_virtual.fmt_decimal(4, si_nan="-")] * 3 + [tabla_virtual.fmt_texto]
+    entradas = []
+
+    def refrescar():
+        entradas[:] = registro_referencias.listar()
+        tabla_ref.cargar_df(pd.DataFrame(entradas, columns=cols_ref).fillna({"desde": "-", "hasta": "-"}), cols_ref, formatos)
+        for i, e in enumerate(entradas):
+            if ref_actual is not None and e["clave"] == ref_actual["clave"]:
+                tabla_ref.seleccionar(i)
+
+    def elegida():
+        sel = tabla_ref.selection()
+        if not sel:
+            messagebox.showwarning("Aviso", "Selecciona una referencia.", parent=top)
+            return None
+        return entradas[int(sel[0])]
+
+    def usar():
+        entrada = elegida()
+        if entrada is not None:
+            usar_referencia(entrada)
+            top.destroy()
+
+    def agregar():
+        if cargar_modelo_referencia() is not None:
+            refrescar()
+
+    def automatica():
+        usar_referencia(None)
+        top.destroy()
+
+    def quitar():
+        entrada = elegida()
+        if entrada is None:
+            return
+        registro_referencias.eliminar(entrada["clave"])
+        if ref_actual is not None and ref_actual["clave"] == entrada["clave"]:
+            usar_referencia(None)
+        refrescar()
+
+    frame_botones = tk.Frame(top, bg=estilos.COLOR_FONDO)
+    frame_botones.pack(pady=10)
+    estilos.crear_boton(frame_botones, "✅ Usar", usar, tipo="success", width=14).pack(side="left", padx=5)
+    estilos.crear_boton(frame_botones, "📂 Agregar Excel", agregar, tipo="info", width=16).pack(side="left", padx=5)
+    estilos.crear_boton(frame_botones, "🗑 Quitar", quitar, tipo="danger", width=14).pack(side="left", padx=5)
+    estilos.crear_boton(frame_botones, "🔎 Automática", automatica, tipo="secondary", width=16).pack(side="left", padx=5)
+    refrescar()
 
 def accion_abrir():
-    """Abre un archivo Excel existente."""
-    global df_datos, ruta_actual
-    df, ruta = utilidades.leer_excel()
-    if df is None:
+    """Abre un archivo Excel existente; se lee y ajusta en segundo plano."""
+    ruta = utilidades.pedir_ruta_excel()
+    if ruta is None:
         return
-    
-    df_datos = df.sort_values(by=utilidades.COL_PERIODO).reset_index(drop=True)
-    ruta_actual = ruta
-    actualizar_tabla_ui()
+
+    def trabajo(tarea):
+        tarea.avance(0.05, "Leyendo el Excel...")
+        # Basta con Periodo: la tabla puede venir sin índice o sin casos y completarse con los importadores
+        df = utilidades.cargar_tabla(ruta, requeridas=(utilidades.COL_PERIODO,))
+        tarea.avance(0.6, "Ajustando el modelo...")
+        df = df.sort_values(by=utilidades.COL_PERIODO).reset_index(drop=True)
+        nueva = motor_modelo_b.RegresionIncremental()
+        nueva.reconstruir(
+            df[utilidades.COL_INDICE].to_numpy(dtype=float, na_value=np.nan),
+            df[utilidades.COL_CASOS].to_numpy(dtype=float, na_value=np.nan)
+        )
+        tarea.avance(0.8, "Calculando estimaciones...")
+        df, alpha, beta = estimar(df, nueva)
+        tarea.avance(1.0)
+        return ruta, df, nueva, alpha, beta
+
+    tareas.ejecutar(root, trabajo, aplicar_apertura, panel=panel_progreso, texto="Abriendo archivo...")
+
+def aplicar_apertura(resultado):
+    """Sustituye de una vez la tabla, el ajuste y la vista por lo que preparó accion_abrir."""
+    global df_datos, ruta_actual, regresion
+    ruta_actual, df_datos, regresion, alpha, beta = resultado
+    cancelar_recalculo()  # Los cambios pendientes eran de la tabla anterior
+    fijar_modelo(alpha, beta)
+    if df_datos.empty:
+        tabla.limpiar()
+    else:
+        tabla.cargar_df(df_datos, cols, tabla_virtual.FORMATOS_MODELO_B)
     sugerir_siguientes_datos()
 
+def importar_google_trends():
+    """Lee descargas CSV de Google Trends y escribe el índice semanal en la tabla actual."""
+    if df_datos is None or df_datos.empty:
+        messagebox.showwarning("Aviso", "Primero abre o captura la tabla de casos.")
+        return
+    rutas = filedialog.askopenfilenames(title="Descargas de Google Trends", filetypes=[("CSV de Google Trends", "*.csv")])
+    if not rutas:
+        return
+
+    def trabajo(tarea):
+        tarea.avance(0.1, f"Leyendo {len(rutas)} descargas...")
+        return importar_trends.importar_trends(rutas)
+
+    tareas.ejecutar(root, trabajo, aplicar_trends, panel=panel_progreso, texto="Importando Google Trends...")
+
+def aplicar_trends(resultado):
+    """Elige el término si hace falta, une el índice con la tabla y reajusta."""
+    global df_datos
+    tabla_trends, resumen = resultado
+    if tabla_trends.empty:
+        errores = "\n".join(e["error"] for e in resumen["errores"][:5])
+        messagebox.showerror("Error", f"No se importó ninguna semana.\n{errores}")
+        return
+
+    termino = None
+    terminos = resumen["terminos"]
+    if utilidades.COL_TERMINO not in df_datos.columns and len(terminos) > 1:
+        termino = simpledialog.askstring("Término", "Las descargas traen varios términos:\n" + "\n".join(terminos) +
+                                         "\n\n¿Cuál se usa como índice?", initialvalue=terminos[0], parent=root)
+        if termino is None:
+            return
+
+    recalcular_ahora()
+    try:
+        nuevo, actualizadas = importar_trends.fusionar_indice(df_datos, tabla_trends, termino)
+    except ValueError as e:
+        messagebox.showerror("Error", str(e))
+        return
+    df_datos = nuevo
+    actualizar_memoria()
+
+    mensaje = f"Índice escrito en {actualizadas} de {len(df_datos)} semanas ({resumen['archivos']} descargas)."
+    if resumen["ventanas_sueltas"]:
+        mensaje += f"\n{resumen['ventanas_sueltas']} descargas no se traslapan con las demás y conservan su propia escala."
+    if resumen["errores"]:
+        mensaje += f"\n{len(resumen['errores'])} archivos omitidos."
+    messagebox.showinfo("Google Trends", mensaje)
+
+def importar_boletines_epidemiologicos():
+    """Lee tablas del Boletín Epidemiológico y actualiza o agrega los casos semanales."""
+    if df_datos is None:
+        messagebox.showwarning("Aviso", "Primero abre o crea una tabla de datos.")
+        return
+    rutas = filedialog.askopenfilenames(title="Tablas del Boletín Epidemiológico",
+                                        filetypes=[("Excel o CSV", "*.xlsx *.xls *.csv")])
+    if not rutas:
+        return
+
+    def trabajo(tarea):
+        tarea.avance(0.0, f"Leyendo {len(rutas)} boletines...")
+        return importar_boletines.leer_boletines(
+            rutas, al_avance=lambda leidos, total: tarea.avance(leidos / total, f"Boletines leídos: {leidos} de {total}"))
+
+    tareas.ejecutar(root, trabajo, aplicar_boletines, panel=panel_progreso, texto="Importando boletines...")
+
+def aplicar_boletines(resultado):
+    """Elige el estado si hace falta e integra los casos en la tabla de una sola vez."""
+    global df_datos
+    tabla_boletines, resumen = resultado
+    if tabla_boletines.empty:
+        errores = "\n".join(e["error"] for e in resumen["errores"][:5])
+        messagebox.showerror("Error", f"No se importó ninguna semana.\n{errores}")
+        return
+
+    estado = None
+    if utilidades.COL_REGION not in df_datos.columns:
+        estado = simpledialog.askstring("Estado", "¿De qué estado son los casos de esta tabla?\n"
+                                        f"({importar_boletines.NACIONAL} = suma de todos los estados)",
+                                        initialvalue=importar_boletines.NACIONAL, parent=root)
+        if estado is None:
+            return
+
+    recalcular_ahora()
+    try:
+        nuevo, actualizadas, agregadas = importar_boletines.integrar_casos(df_datos, tabla_boletines, estado)
+    except ValueError as e:
+        messagebox.showerror("Error", str(e))
+        return
+    df_datos = nuevo
+    actualizar_memoria()
+
+    mensaje = f"{actualizadas} semanas actualizadas y {agregadas} agregadas ({resumen['archivos']} boletines)."
+    if resumen["reemplazadas"]:
+        mensaje += f"\n{resumen['reemplazadas']} filas se tomaron de revisiones posteriores del mismo boletín."
+    if resumen["errores"]:
+        mensaje += f"\n{len(resumen['errores'])} archivos omitidos."
+    messagebox.showinfo("Boletín Epidemiológico", mensaje)
+
 def accion_guardar():
     """Guarda los datos actuales en un archivo Excel."""
     global df_datos, ruta_actual
+    recalcular_ahora()
     if df_datos is None or df_datos.empty:
         messagebox.showwarning("Aviso", "No hay datos para guardar.")
         return
@@ -90,16 +290,63 @@ def accion_guardar():
         ruta_actual = nueva_ruta
 
 def actualizar_memoria():
-    """Ordena los datos y actualiza la tabla sin guardar en disco."""
+    """Ordena los datos, reconstruye el ajuste y actualiza la tabla sin guardar en disco."""
     global df_datos
     if df_datos is None:
         return
     df_datos = df_datos.sort_values(by=utilidades.COL_PERIODO).reset_index(drop=True)
+    regresion.reconstruir(
+        df_datos[utilidades.COL_INDICE].to_numpy(dtype=float, na_value=np.nan),
+        df_datos[utilidades.COL_CASOS].to_numpy(dtype=float, na_value=np.nan)
+    )
+    cancelar_recalculo()
     actualizar_tabla_ui()
 
+# --- Cambios locales (mantienen el orden por fecha y corrigen el ajuste en O(1)) ---
+def _pares_tramo(k, extra=0):
+    """Pares (ΔIndice, ΔCasos) de las filas k..k+2(+extra): las únicas que cambian al tocar la fila k."""
+    ini = max(k - 2, 0)
+    fin = k + 3 + extra
+    indice = df_datos[utilidades.COL_INDICE].iloc[ini:fin].to_numpy(dtype=float, na_value=np.nan)
+    casos = df_datos[utilidades.COL_CASOS].iloc[ini:fin].to_numpy(dtype=float, na_value=np.nan)
+    return motor_modelo_b.pares_modelo_b(indice, casos, desde=k - ini)
+
+def _insertar_fila(nueva):
+    """Inserta la fila en su posición por fecha (después de las fechas iguales)."""
+    global df_datos
+    pos = int(df_datos[utilidades.COL_PERIODO].searchsorted(nueva[utilidades.COL_PERIODO], side="right"))
+    antes = _pares_tramo(pos)
+    df_datos = pd.concat([df_datos.iloc[:pos], utilidades.fila_esquema(nueva), df_datos.iloc[pos:]], ignore_index=True)
+    regresion.corregir(antes, _pares_tramo(pos, extra=1))
+    return pos, 1
+
+def _eliminar_fila(k):
+    global df_datos
+    antes = _pares_tramo(k)
+    df_datos = df_datos.drop(df_datos.index[k]).reset_index(drop=True)
+    regresion.corregir(antes, _pares_tramo(k, extra=-1))
+    return k, -1
+
+def _editar_fila(k, valores):
+    """Edita la fila k; si la nueva fecha rompe el orden se reubica (baja + alta).
+    Devuelve (fila, filas agregadas) para refrescar la tabla, o la lista
+    [(k, -1), (nueva posición, +1)] si la fila se movió."""
+    periodos = df_datos[utilidades.COL_PERIODO]
+    fecha = valores[utilidades.COL_PERIODO]
+    fuera_de_orden = (k > 0 and periodos.iloc[k - 1] > fecha) or (k < len(df_datos) - 1 and periodos.iloc[k + 1] < fecha)
+    if fuera_de_orden:
+        fila = df_datos.iloc[k][[utilidades.COL_SEMANA, utilidades.COL_PERIODO, utilidades.COL_INDICE, utilidades.COL_INDICE_PREV, utilidades.COL_CASOS]].to_dict()
+        fila.update(valores)
+        return [_eliminar_fila(k), _insertar_fila(fila)]
+    antes = _pares_tramo(k)
+    for col, valor in valores.items():
+        df_datos.at[k, col] = utilidades.valor_esquema(col, valor)
+    regresion.corregir(antes, _pares_tramo(k))
+    return k, 0
+
 def predecir_siguiente():
     global df_datos, modelo_alpha, modelo_beta, modelo_listo
-    global ref_alpha, ref_beta, ref_nombre
+    recalcular_ahora()  # El modelo debe corresponder a la tabla actual
 
     if df_datos is None or df_datos.empty:
         messagebox.showwarning("Aviso", "No hay datos suficientes.")
@@ -107,23 +354,40 @@ def predecir_siguiente():
     
     # Determinar qué modelo usar
     usando_referencia = False
+    ensamble = None
     alpha_uso = modelo_alpha
     beta_uso = modelo_beta
     
     if not modelo_listo:
-        if ref_alpha is not None:
-            alpha_uso = ref_alpha
-            beta_uso = ref_beta
+        if ref_actual is not None:
+            alpha_uso = ref_actual["alpha"]
+            beta_uso = ref_actual["beta"]
             usando_referencia = True
         else:
-            messagebox.showwarning("Aviso", "Se necesitan al menos 3 semanas para el modelo propio.\n\n💡 TIP: Carga un 'Modelo de Referencia' para predecir desde la semana 1.")
-            return
+            # Sin fórmula elegida: promedio de las temporadas registradas más parecidas
+            ensamble = registro_referencias.pronostico_ensamble(
+                df_datos[utilidades.COL_INDICE].to_numpy(dtype=float, na_value=np.nan),
+                df_datos[utilidades.COL_CASOS].to_numpy(dtype=float, na_value=np.nan))
+            if ensamble is None:
+                messagebox.showwarning("Aviso", "Se necesitan al menos 3 semanas para el modelo propio.\n\n💡 TIP: Carga un 'Modelo de Referencia' para predecir desde la semana 1\n(con el Índice de la semana anterior en la columna Índice t-1 del libro).")
+                return
+            alpha_uso = ensamble["alpha"]
+            beta_uso = ensamble["beta"]
 
     last_row = df_datos.iloc[-1]
     try:
         casos_actuales = last_row[utilidades.COL_CASOS]
         semana_actual = last_row[utilidades.COL_SEMANA]
-        delta_ind_next = last_row[utilidades.COL_INDICE] - last_row[utilidades.COL_INDICE_PREV]
+        # Misma tendencia que centra el intervalo (motor_modelo_b): de la serie Indice;
+        # con una sola semana, del Indice_t_1 que trae el libro
+        indice = df_datos[utilidades.COL_INDICE].to_numpy(dtype=float, na_value=np.nan)
+        if len(indice) > 1:
+            delta_ind_next = float(indice[-1] - indice[-2])
+        else:
+            delta_ind_next = float(indice[-1] - last_row[utilidades.COL_INDICE_PREV])
+        if not np.isfinite(delta_ind_next):
+            messagebox.showwarning("Aviso", "Para conocer la tendencia del Índice se necesitan las dos últimas semanas con Índice,\no una sola semana con su Índice (t-1) en el libro.")
+            return
         
         pred_sin = casos_actuales + beta_uso * delta_ind_next
         pred_con = casos_actuales + alpha_uso + beta_uso * delta_ind_next
@@ -131,7 +395,10 @@ def predecir_siguiente():
         titulo_msg = "Predicción Futura"
         if usando_referencia:
             titulo_msg += " (USANDO REFERENCIA)"
-            subtitulo = f"⚠️ USANDO FÓRMULA DE: {ref_nombre}"
+            subtitulo = f"⚠️ USANDO FÓRMULA DE: {ref_actual['nombre']}"
+        elif ensamble is not None:
+            titulo_msg += " (TEMPORADAS SIMILARES)"
+            subtitulo = f"⚠️ USANDO EL PROMEDIO DE {len(ensamble['vecinos'])} TEMPORADAS SIMILARES"
         else:
             subtitulo = "✅ Usando modelo propio (Datos actuales)"
 
@@ -143,8 +410,20 @@ def predecir_siguiente():
             f"• Tendencia del Índice Google: {delta_ind_next:+.2f}\n\n"
             f"RESULTADOS:\n"
             f"🟢 Estimado SIN intercepto:  {pred_sin:.2f} casos\n"
-            f"🔵 Estimado CON intercepto:  {pred_con:.2f} casos\n"
+            f"🔵 Estimado CON intercepto:  {pred_con:.2f} casos\n\n"
         )
+        if usando_referencia:
+            # Intervalo con los estadísticos guardados del ajuste de la referencia
+            margen = registro_referencias.margen_prediccion(ref_actual, delta_ind_next, utilidades.NIVEL_INTERVALO)
+            intervalos = {"nivel": utilidades.NIVEL_INTERVALO, "analitico": (pred_con - margen, pred_con + margen), "bootstrap": None}
+            mensaje += "\n".join(utilidades.texto_intervalos(intervalos))
+        elif ensamble is not None:
+            mensaje += "TEMPORADAS SIMILARES (peso, estimado con intercepto):\n"
+            for entrada, peso, pred in zip(ensamble["vecinos"], ensamble["pesos"], ensamble["predicciones"]):
+                mensaje += f"• {entrada['nombre']}: {peso:.0%}, {pred:.2f} casos\n"
+            mensaje += f"Rango entre temporadas: {ensamble['predicciones'].min():.2f} a {ensamble['predicciones'].max():.2f}"
+        else:
+            mensaje += "\n".join(utilidades.texto_intervalos(utilidades.intervalos_siguiente(df_datos)))
         messagebox.showinfo(titulo_msg, mensaje)
     except Exception as e:
         messagebox.showerror("Error de Cálculo", f"No se pudo predecir: {e}")
@@ -153,17 +432,17 @@ def predecir_siguiente():
 def agregar_registro():
     global df_datos
     try:
-        sem = ent_semana.get().strip()
+        if ent_semana.get().strip() == "": return
+        sem = int(ent_semana.get().strip())
         fecha = pd.Timestamp(ent_fecha.get_date())
         ind = float(ent_indice.get().strip())
         casos = float(ent_casos.get().strip())
-        if sem == "": return
-        nueva = {utilidades.COL_SEMANA: sem, utilidades.COL_PERIODO: fecha, utilidades.COL_INDICE: ind, utilidades.COL_INDICE_PREV: 0, utilidades.COL_CASOS: casos}
-        if df_datos is None:
-            df_datos = pd.DataFrame([nueva])
+        nueva = {utilidades.COL_SEMANA: sem, utilidades.COL_PERIODO: fecha, utilidades.COL_INDICE: ind, utilidades.COL_INDICE_PREV: np.nan, utilidades.COL_CASOS: casos}
+        if df_datos is None or df_datos.empty:
+            df_datos = utilidades.fila_esquema(nueva)
+            actualizar_memoria()
         else:
-            df_datos = pd.concat([df_datos, pd.DataFrame([nueva])], ignore_index=True)
-        actualizar_memoria()
+            programar_recalculo(_insertar_fila(nueva))
         limpiar_formulario()
     except ValueError:
         messagebox.showerror("Error", "Números inválidos.")
@@ -174,11 +453,13 @@ def actualizar_registro():
     if not sel: return
     try:
         idx = int(sel[0])
-        df_datos.at[idx, utilidades.COL_SEMANA] = ent_semana.get().strip()
-        df_datos.at[idx, utilidades.COL_PERIODO] = pd.Timestamp(ent_fecha.get_date())
-        df_datos.at[idx, utilidades.COL_INDICE] = float(ent_indice.get().strip())
-        df_datos.at[idx, utilidades.COL_CASOS] = float(ent_casos.get().strip())
-        actualizar_memoria()
+        cambio = _editar_fila(idx, {
+            utilidades.COL_SEMANA: int(ent_semana.get().strip()),
+            utilidades.COL_PERIODO: pd.Timestamp(ent_fecha.get_date()),
+            utilidades.COL_INDICE: float(ent_indice.get().strip()),
+            utilidades.COL_CASOS: float(ent_casos.get().strip())
+        })
+        programar_recalculo(cambio)
         limpiar_formulario()
     except ValueError:
         messagebox.showerror("Error", "Datos inválidos.")
@@ -189,8 +470,7 @@ def eliminar_registro():
     if not sel: return
     if messagebox.askyesno("Confirmar", "¿Eliminar?"):
         idx = int(sel[0])
-        df_datos = df_datos.drop(df_datos.index[idx]).reset_index(drop=True)
-        actualizar_memoria()
+        programar_recalculo(_eliminar_fila(idx))
         limpiar_formulario()
 
 def sugerir_siguientes_datos():
@@ -215,35 +495,87 @@ def limpiar_formulario():
     sugerir_siguientes_datos()
 
 # ===================== UI =====================
-def actualizar_tabla_ui():
-    global df_datos, modelo_alpha, modelo_beta, modelo_listo
-    for row in tabla.get_children(): tabla.delete(row)
-    if df_datos is None or df_datos.empty: return
-    
-    df_datos = utilidades.calcular_modelo_b_completo(df_datos)
-    
-    # Recalcular modelo local
-    alpha, beta = utilidades.calcular_coeficientes(df_datos)
-    if alpha is not None:
+def estimar(df, reg):
+    """Estimaciones con los coeficientes del estado incremental reg (sin reajustar toda la serie).
+    No toca el estado global; devuelve (df, alpha, beta) con alpha None si aún no hay modelo."""
+    # Indice_t_1 se recalcula como en modelo_b.guardar_cambios, salvo en la primera
+    # semana: el índice de la semana anterior solo puede venir del libro
+    previo = df[utilidades.COL_INDICE].shift(1)
+    if len(df):
+        previo.iloc[0] = df[utilidades.COL_INDICE_PREV].iloc[0]
+    df[utilidades.COL_INDICE_PREV] = previo
+    alpha, beta = reg.coeficientes() if len(df) >= 3 else (None, None)
+    if alpha is None:
+        df[utilidades.COL_EST_SIN] = 0.0
+        df[utilidades.COL_EST_CON] = 0.0
+        return df, None, None
+    return utilidades.aplicar_estimaciones(df, alpha, beta), alpha, beta
+
+def fijar_modelo(alpha, beta):
+    global modelo_alpha, modelo_beta, modelo_listo
+    modelo_listo = alpha is not None
+    if modelo_listo:
         modelo_alpha = alpha
         modelo_beta = beta
-        modelo_listo = True
+
+def programar_recalculo(cambio):
+    """
+    Marca la tabla como desactualizada tras un alta/edición/baja (cambio es
+    (fila, filas agregadas) o una lista de ellos) y agenda un
+    único recálculo para cuando pase RETARDO_RECALCULO_MS sin otro cambio.
+    El ajuste incremental ya se corrigió; lo que se difiere son las
+    estimaciones de toda la serie y el repintado.
+    """
+    global recalculo_id
+    cambios_pendientes.extend([cambio] if isinstance(cambio, tuple) else cambio)
+    # Los índices de la vista ya no corresponden a df_datos
+    tabla.seleccionar(None, emitir=False)
+    if recalculo_id is not None:
+        root.after_cancel(recalculo_id)  # Un cambio nuevo deja viejo al agendado
+    recalculo_id = root.after(RETARDO_RECALCULO_MS, recalcular_ahora)
+
+def cancelar_recalculo():
+    """Descarta el recálculo agendado (la tabla se va a recargar completa)."""
+    global recalculo_id
+    if recalculo_id is not None:
+        root.after_cancel(recalculo_id)
+        recalculo_id = None
+    cambios_pendientes.clear()
+
+def recalcular_ahora():
+    """Aplica el recálculo agendado, si lo hay; se llama antes de leer el modelo o la vista."""
+    global recalculo_id
+    if recalculo_id is None:
+        return
+    root.after_cancel(recalculo_id)
+    recalculo_id = None
+    cambios = list(cambios_pendientes)
+    cambios_pendientes.clear()
+    actualizar_tabla_ui(cambios)
+
+def actualizar_tabla_ui(cambio=None):
+    """Recalcula las estimaciones y refresca la tabla; tras altas/ediciones/bajas
+    (cambio = (fila, filas agregadas) o lista de ellos) conserva el desplazamiento
+    y solo repinta lo que cambió."""
+    global df_datos
+    if df_datos is None or df_datos.empty:
+        tabla.limpiar()
+        return
+    
+    df_datos, alpha, beta = estimar(df_datos, regresion)
+    fijar_modelo(alpha, beta)
+
+    # Solo se formatean las filas visibles
+    if cambio is None:
+        tabla.cargar_df(df_datos, cols, tabla_virtual.FORMATOS_MODELO_B)
     else:
-        modelo_listo = False
-
-    for i, row in df_datos.iterrows():
-        fecha_str = row[utilidades.COL_PERIODO].strftime('%d/%m/%Y') if isinstance(row[utilidades.COL_PERIODO], pd.Timestamp) else str(row[utilidades.COL_PERIODO])
-        ind_t1 = row.get(utilidades.COL_INDICE_PREV, 0)
-        ind_t1_str = f"{ind_t1:.1f}" if pd.notna(ind_t1) else "0.0"
-        est_sin = row.get(utilidades.COL_EST_SIN, 0)
-        est_con = row.get(utilidades.COL_EST_CON, 0)
-        str_sin = f"{est_sin:.2f}" if est_sin != 0 else "-"
-        str_con = f"{est_con:.2f}" if est_con != 0 else "-"
-        tabla.insert("", tk.END, iid=str(i), values=[
-            row[utilidades.COL_SEMANA], fecha_str, row[utilidades.COL_INDICE], ind_t1_str, row[utilidades.COL_CASOS], str_sin, str_con
-        ])
+        tabla.actualizar_df(df_datos, cols, tabla_virtual.FORMATOS_MODELO_B, cambio)
 
 def on_select(event):
+    if recalculo_id is not None:
+        # Clic sobre una vista que aún no refleja el último cambio: se repinta y se vuelve a elegir
+        recalcular_ahora()
+        return
     sel = tabla.selection()
     if not sel: return
     idx = int(sel[0])
@@ -256,82 +588,103 @@ def on_select(event):
     ent_casos.delete(0, tk.END); ent_casos.insert(0, str(row[utilidades.COL_CASOS]))
 
 # ===================== GUI SETUP =====================
-root = tk.Tk()
-root.title("Gestor de Datos en Vivo")
-root.state('zoomed')
-estilos.aplicar_tema(root)
-
-# HEADER
-frame_header = tk.Frame(root, bg=estilos.COLOR_FONDO)
-frame_header.pack(fill="x", pady=20)
-tk.Label(frame_header, text="GESTIÓN DE DATOS Y PROYECCIONES", font=estilos.FONT_H1, bg=estilos.COLOR_FONDO, fg=estilos.COLOR_TEXTO).pack()
-estilos.crear_boton(frame_header, "⬅ Volver al Menú", root.destroy, tipo="secondary", width=20).pack(anchor="nw", padx=20)
-
-# INPUT CARD
-card_input = estilos.crear_card(root)
-card_input.pack(fill="x", padx=20, pady=10)
-estilos.crear_label_subtitulo(card_input, "📝 Registro Semanal", bg=estilos.COLOR_PANEL).pack(anchor="w", pady=(0, 10))
-
-frame_form = tk.Frame(card_input, bg=estilos.COLOR_PANEL)
-frame_form.pack(fill="x")
-
-tk.Label(frame_form, text="Semana:", bg=estilos.COLOR_PANEL, fg="white", font=estilos.FONT_BODY).grid(row=0, column=0, padx=5)
-ent_semana = tk.Entry(frame_form, width=10, font=estilos.FONT_BODY); ent_semana.grid(row=0, column=1, padx=5)
-
-tk.Label(frame_form, text="Fecha:", bg=estilos.COLOR_PANEL, fg="white", font=estilos.FONT_BODY).grid(row=0, column=2, padx=5)
-ent_fecha = DateEntry(frame_form, width=12, date_pattern='dd/mm/y', background=estilos.COLOR_ACCENT, foreground='white')
-ent_fecha.grid(row=0, column=3, padx=5)
-
-tk.Label(frame_form, text="Índice (t):", bg=estilos.COLOR_PANEL, fg="white", font=estilos.FONT_BODY).grid(row=0, column=4, padx=5)
-ent_indice = tk.Entry(frame_form, width=10, font=estilos.FONT_BODY); ent_indice.grid(row=0, column=5, padx=5)
-
-tk.Label(frame_form, text="Casos Reales:", bg=estilos.COLOR_PANEL, fg="white", font=estilos.FONT_BODY).grid(row=0, column=6, padx=5)
-ent_casos = tk.Entry(frame_form, width=10, font=estilos.FONT_BODY); ent_casos.grid(row=0, column=7, padx=5)
-
-# ACTIONS
-frame_actions = tk.Frame(card_input, bg=estilos.COLOR_PANEL)
-frame_actions.pack(pady=15)
-estilos.crear_boton(frame_actions, "➕ AGREGAR", agregar_registro, tipo="success", width=15).pack(side="left", padx=5)
-estilos.crear_boton(frame_actions, "✏ EDITAR", actualizar_registro, tipo="warning", width=15).pack(side="left", padx=5)
-estilos.crear_boton(frame_actions, "🗑 BORRAR", eliminar_registro, tipo="danger", width=15).pack(side="left", padx=5)
-estilos.crear_boton(frame_actions, "🧹 LIMPIAR", limpiar_formulario, tipo="secondary", width=15).pack(side="left", padx=5)
-estilos.crear_boton(frame_actions, "📂 ABRIR ARCHIVO", accion_abrir, tipo="info", width=20).pack(side="left", padx=20)
-estilos.crear_boton(frame_actions, "💾 GUARDAR ARCHIVO", accion_guardar, tipo="success", width=20).pack(side="left", padx=5)
-
-# PREDICTION CARD
-card_pred = estilos.crear_card(root)
-card_pred.pack(fill="x", padx=20, pady=5)
-estilos.crear_label_subtitulo(card_pred, "🔮 Predicción y Modelos", bg=estilos.COLOR_PANEL).pack(anchor="w", pady=(0, 10))
-
-# Status label for reference model
-lbl_ref_status = tk.Label(card_pred, text="Referencia: Ninguna (Usando modelo local)", font=estilos.FONT_SMALL, bg=estilos.COLOR_PANEL, fg=estilos.COLOR_TEXTO_SEC)
-lbl_ref_status.pack(pady=2)
-
-frame_pred_actions = tk.Frame(card_pred, bg=estilos.COLOR_PANEL)
-frame_pred_actions.pack(pady=5)
-
-estilos.crear_boton(frame_pred_actions, "📂 Cargar Modelo de Referencia", cargar_modelo_referencia, tipo="secondary", width=30).pack(side="left", padx=10)
-estilos.crear_boton(frame_pred_actions, "✨ PREDECIR SIGUIENTE SEMANA", predecir_siguiente, tipo="info", width=30).pack(side="left", padx=10)
-
-
-# TABLE
-frame_table = tk.Frame(root, bg=estilos.COLOR_FONDO)
-frame_table.pack(fill="both", expand=True, padx=20, pady=10)
-cols = [utilidades.COL_SEMANA, utilidades.COL_PERIODO, utilidades.COL_INDICE, utilidades.COL_INDICE_PREV, utilidades.COL_CASOS, utilidades.COL_EST_SIN, utilidades.COL_EST_CON]
-scroll = ttk.Scrollbar(frame_table, orient="vertical")
-tabla = ttk.Treeview(frame_table, columns=cols, show="headings", yscrollcommand=scroll.set)
-scroll.config(command=tabla.yview); scroll.pack(side="right", fill="y")
-tabla.pack(side="left", fill="both", expand=True)
-
-tabla.heading(utilidades.COL_SEMANA, text="Semana")
-tabla.heading(utilidades.COL_PERIODO, text="Fecha")
-tabla.heading(utilidades.COL_INDICE, text="Índice (t)")
-tabla.heading(utilidades.COL_INDICE_PREV, text="Índice (t-1)")
-tabla.heading(utilidades.COL_CASOS, text="Casos")
-tabla.heading(utilidades.COL_EST_SIN, text="Est. SIN Int")
-tabla.heading(utilidades.COL_EST_CON, text="Est. CON Int")
-for c in cols: tabla.column(c, width=100, anchor="center")
-tabla.bind("<<TreeviewSelect>>", on_select)
-
-inicializar_nuevo()
-root.mainloop()
+def construir_interfaz(ventana):
+    """Construye la interfaz dentro de ventana (Tk propia o Toplevel del menú)."""
+    global root, ent_semana, ent_fecha, ent_indice, ent_casos, lbl_ref_status, cols, tabla, panel_progreso
+    root = ventana
+    root.title("Gestor de Datos en Vivo")
+    root.state('zoomed')
+    estilos.aplicar_tema(root)
+
+    # HEADER
+    frame_header = tk.Frame(root, bg=estilos.COLOR_FONDO)
+    frame_header.pack(fill="x", pady=20)
+    tk.Label(frame_header, text="GESTIÓN DE DATOS Y PROYECCIONES", font=estilos.FONT_H1, bg=estilos.COLOR_FONDO, fg=estilos.COLOR_TEXTO).pack()
+    estilos.crear_boton(frame_header, "⬅ Volver al Menú", root.destroy, tipo="secondary", width=20).pack(anchor="nw", padx=20)
+
+    # Avance de la apertura de archivos (se leen y ajustan en segundo plano)
+    panel_progreso = tareas.PanelProgreso(frame_header)
+    panel_progreso.pack()
+
+    # INPUT CARD
+    card_input = estilos.crear_card(root)
+    card_input.pack(fill="x", padx=20, pady=10)
+    estilos.crear_label_subtitulo(card_input, "📝 Registro Semanal", bg=estilos.COLOR_PANEL).pack(anchor="w", pady=(0, 10))
+
+    frame_form = tk.Frame(card_input, bg=estilos.COLOR_PANEL)
+    frame_form.pack(fill="x")
+
+    tk.Label(frame_form, text="Semana:", bg=estilos.COLOR_PANEL, fg="white", font=estilos.FONT_BODY).grid(row=0, column=0, padx=5)
+    ent_semana = tk.Entry(frame_form, width=10, font=estilos.FONT_BODY); ent_semana.grid(row=0, column=1, padx=5)
+
+    tk.Label(frame_form, text="Fecha:", bg=estilos.COLOR_PANEL, fg="white", font=estilos.FONT_BODY).grid(row=0, column=2, padx=5)
+    ent_fecha = DateEntry(frame_form, width=12, date_pattern='dd/mm/y', background=estilos.COLOR_ACCENT, foreground='white')
+    ent_fecha.grid(row=0, column=3, padx=5)
+
+    tk.Label(frame_form, text="Índice (t):", bg=estilos.COLOR_PANEL, fg="white", font=estilos.FONT_BODY).grid(row=0, column=4, padx=5)
+    ent_indice = tk.Entry(frame_form, width=10, font=estilos.FONT_BODY); ent_indice.grid(row=0, column=5, padx=5)
+
+    tk.Label(frame_form, text="Casos Reales:", bg=estilos.COLOR_PANEL, fg="white", font=estilos.FONT_BODY).grid(row=0, column=6, padx=5)
+    ent_casos = tk.Entry(frame_form, width=10, font=estilos.FONT_BODY); ent_casos.grid(row=0, column=7, padx=5)
+
+    # ACTIONS
+    frame_actions = tk.Frame(card_input, bg=estilos.COLOR_PANEL)
+    frame_actions.pack(pady=15)
+    estilos.crear_boton(frame_actions, "➕ AGREGAR", agregar_registro, tipo="success", width=15).pack(side="left", padx=5)
+    estilos.crear_boton(frame_actions, "✏ EDITAR", actualizar_registro, tipo="warning", width=15).pack(side="left", padx=5)
+    estilos.crear_boton(frame_actions, "🗑 BORRAR", eliminar_registro, tipo="danger", width=15).pack(side="left", padx=5)
+    estilos.crear_boton(frame_actions, "🧹 LIMPIAR", limpiar_formulario, tipo="secondary", width=15).pack(side="left", padx=5)
+    estilos.crear_boton(frame_actions, "📂 ABRIR ARCHIVO", accion_abrir, tipo="info", width=20).pack(side="left", padx=20)
+    estilos.crear_boton(frame_actions, "💾 GUARDAR ARCHIVO", accion_guardar, tipo="success", width=20).pack(side="left", padx=5)
+    estilos.crear_boton(frame_actions, "📥 GOOGLE TRENDS", importar_google_trends, tipo="info", width=20).pack(side="left", padx=5)
+    estilos.crear_boton(frame_actions, "📰 BOLETINES", importar_boletines_epidemiologicos, tipo="info", width=20).pack(side="left", padx=5)
+
+    # PREDICTION CARD
+    card_pred = estilos.crear_card(root)
+    card_pred.pack(fill="x", padx=20, pady=5)
+    estilos.crear_label_subtitulo(card_pred, "🔮 Predicción y Modelos", bg=estilos.COLOR_PANEL).pack(anchor="w", pady=(0, 10))
+
+    # Status label for reference model
+    lbl_ref_status = tk.Label(card_pred, text="Referencia: Automática (temporadas similares del registro)", font=estilos.FONT_SMALL, bg=estilos.COLOR_PANEL, fg=estilos.COLOR_TEXTO_SEC)
+    lbl_ref_status.pack(pady=2)
+    # Se retoma la referencia elegida en la sesión anterior (sin abrir su Excel)
+    ultima = registro_referencias.actual()
+    if ultima is not None:
+        usar_referencia(ultima)
+
+    frame_pred_actions = tk.Frame(card_pred, bg=estilos.COLOR_PANEL)
+    frame_pred_actions.pack(pady=5)
+
+    estilos.crear_boton(frame_pred_actions, "📂 Cargar Modelo de Referencia", cargar_modelo_referencia, tipo="secondary", width=30).pack(side="left", padx=10)
+    estilos.crear_boton(frame_pred_actions, "📚 Referencias Guardadas", elegir_modelo_referencia, tipo="secondary", width=30).pack(side="left", padx=10)
+    estilos.crear_boton(frame_pred_actions, "✨ PREDECIR SIGUIENTE SEMANA", predecir_siguiente, tipo="info", width=30).pack(side="left", padx=10)
+
+
+    # TABLE
+    frame_table = tk.Frame(root, bg=estilos.COLOR_FONDO)
+    frame_table.pack(fill="both", expand=True, padx=20, pady=10)
+    cols = [utilidades.COL_SEMANA, utilidades.COL_PERIODO, utilidades.COL_INDICE, utilidades.COL_INDICE_PREV, utilidades.COL_CASOS, utilidades.COL_EST_SIN, utilidades.COL_EST_CON]
+    tabla = tabla_virtual.TablaVirtual(frame_table, cols, titulos={
+        utilidades.COL_SEMANA: "Semana",
+        utilidades.COL_PERIODO: "Fecha",
+        utilidades.COL_INDICE: "Índice (t)",
+        utilidades.COL_INDICE_PREV: "Índice (t-1)",
+        utilidades.COL_CASOS: "Casos",
+        utilidades.COL_EST_SIN: "Est. SIN Int",
+        utilidades.COL_EST_CON: "Est. CON Int",
+    })
+    tabla.pack(fill="both", expand=True)
+    tabla.bind("<<TreeviewSelect>>", on_select)
+
+    inicializar_nuevo()
+
+def abrir(maestro=None):
+    """Abre el gestor; con maestro se crea como Toplevel del menú (mismo proceso)."""
+    if root is not None and root.winfo_exists():
+        estilos.traer_al_frente(root)
+        return root
+    construir_interfaz(estilos.crear_ventana(maestro))
+    return root
+
+if __name__ == "__main__":
+    abrir().mainloop()
@@ -0,0 +1,270 @@
+import numpy as np
+import pandas as pd
+import matplotlib.dates as mdates
+
+# ===================== COMPONENTES DE GRÁFICAS =====================
+# Piezas interactivas reutilizables para las gráficas de matplotlib embebidas
+# en Tk. Este módulo importa matplotlib, así que solo se importa dentro de las
+# funciones que dibujan (ver medir_arranque.py).
+
+def a_numeros(x):
+    """Convierte fechas (o números) a los flotantes que usa matplotlib en el eje X; NaT -> NaN."""
+    x = pd.Series(x) if not isinstance(x, pd.Series) else x
+    if pd.api.types.is_datetime64_any_dtype(x):
+        return mdates.date2num(x.to_numpy())
+    return pd.to_numeric(x, errors="coerce").to_numpy(dtype=float)
+
+def orden_validos(x):
+    """Índices de los valores finitos de x, ordenados por x."""
+    validos = np.flatnonzero(np.isfinite(x))
+    return validos[np.argsort(x[validos], kind="stable")]
+
+class CursorSerie:
+    """
+    Línea vertical + tooltip que siguen al punto más cercano al mouse.
+
+    Las fechas se convierten una sola vez y el punto se busca por bisección,
+    así que cada movimiento cuesta O(log n). Solo el cursor y el tooltip se
+    redibujan: el resto de la gráfica se guarda como fondo en cada dibujo
+    completo (zoom, pan, cambio de tamaño) y se restaura con blitting.
+
+    texto(idx) recibe la posición de la fila (0..n-1) y devuelve el tooltip.
+    """
+
+    def __init__(self, ax, x, y, texto):
+        self.ax = ax
+        self.canvas = ax.figure.canvas
+        self._texto = texto
+        self._x = a_numeros(x)
+        self._y = np.asarray(y, dtype=float)
+
+        # Índices de las filas con fecha válida, ordenados por fecha
+        self._orden = orden_validos(self._x)
+        self._x_ordenadas = self._x[self._orden]
+
+        x0 = self._x_ordenadas[0] if len(self._orden) else 0.0
+        self.linea = ax.axvline(x=x0, color='gray', linestyle='--', alpha=0.5, animated=True)
+        self.linea.set_visible(False)
+        self.annot = ax.annotate("", xy=(x0, 0), xytext=(10, 10), textcoords="offset points",
+                                 bbox=dict(boxstyle="round", fc="w", alpha=0.9),
+                                 arrowprops=dict(arrowstyle="->"), animated=True)
+        self.annot.set_visible(False)
+
+        self._fondo = None
+        self._actual = None
+        self._conexiones = [
+            self.canvas.mpl_connect("draw_event", self._on_draw),
+            self.canvas.mpl_connect("motion_notify_event", self._on_move),
+            self.canvas.mpl_connect("axes_leave_event", self._on_salir),
+        ]
+
+    def indice_cercano(self, x):
+        """Fila cuya x es la más cercana a x (None si no hay puntos)."""
+        n = len(self._x_ordenadas)
+        if n == 0:
+            return None
+        k = int(np.searchsorted(self._x_ordenadas, x))
+        if k == n or (k > 0 and x - self._x_ordenadas[k - 1] <= self._x_ordenadas[k] - x):
+            k -= 1
+        return int(self._orden[k])
+
+    def desconectar(self):
+        for cid in self._conexiones:
+            self.canvas.mpl_disconnect(cid)
+        self._conexiones = []
+
+    # ---------- Eventos ----------
+    def _on_draw(self, event):
+        # Dibujo completo: el fondo ya no incluye al cursor (es "animated")
+        self._fondo = self.canvas.copy_from_bbox(self.ax.figure.bbox)
+        self._pintar_cursor()
+
+    def _on_move(self, event):
+        if event.inaxes is not self.ax or event.xdata is None:
+            self._on_salir(event)
+            return
+        idx = self.indice_cercano(event.xdata)
+        if idx is None or (idx == self._actual and self.linea.get_visible()):
+            return
+        self._actual = idx
+        x = self._x[idx]
+        self.linea.set_xdata([x, x])
+        self.annot.xy = (x, self._y[idx])
+        self.annot.set_text(self._texto(idx))
+        self.linea.set_visible(True)
+        self.annot.set_visible(True)
+        self._pintar_cursor()
+
+    def _on_salir(self, event):
+        if self.linea.get_visible():
+            self.linea.set_visible(False)
+            self.annot.set_visible(False)
+            self._pintar_cursor()
+
+    def _pintar_cursor(self):
+        if self._fondo is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._fondo)
+        if self.linea.get_visible():
+            self.ax.draw_artist(self.linea)
+            self.ax.draw_artist(self.annot)
+        self.canvas.blit(self.ax.figure.bbox)
+
+# ===================== NIVEL DE DETALLE =====================
+# Con series de décadas o varias regiones hay más puntos que píxeles: se dibuja
+# solo un subconjunto que conserva la forma y se recalcula al hacer zoom o pan
+# con la barra de herramientas (eventos xlim_changed / ylim_changed).
+
+UMBRAL_PUNTOS_DISPERSION = 5000   # Arriba de esto la dispersión se dibuja como densidad
+TAMANO_HEXAGONOS = 60             # Hexágonos a lo ancho de la vista
+RETARDO_DENSIDAD_MS = 80          # Espera tras el último zoom/pan antes de rehacer la densidad
+
+def indices_minmax(x, y, x0, x1, cubetas):
+    """
+    Índices (sobre x ordenada) que conservan la forma de la línea entre x0 y x1:
+    el mínimo y el máximo de y en cada una de `cubetas` franjas de igual ancho,
+    más un punto a cada lado del rango para que la línea llegue a los bordes.
+    Si hay pocos puntos visibles se devuelven todos. Costo O(puntos visibles).
+    """
+    n = len(x)
+    ini = max(int(np.searchsorted(x, x0, side="left")) - 1, 0)
+    fin = min(int(np.searchsorted(x, x1, side="right")) + 1, n)
+    if fin - ini <= 2 * cubetas:
+        return np.arange(ini, fin)
+
+    bordes = np.searchsorted(x, np.linspace(x0, x1, cubetas + 1)[1:-1]) - ini
+    inicios = np.unique(np.concatenate(([0], np.clip(bordes, 0, fin - ini - 1))))
+    cubeta = np.repeat(np.arange(len(inicios)), np.diff(np.append(inicios, fin - ini)))
+
+    yv = y[ini:fin]
+    sin_dato = np.isnan(yv)
+    elegidos = [np.array([0, fin - ini - 1])]
+    for valores, reducir in ((np.where(sin_dato, np.inf, yv), np.minimum),
+                             (np.where(sin_dato, -np.inf, yv), np.maximum)):
+        extremos = reducir.reduceat(valores, inicios)
+        candidatos = np.flatnonzero(valores == extremos[cubeta])
+        c = cubeta[candidatos]
+        primero = np.ones(len(c), dtype=bool)
+        primero[1:] = c[1:] != c[:-1]
+        elegidos.append(candidatos[primero])
+    return np.unique(np.concatenate(elegidos)) + ini
+
+class LineasLOD:
+    """
+    Dibuja líneas largas con a lo más dos puntos (mínimo y máximo) por píxel
+    del eje X. Los datos completos se guardan ordenados; en cada cambio de
+    límites o de tamaño se vuelve a elegir el subconjunto de lo visible.
+
+    lineas: lista de (Line2D, y) que comparten la x; las Line2D ya deben
+    estar en el eje (p. ej. creadas con ax.plot) para que los límites
+    automáticos tomen en cuenta todos los datos.
+    """
+
+    def __init__(self, ax, x, lineas):
+        self.ax = ax
+        x = a_numeros(x)
+        orden = orden_validos(x)
+        self._x = x[orden]
+        self._lineas = [(linea, np.asarray(y, dtype=float)[orden]) for linea, y in lineas]
+        self.ultimos_puntos = 0   # Puntos dibujados por línea en el último remuestreo
+        self._cid_limites = ax.callbacks.connect("xlim_changed", self._on_cambio)
+        self._cid_tamano = ax.figure.canvas.mpl_connect("resize_event", self._on_cambio)
+        self.remuestrear()
+
+    def remuestrear(self):
+        x0, x1 = self.ax.get_xlim()
+        cubetas = max(int(self.ax.bbox.width), 1)
+        puntos = 0
+        for linea, y in self._lineas:
+            idx = indices_minmax(self._x, y, x0, x1, cubetas)
+            linea.set_data(self._x[idx], y[idx])
+            puntos = max(puntos, len(idx))
+        self.ultimos_puntos = puntos
+
+    def desconectar(self):
+        self.ax.callbacks.disconnect(self._cid_limites)
+        self.ax.figure.canvas.mpl_disconnect(self._cid_tamano)
+
+    def _on_cambio(self, *args):
+        self.remuestrear()
+
+class DispersionDensa:
+    """
+    Dispersión que cambia a densidad (hexbin) cuando hay demasiadas
+    observaciones para distinguirlas. Los hexágonos se recalculan con los
+    puntos de la vista poco después de cada zoom o pan, así que conservan su
+    tamaño en pantalla y el detalle aparece al acercarse. Con pocos puntos es
+    un scatter normal.
+    """
+
+    def __init__(self, ax, x, y, umbral=UMBRAL_PUNTOS_DISPERSION, label=None, **estilo):
+        self.ax = ax
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        validos = np.isfinite(x) & np.isfinite(y)
+        self._x, self._y = x[validos], y[validos]
+        self._label = label
+        self.densidad = len(self._x) > umbral
+        self._vista = None
+        self._temporizador = None
+        self._temporizador_canvas = None
+        self.barra = None
+        self._cids = []
+        if not self.densidad:
+            self.coleccion = ax.scatter(self._x, self._y, label=label, **estilo)
+            return
+
+        self.coleccion = self._hexbin(self._x, self._y)
+        self.barra = ax.figure.colorbar(self.coleccion, ax=ax, label="Observaciones (escala log)")
+        self._cids = [ax.callbacks.connect("xlim_changed", self._on_limites),
+                      ax.callbacks.connect("ylim_changed", self._on_limites)]
+
+    def _hexbin(self, x, y, extent=None):
+        return self.ax.hexbin(x, y, gridsize=TAMANO_HEXAGONOS, mincnt=1, bins="log",
+                              cmap="Blues", extent=extent, label=self._label)
+
+    def desconectar(self):
+        for cid in self._cids:
+            self.ax.callbacks.disconnect(cid)
+        self._cids = []
+        if self._temporizador is not None:
+            self._temporizador.stop()
+
+    def _on_limites(self, ax):
+        # Los límites cambian a media actualización (x y luego y, o durante un
+        # dibujo): se recalcula después, una vez por ráfaga de zoom/pan.
+        canvas = self.ax.figure.canvas
+        if self._temporizador is None or self._temporizador_canvas is not canvas:
+            self._temporizador = canvas.new_timer(interval=RETARDO_DENSIDAD_MS)
+            self._temporizador.single_shot = True
+            self._temporizador.add_callback(self.recalcular)
+            self._temporizador_canvas = canvas
+        self._temporizador.stop()
+        self._temporizador.start()
+
+    def recalcular(self):
+        """Rehace los hexágonos con los puntos dentro de la vista actual."""
+        ax = self.ax
+        vista = (ax.get_xlim(), ax.get_ylim())
+        if vista == self._vista:
+            return
+        self._vista = vista
+        (x0, x1), (y0, y1) = vista
+        dentro = (self._x >= x0) & (self._x <= x1) & (self._y >= y0) & (self._y <= y1)
+        if not dentro.any():
+            return
+
+        # hexbin pide reajustar los límites; se fija la vista actual (sin emitir
+        # xlim_changed) antes de devolver el autoescalado, o el siguiente dibujo
+        # la movería y volvería a disparar el recálculo
+        auto = (ax.get_autoscalex_on(), ax.get_autoscaley_on())
+        nueva = self._hexbin(self._x[dentro], self._y[dentro], extent=(x0, x1, y0, y1))
+        ax.set_xlim(x0, x1, emit=False)
+        ax.set_ylim(y0, y1, emit=False)
+        ax.set_autoscalex_on(auto[0])
+        ax.set_autoscaley_on(auto[1])
+        self.coleccion.remove()
+        self.coleccion = nueva
+        self.barra.update_normal(nueva)
+        ax.figure.canvas.draw_idle()
@@ -0,0 +1,327 @@
+"""
+Importación masiva de tablas del Boletín Epidemiológico (SINAVE) guardadas en disco.
+
+Cada archivo (Excel o CSV) es el extracto de una semana: una fila por entidad
+federativa y columnas por padecimiento, con la columna "Sem." (casos de la
+semana) bajo cada uno. De cada archivo se toma la columna de sífilis, los
+casos por estado y la semana epidemiológica (del título de la tabla o, si no
+viene, del nombre del archivo). Los archivos se leen en paralelo con un pool
+de procesos.
+
+Cuando una semana se publicó más de una vez (boletín corregido), se conserva
+la revisión más reciente: la de mayor número "rev"/"v" en el nombre del
+archivo y, a igualdad, la modificada al último.
+
+Con --datos, los casos se integran en la tabla de datos en una sola pasada:
+las semanas que ya existen se actualizan y las nuevas se agregan. Si la tabla
+no tiene columna Region se usa el estado indicado con --estado, o el total
+nacional (suma de los estados).
+
+Uso:
+    python importar_boletines.py boletines/ --salida casos_sifilis.csv
+    python importar_boletines.py "boletines/*.xlsx" --datos Datos.xlsx --estado Jalisco --salida Datos_boletines.xlsx
+"""
+import os
+import re
+import sys
+import argparse
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import utilidades
+import procesar_lote
+import importar_trends
+
+ENFERMEDAD = r"sifilis(?! congenita)"  # Sífilis adquirida; la congénita va en otra columna
+NACIONAL = "Nacional"
+COL_ANIO = "Anio"
+FILAS_ENCABEZADO = 15  # Filas donde se busca el título y los encabezados de la tabla
+
+ESTADOS = [
+    "Aguascalientes", "Baja California", "Baja California Sur", "Campeche", "Coahuila", "Colima",
+    "Chiapas", "Chihuahua", "Ciudad de México", "Durango", "Guanajuato", "Guerrero", "Hidalgo",
+    "Jalisco", "México", "Michoacán", "Morelos", "Nayarit", "Nuevo León", "Oaxaca", "Puebla",
+    "Querétaro", "Quintana Roo", "San Luis Potosí", "Sinaloa", "Sonora", "Tabasco", "Tamaulipas",
+    "Tlaxcala", "Veracruz", "Yucatán", "Zacatecas"
+]
+# Otras formas en que aparecen los estados en los boletines -> nombre de ESTADOS
+ALIAS_ESTADOS = {
+    "coahuila de zaragoza": "Coahuila",
+    "distrito federal": "Ciudad de México",
+    "cdmx": "Ciudad de México",
+    "estado de mexico": "México",
+    "edo de mexico": "México",
+    "michoacan de ocampo": "Michoacán",
+    "queretaro de arteaga": "Querétaro",
+    "veracruz de ignacio de la llave": "Veracruz",
+    "veracruz llave": "Veracruz",
+}
+
+_SEMANA_TITULO = re.compile(r"semana epidemiologica (\d{1,2})\D{0,40}?((?:19|20)\d{2})")
+_ANIO = re.compile(r"(?<!\d)((?:19|20)\d{2})(?!\d)")
+_SEMANA_NOMBRE = re.compile(r"sem(?:ana)?[ _.-]*(\d{1,2})(?!\d)")
+_REVISION = re.compile(r"(?:rev(?:ision)?|v)[ _.-]*(\d+)(?!\d)")
+_NUMERO_SUELTO = re.compile(r"(?<!\d)(\d{1,2})(?!\d)")
+
+# ===================== NORMALIZACIÓN =====================
+def normalizar_texto(valor):
+    """Minúsculas, sin acentos ni signos, espacios simples ("Sífilis*" -> "sifilis")."""
+    if valor is None or (isinstance(valor, float) and np.isnan(valor)):
+        return ""
+    texto = unicodedata.normalize("NFKD", str(valor)).encode("ascii", "ignore").decode("ascii").lower()
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", texto).split())
+
+_CATALOGO = {normalizar_texto(e): e for e in ESTADOS}
+_CATALOGO.update(ALIAS_ESTADOS)
+
+def nombre_estado(valor):
+    """Nombre oficial del estado (ignorando acentos y notas al pie) o None."""
+    texto = normalizar_texto(valor)
+    return _CATALOGO.get(texto) or _CATALOGO.get(re.sub(r"( \d+)+$", "", texto))
+
+def _casos(valor):
+    """Número de casos de una celda; el boletín usa "-" para cero."""
+    if isinstance(valor, (int, float, np.number)):
+        return float(valor)
+    texto = str(valor).strip().replace(",", "")
+    if texto in ("-", "–", "—"):
+        return 0.0
+    try:
+        return float(texto)
+    except ValueError:
+        return np.nan
+
+# ===================== LECTURA DE UN BOLETÍN =====================
+def _leer_rejilla(ruta):
+    """La hoja tal cual (sin encabezado) como arreglo de objetos."""
+    if ruta.lower().endswith(".csv"):
+        try:
+            df = pd.read_csv(ruta, header=None, dtype=str, encoding="utf-8-sig")
+        except UnicodeDecodeError:
+            df = pd.read_csv(ruta, header=None, dtype=str, encoding="latin-1")
+    else:
+        df = pd.read_excel(ruta, header=None, sheet_name=0)
+    return df.to_numpy(dtype=object)
+
+def semana_de_archivo(ruta, titulo=""):
+    """
+    (año, semana) del boletín: del título ("Semana epidemiológica 5 ... 2024")
+    o, si no viene, del nombre del archivo ("boletin_2024_sem05.xlsx").
+    """
+    encontrado = _SEMANA_TITULO.search(titulo)
+    if encontrado:
+        return int(encontrado.group(2)), int(encontrado.group(1))
+    nombre = normalizar_texto(os.path.splitext(os.path.basename(ruta))[0])
+    anio = _ANIO.search(nombre)
+    sin_revision = _REVISION.sub(" ", _ANIO.sub(" ", nombre))
+    semana = _SEMANA_NOMBRE.search(sin_revision) or _NUMERO_SUELTO.search(sin_revision)
+    if not anio or not semana:
+        raise ValueError("no se encontró el año y la semana epidemiológica (ni en la tabla ni en el nombre del archivo)")
+    return int(anio.group(1)), int(semana.group(1))
+
+def revision_de_archivo(ruta):
+    """Número de revisión del nombre del archivo ("_rev2", "_v3"); 0 si no tiene."""
+    encontrado = _REVISION.search(normalizar_texto(os.path.splitext(os.path.basename(ruta))[0]))
+    return int(encontrado.group(1)) if encontrado else 0
+
+def leer_boletin(ruta, enfermedad=ENFERMEDAD):
+    """
+    Casos de la enfermedad por estado en un boletín. Devuelve un DataFrame con
+    Region, Anio, Semana y Casos_t (una fila por estado encontrado).
+    """
+    rejilla = _leer_rejilla(ruta)
+    texto = np.vectorize(normalizar_texto, otypes=[object])(rejilla) if rejilla.size else rejilla
+    patron = re.compile(enfermedad)
+
+    # Encabezado del padecimiento: primera celda que coincide
+    fila_h = col_h = None
+    for i in range(min(len(texto), FILAS_ENCABEZADO)):
+        for j, celda in enumerate(texto[i]):
+            if celda and patron.search(celda):
+                fila_h, col_h = i, j
+                break
+        if fila_h is not None:
+            break
+    if fila_h is None:
+        raise ValueError("la tabla no tiene una columna de sífilis")
+
+    # Columna "Sem." dentro de las celdas combinadas del padecimiento
+    fin = next((j for j in range(col_h + 1, texto.shape[1]) if texto[fila_h, j]), texto.shape[1])
+    col = col_h
+    for i in range(fila_h + 1, min(fila_h + 4, len(texto))):
+        sem = [j for j in range(col_h, fin) if texto[i, j].startswith("sem")]
+        if sem:
+            col = sem[0]
+            break
+
+    regiones, casos = [], []
+    for i in range(fila_h + 1, len(texto)):
+        estado = next((nombre_estado(rejilla[i, j]) for j in range(col_h) if texto[i, j]), None)
+        if estado is None:
+            continue
+        valor = _casos(rejilla[i, col])
+        if not np.isnan(valor):
+            regiones.append(estado)
+            casos.append(valor)
+    if not regiones:
+        raise ValueError("no se encontraron filas de estados")
+
+    titulo = " ".join(c for fila in texto[:fila_h + 1] for c in fila if c)
+    anio, semana = semana_de_archivo(ruta, titulo)
+    return pd.DataFrame({utilidades.COL_REGION: regiones, COL_ANIO: anio,
+                         utilidades.COL_SEMANA: semana, utilidades.COL_CASOS: casos})
+
+def _leer_archivo(args):
+    """Lee un boletín en un proceso del pool; los errores se devuelven, no se lanzan."""
+    ruta, enfermedad = args
+    registro = {"archivo": ruta}
+    try:
+        registro["filas"] = leer_boletin(ruta, enfermedad)
+        registro["revision"] = (revision_de_archivo(ruta), os.path.getmtime(ruta))
+    except Exception as e:
+        registro["error"] = f"{type(e).__name__}: {e}"
+    return registro
+
+# ===================== LOTE =====================
+def periodo_semana(anio, semana):
+    """Domingo en que inicia la semana epidemiológica (la semana 1 contiene el 4 de enero)."""
+    anio = np.asarray(anio, dtype=np.int64)
+    cuatro_enero = (anio - 1970).astype("datetime64[Y]").astype("datetime64[D]") + 3
+    return importar_trends.inicio_semana(cuatro_enero) + (np.asarray(semana, dtype=np.int64) - 1) * 7
+
+def leer_boletines(rutas, procesos=None, enfermedad=ENFERMEDAD, al_avance=None):
+    """
+    Lee todos los boletines (en un pool de procesos si hay más de uno) y se
+    queda con la revisión más reciente de cada estado y semana.
+    al_avance(leidos, total) se llama conforme llegan los resultados.
+    Devuelve (tabla, resumen) con tabla: Region, Anio, Semana, Periodo, Casos_t.
+    """
+    tareas = [(ruta, enfermedad) for ruta in rutas]
+    registros = []
+    if len(tareas) <= 1 or procesos == 1:
+        resultados = map(_leer_archivo, tareas)
+        pool = None
+    else:
+        procesos = procesos or os.cpu_count() or 1
+        pool = ProcessPoolExecutor(max_workers=procesos)
+        resultados = pool.map(_leer_archivo, tareas, chunksize=max(1, len(tareas) // (procesos * 4)))
+    try:
+        for registro in resultados:
+            registros.append(registro)
+            if al_avance is not None:
+                al_avance(len(registros), len(tareas))
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    errores = [{"archivo": r["archivo"], "error": r["error"]} for r in registros if "error" in r]
+    leidos = [r for r in registros if "error" not in r]
+    columnas = [utilidades.COL_REGION, COL_ANIO, utilidades.COL_SEMANA, utilidades.COL_PERIODO, utilidades.COL_CASOS]
+    resumen = {"archivos": len(leidos), "errores": errores, "semanas": 0, "estados": 0, "reemplazadas": 0}
+    if not leidos:
+        return pd.DataFrame(columns=columnas), resumen
+
+    tabla = pd.concat([r["filas"].assign(_rev=r["revision"][0], _mtime=r["revision"][1]) for r in leidos],
+                      ignore_index=True)
+    llaves = [utilidades.COL_REGION, COL_ANIO, utilidades.COL_SEMANA]
+    tabla = tabla.sort_values(llaves + ["_rev", "_mtime"], kind="stable")
+    unica = tabla.drop_duplicates(subset=llaves, keep="last")
+    resumen["reemplazadas"] = len(tabla) - len(unica)
+
+    unica = unica.drop(columns=["_rev", "_mtime"]).reset_index(drop=True)
+    unica[utilidades.COL_PERIODO] = periodo_semana(unica[COL_ANIO], unica[utilidades.COL_SEMANA]).astype("datetime64[s]")
+    unica = utilidades.aplicar_esquema(unica[columnas]).sort_values([utilidades.COL_REGION, utilidades.COL_PERIODO]).reset_index(drop=True)
+    resumen["semanas"] = unica[[COL_ANIO, utilidades.COL_SEMANA]].drop_duplicates().shape[0]
+    resumen["estados"] = unica[utilidades.COL_REGION].nunique()
+    return unica, resumen
+
+# ===================== INTEGRACIÓN CON LA TABLA DE DATOS =====================
+def integrar_casos(df, tabla, estado=None):
+    """
+    Integra los casos de los boletines en df en una sola pasada, emparejando
+    por semana epidemiológica de Periodo (y por estado si df tiene Region).
+    Sin esa columna se usa `estado`, o el total nacional si es None o
+    "Nacional". Las semanas que ya existen se actualizan; las nuevas se agregan
+    al final con el índice vacío. Devuelve (df, actualizadas, agregadas).
+    """
+    llave = "_semana"
+    nuevas = tabla.copy()
+    nuevas[llave] = nuevas[utilidades.COL_PERIODO].to_numpy(dtype="datetime64[D]")
+    llaves = [llave]
+
+    por_region = utilidades.COL_REGION in df.columns
+    if por_region:
+        llaves.append("_estado")
+        nuevas["_estado"] = nuevas[utilidades.COL_REGION]
+    elif estado is None or normalizar_texto(estado) == normalizar_texto(NACIONAL):
+        nuevas = nuevas.groupby(llave, as_index=False).agg({
+            utilidades.COL_SEMANA: "first", utilidades.COL_PERIODO: "first", utilidades.COL_CASOS: "sum"})
+    else:
+        oficial = nombre_estado(estado)
+        nuevas = nuevas[nuevas[utilidades.COL_REGION] == oficial]
+        if nuevas.empty:
+            raise ValueError(f"Los boletines no traen datos de '{estado}'.")
+
+    fechas = pd.to_datetime(df[utilidades.COL_PERIODO], errors="coerce").to_numpy(dtype="datetime64[D]")
+    izquierda = pd.DataFrame({llave: np.where(np.isnat(fechas), fechas, importar_trends.inicio_semana(fechas))})
+    if por_region:
+        # El estado de la tabla se compara por su nombre oficial ("Edo. de México" = "México")
+        izquierda["_estado"] = [nombre_estado(r) or r for r in df[utilidades.COL_REGION]]
+
+    unido = izquierda.merge(nuevas[llaves + [utilidades.COL_CASOS]], on=llaves, how="left", validate="many_to_one")
+    encontrado = unido[utilidades.COL_CASOS].notna().to_numpy()
+    df = df.copy()
+    df[utilidades.COL_CASOS] = df[utilidades.COL_CASOS].astype(utilidades.ESQUEMA[utilidades.COL_CASOS])
+    df.loc[encontrado, utilidades.COL_CASOS] = unido.loc[encontrado, utilidades.COL_CASOS].to_numpy()
+
+    existentes = izquierda[llaves].drop_duplicates()
+    faltan = nuevas.merge(existentes, on=llaves, how="left", indicator=True)["_merge"].eq("left_only").to_numpy()
+    agregar = nuevas.loc[faltan, [c for c in df.columns if c in nuevas.columns]]
+    if len(agregar):
+        df = pd.concat([df, agregar], ignore_index=True)
+        orden = [utilidades.COL_REGION, utilidades.COL_PERIODO] if por_region else [utilidades.COL_PERIODO]
+        df = df.sort_values(orden, kind="stable").reset_index(drop=True)
+    return utilidades.aplicar_esquema(df), int(encontrado.sum()), int(faltan.sum())
+
+# ===================== LÍNEA DE COMANDOS =====================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importa los casos de sífilis de las tablas del Boletín Epidemiológico.")
+    parser.add_argument("entradas", nargs="+", help="Archivos .xlsx/.xls/.csv, carpetas o comodines")
+    parser.add_argument("-d", "--datos", help="Tabla de datos (Excel o CSV) en la que se integran los casos")
+    parser.add_argument("-e", "--estado", help=f"Estado a usar si la tabla de datos no tiene columna Region (por defecto, {NACIONAL})")
+    parser.add_argument("--enfermedad", default=ENFERMEDAD, help="Expresión regular del padecimiento (texto sin acentos, minúsculas)")
+    parser.add_argument("-p", "--procesos", type=int, default=None, help="Procesos en paralelo (por defecto, todos los núcleos)")
+    parser.add_argument("-s", "--salida", required=True, help="Archivo de salida (.csv o .xlsx)")
+    args = parser.parse_args(argv)
+
+    rutas = procesar_lote.expandir_entradas(args.entradas)
+    tabla, resumen = leer_boletines(rutas, args.procesos, args.enfermedad)
+    for error in resumen["errores"]:
+        print(f"Omitido {error['archivo']}: {error['error']}", file=sys.stderr)
+    if tabla.empty:
+        print("No se importó ninguna semana.", file=sys.stderr)
+        return 1
+    print(f"{resumen['archivos']} boletines, {resumen['semanas']} semanas, {resumen['estados']} estados"
+          f" ({resumen['reemplazadas']} filas sustituidas por revisiones posteriores)")
+
+    salida = tabla
+    if args.datos:
+        try:
+            salida, actualizadas, agregadas = integrar_casos(
+                utilidades.cargar_tabla(args.datos, requeridas=(utilidades.COL_PERIODO,)), tabla, args.estado)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 1
+        print(f"{args.datos}: {actualizadas} semanas actualizadas, {agregadas} agregadas")
+
+    salida = utilidades.para_archivo(salida)
+    if args.salida.lower().endswith((".xlsx", ".xls")):
+        salida.to_excel(args.salida, index=False)
+    else:
+        salida.to_csv(args.salida, index=False)
+    print(f"Resultado -> {args.salida}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
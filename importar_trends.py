@@ -0,0 +1,245 @@
+"""
+Importación masiva de descargas CSV de Google Trends al índice semanal.
+
+Acepta los CSV tal como los exporta Trends (en inglés o español): diarios o
+semanales, con uno o varios términos por archivo. Cada descarga viene
+normalizada a 0-100 dentro de su propia ventana de fechas, así que las
+ventanas se encadenan en una escala común usando las semanas en que se
+traslapan; después se agregan a semanas epidemiológicas (domingo a sábado) y
+se reescalan para que el máximo de cada término sea 100.
+
+Con --datos, el índice resultante se escribe en Indice_t (e Indice_t_1) de la
+tabla de casos, emparejando por semana epidemiológica (y por término si la
+tabla tiene la columna Termino).
+
+Uso:
+    python importar_trends.py descargas/ --salida indice_semanal.csv
+    python importar_trends.py "descargas/*.csv" --datos Datos.xlsx --termino sífilis --salida Datos_trends.xlsx
+"""
+import re
+import csv
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+import utilidades
+import procesar_lote
+
+VALOR_MENOR_A_UNO = 0.5   # Trends publica "<1" para valores entre 0 y 1
+_FECHA = re.compile(r"^\d{4}-\d{2}-\d{2}")
+_SUFIJO_REGION = re.compile(r":\s*\(.*\)\s*$")  # "sífilis: (México)" -> "sífilis"
+
+# ===================== LECTURA =====================
+def _valor(texto):
+    texto = texto.strip()
+    if not texto:
+        return np.nan
+    if texto.startswith("<"):
+        return VALOR_MENOR_A_UNO
+    return float(texto)
+
+def leer_csv_trends(ruta):
+    """
+    Lee un CSV de Trends línea por línea, saltando las líneas de categoría y
+    el encabezado. Devuelve (términos, fechas datetime64[D], valores float32
+    de forma filas × términos).
+    """
+    encabezado, fechas, filas = None, [], []
+    with open(ruta, encoding="utf-8-sig", newline="") as f:
+        for fila in csv.reader(f):
+            if not fila or not fila[0].strip():
+                continue
+            if _FECHA.match(fila[0].strip()):
+                fechas.append(fila[0].strip()[:10])
+                filas.append([_valor(v) for v in fila[1:]])
+            elif not fechas:
+                encabezado = fila
+    if not fechas or encabezado is None:
+        raise ValueError(f"{ruta}: no parece una descarga de Google Trends")
+    terminos = [_SUFIJO_REGION.sub("", t).strip() for t in encabezado[1:]]
+    valores = np.array(filas, dtype=np.float32).reshape(len(fechas), len(terminos))
+    return terminos, np.array(fechas, dtype="datetime64[D]"), valores
+
+# ===================== SEMANAS EPIDEMIOLÓGICAS =====================
+def inicio_semana(fechas):
+    """Domingo con que inicia la semana epidemiológica de cada fecha (datetime64[D])."""
+    dias = np.asarray(fechas, dtype="datetime64[D]").astype(np.int64)
+    # El 1970-01-01 fue jueves: (días + 4) % 7 es 0 en domingo
+    return (dias - (dias + 4) % 7).astype("datetime64[D]")
+
+def a_semanas(fechas, valores):
+    """
+    Promedio semanal de una descarga. Devuelve (semanas, valores semanas ×
+    términos, completa) donde completa indica que la semana tiene todos sus
+    días (siempre True en descargas semanales).
+    """
+    semanas, inversa = np.unique(inicio_semana(fechas), return_inverse=True)
+    dias = np.bincount(inversa, minlength=len(semanas))
+    conocidos = ~np.isnan(valores)
+    suma = np.stack([np.bincount(inversa, weights=np.where(conocidos[:, j], valores[:, j], 0.0), minlength=len(semanas))
+                     for j in range(valores.shape[1])], axis=1)
+    cuenta = np.stack([np.bincount(inversa, weights=conocidos[:, j], minlength=len(semanas))
+                       for j in range(valores.shape[1])], axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        promedio = suma / cuenta
+    diaria = len(fechas) > 1 and int(np.diff(fechas.astype(np.int64)).min()) < 7
+    completa = dias == 7 if diaria else np.ones(len(semanas), dtype=bool)
+    return semanas, promedio, completa
+
+# ===================== REESCALADO DE VENTANAS =====================
+def encadenar_ventanas(ventanas, n_semanas):
+    """
+    Une las descargas de un término en una sola escala. ventanas: lista de
+    (posiciones en la rejilla de semanas, valores, completa). Se recorren en
+    orden de inicio; cada una se multiplica por el cociente entre lo ya unido y
+    ella misma en las semanas completas que comparten, y se promedia con lo
+    anterior. Devuelve (serie, ventanas sin traslape con las anteriores).
+    """
+    suma = np.zeros(n_semanas)
+    cuenta = np.zeros(n_semanas)
+    sueltas = 0
+    for pos, valores, completa in sorted(ventanas, key=lambda v: v[0][0]):
+        conocidos = ~np.isnan(valores)
+        comunes = (cuenta[pos] > 0) & completa & conocidos & (valores > 0)
+        factor = 1.0
+        if comunes.any():
+            unido = suma[pos][comunes] / cuenta[pos][comunes]
+            factor = unido.sum() / valores[comunes].sum()
+        elif cuenta.any():
+            sueltas += 1  # Sin semanas en común: conserva su propia escala
+        np.add.at(suma, pos[conocidos], valores[conocidos] * factor)
+        np.add.at(cuenta, pos[conocidos], 1.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        serie = suma / cuenta
+    maximo = np.nanmax(serie) if np.isfinite(serie).any() else np.nan
+    if maximo > 0:
+        serie = serie * (100.0 / maximo)
+    return serie, sueltas
+
+def importar_trends(rutas):
+    """
+    Lee todas las descargas y devuelve (tabla, resumen). La tabla tiene una fila
+    por término y semana con datos: Termino, Periodo (domingo de la semana
+    epidemiológica), Indice_t e Indice_t_1 (la semana anterior, si existe).
+    """
+    descargas, errores = [], []
+    for ruta in rutas:
+        try:
+            terminos, fechas, valores = leer_csv_trends(ruta)
+        except (OSError, ValueError) as e:
+            errores.append({"archivo": ruta, "error": str(e)})
+            continue
+        descargas.append((terminos, *a_semanas(fechas, valores)))
+
+    columnas = [utilidades.COL_TERMINO, utilidades.COL_PERIODO, utilidades.COL_INDICE, utilidades.COL_INDICE_PREV]
+    resumen = {"archivos": len(descargas), "errores": errores, "terminos": [], "semanas": 0, "ventanas_sueltas": 0}
+    if not descargas:
+        return pd.DataFrame(columns=columnas), resumen
+
+    rejilla = np.unique(np.concatenate([d[1] for d in descargas]))
+    por_termino = {}
+    for terminos, semanas, promedio, completa in descargas:
+        pos = np.searchsorted(rejilla, semanas)
+        for j, termino in enumerate(terminos):
+            por_termino.setdefault(termino, []).append((pos, promedio[:, j], completa))
+
+    partes = []
+    for termino, ventanas in por_termino.items():
+        serie, sueltas = encadenar_ventanas(ventanas, len(rejilla))
+        resumen["ventanas_sueltas"] += sueltas
+        validas = np.flatnonzero(np.isfinite(serie))
+        semanas = rejilla[validas]
+        anterior = np.full(len(validas), np.nan)
+        consecutiva = np.diff(semanas.astype(np.int64)) == 7
+        anterior[1:][consecutiva] = serie[validas][:-1][consecutiva]
+        partes.append(pd.DataFrame({
+            utilidades.COL_TERMINO: termino,
+            utilidades.COL_PERIODO: semanas.astype("datetime64[s]"),
+            utilidades.COL_INDICE: serie[validas],
+            utilidades.COL_INDICE_PREV: anterior,
+        }))
+
+    tabla = utilidades.aplicar_esquema(pd.concat(partes, ignore_index=True)[columnas])
+    resumen["terminos"] = list(por_termino)
+    resumen["semanas"] = len(rejilla)
+    return tabla, resumen
+
+# ===================== UNIÓN CON LA TABLA DE CASOS =====================
+def fusionar_indice(df, tabla, termino=None):
+    """
+    Escribe el índice importado en Indice_t / Indice_t_1 de df con un solo
+    merge por semana epidemiológica (y término, si df tiene la columna
+    Termino). Sin esa columna se usa `termino`, que puede omitirse si la
+    importación trae uno solo. Las filas sin semana importada no cambian.
+    Devuelve (df, filas actualizadas).
+    """
+    df = df.copy()
+    llave = "_semana"
+    fechas = pd.to_datetime(df[utilidades.COL_PERIODO], errors="coerce").to_numpy(dtype="datetime64[D]")
+    izquierda = pd.DataFrame({llave: np.where(np.isnat(fechas), fechas, inicio_semana(fechas))})
+    derecha = tabla.rename(columns={utilidades.COL_PERIODO: llave})
+    derecha[llave] = derecha[llave].to_numpy(dtype="datetime64[D]")
+
+    llaves = [llave]
+    if utilidades.COL_TERMINO in df.columns:
+        izquierda[utilidades.COL_TERMINO] = df[utilidades.COL_TERMINO].to_numpy()
+        llaves.append(utilidades.COL_TERMINO)
+    else:
+        terminos = tabla[utilidades.COL_TERMINO].unique()
+        if termino is None:
+            if len(terminos) != 1:
+                raise ValueError(f"La importación trae varios términos ({', '.join(map(str, terminos))}); indica cuál usar.")
+            termino = terminos[0]
+        if termino not in terminos:
+            raise ValueError(f"El término '{termino}' no está en las descargas.")
+        derecha = derecha[derecha[utilidades.COL_TERMINO] == termino]
+
+    unido = izquierda.merge(derecha, on=llaves, how="left", validate="many_to_one")
+    encontrado = unido[utilidades.COL_INDICE].notna().to_numpy()
+    for col in (utilidades.COL_INDICE, utilidades.COL_INDICE_PREV):
+        if col not in df.columns:
+            df[col] = np.nan
+        df[col] = df[col].astype(utilidades.ESQUEMA[col])
+        df.loc[encontrado, col] = unido.loc[encontrado, col].to_numpy()
+    return df, int(encontrado.sum())
+
+# ===================== LÍNEA DE COMANDOS =====================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importa descargas CSV de Google Trends al índice semanal.")
+    parser.add_argument("entradas", nargs="+", help="CSV, carpetas o comodines")
+    parser.add_argument("-d", "--datos", help="Tabla de casos (Excel o CSV) a la que se escribe el índice")
+    parser.add_argument("-t", "--termino", help="Término a usar si la tabla de casos no tiene columna Termino")
+    parser.add_argument("-s", "--salida", required=True, help="Archivo de salida (.csv o .xlsx)")
+    args = parser.parse_args(argv)
+
+    rutas = procesar_lote.expandir_entradas(args.entradas, extensiones=(".csv",))
+    tabla, resumen = importar_trends(rutas)
+    for error in resumen["errores"]:
+        print(f"Omitido {error['archivo']}: {error['error']}", file=sys.stderr)
+    if tabla.empty:
+        print("No se importó ninguna semana.", file=sys.stderr)
+        return 1
+    print(f"{resumen['archivos']} descargas, {len(resumen['terminos'])} términos, {resumen['semanas']} semanas")
+    if resumen["ventanas_sueltas"]:
+        print(f"Aviso: {resumen['ventanas_sueltas']} descargas no se traslapan con las demás y conservan su propia escala.")
+
+    salida = tabla
+    if args.datos:
+        try:
+            salida, actualizadas = fusionar_indice(
+                utilidades.cargar_tabla(args.datos, requeridas=(utilidades.COL_PERIODO,)), tabla, args.termino)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 1
+        print(f"Índice escrito en {actualizadas} de {len(salida)} filas de {args.datos}")
+
+    salida = utilidades.para_archivo(salida)
+    if args.salida.lower().endswith((".xlsx", ".xls")):
+        salida.to_excel(args.salida, index=False)
+    else:
+        salida.to_csv(args.salida, index=False)
+    print(f"Resultado -> {args.salida}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
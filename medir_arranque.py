@@ -0,0 +1,156 @@
+"""
+Reporte de tiempos de arranque y verificación del presupuesto del menú.
+
+Cada medición corre en un intérprete nuevo (arranque en frío):
+  * Importación de cada módulo por separado y, para las herramientas, lo que
+    cuesta abrirlas con el menú ya cargado.
+  * Primera pintura del menú: construir_interfaz + update() (requiere pantalla).
+  * Tiempo total desde lanzar el intérprete hasta la primera pintura, que se
+    compara con el presupuesto.
+
+También verifica que importar el menú no cargue pandas, numpy, matplotlib ni
+sklearn: se cargan hasta que se abre una herramienta o se lee un Excel.
+
+Uso:
+    python medir_arranque.py
+    python medir_arranque.py --presupuesto 1.5 --repeticiones 5
+
+Sale con código 1 si el arranque del menú excede el presupuesto o si el menú
+importa alguna dependencia pesada. test_arranque.py hace la misma verificación
+junto con las demás pruebas (python -m pytest -q).
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import statistics
+
+PRESUPUESTO_ARRANQUE_S = 2.0  # Lanzar el intérprete -> menú pintado
+REPETICIONES = 3
+PESADOS = ("pandas", "numpy", "matplotlib", "sklearn", "openpyxl")
+
+MODULOS = ["estilos", "motor_modelo_a", "motor_modelo_b", "cache_excel", "utilidades", "sesion", "registro_referencias", "bitacora",
+           "tareas", "tabla_virtual", "menu_principal", "modelo_a", "modelo_b", "gestor_datos"]
+HERRAMIENTAS = ["modelo_a", "modelo_b", "gestor_datos"]
+
+CODIGO_IMPORTAR = """
+import time, sys, json
+{previo}
+t0 = time.perf_counter()
+import {modulo}
+t1 = time.perf_counter()
+print(json.dumps({{"importar": t1 - t0, "pesados": sorted(m for m in {pesados!r} if m in sys.modules)}}))
+"""
+
+CODIGO_MENU = """
+import time, sys, json
+t0 = time.perf_counter()
+import tkinter as tk
+import menu_principal
+t1 = time.perf_counter()
+res = {{"importar": t1 - t0, "importado_en": time.time(), "pesados": sorted(m for m in {pesados!r} if m in sys.modules)}}
+try:
+    ventana = tk.Tk()
+    menu_principal.construir_interfaz(ventana)
+    ventana.update()
+    res["pintura"] = time.perf_counter() - t1
+    res["pintado_en"] = time.time()
+    ventana.destroy()
+except Exception as e:
+    res["error_pantalla"] = str(e)
+print(json.dumps(res))
+"""
+
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+
+def _ejecutar(codigo):
+    """Corre el código en un intérprete nuevo; devuelve (resultado, hora de lanzamiento)."""
+    lanzado = time.time()
+    proc = subprocess.run([sys.executable, "-c", codigo], cwd=CARPETA, capture_output=True, text=True)
+    if proc.returncode != 0:
+        ultima = (proc.stderr.strip().splitlines() or ["error desconocido"])[-1]
+        return {"error": ultima}, lanzado
+    return json.loads(proc.stdout.strip().splitlines()[-1]), lanzado
+
+def medir_importacion(modulo, previo="", repeticiones=REPETICIONES):
+    tiempos, pesados = [], []
+    for _ in range(repeticiones):
+        res, _ = _ejecutar(CODIGO_IMPORTAR.format(modulo=modulo, previo=previo, pesados=PESADOS))
+        if "error" in res:
+            return {"error": res["error"]}
+        tiempos.append(res["importar"])
+        pesados = res["pesados"]
+    return {"importar": statistics.median(tiempos), "pesados": pesados}
+
+def medir_menu(repeticiones=REPETICIONES):
+    """Arranque en frío del menú: importación, primera pintura y total desde el lanzamiento."""
+    importar, pintura, total, pesados, error = [], [], [], [], None
+    for _ in range(repeticiones):
+        res, lanzado = _ejecutar(CODIGO_MENU.format(pesados=PESADOS))
+        if "error" in res:
+            return {"error": res["error"]}
+        importar.append(res["importar"])
+        pesados = res["pesados"]
+        if "pintura" in res:
+            pintura.append(res["pintura"])
+            total.append(res["pintado_en"] - lanzado)
+        else:
+            error = res.get("error_pantalla")
+            total.append(res["importado_en"] - lanzado)
+    return {
+        "importar": statistics.median(importar),
+        "pintura": statistics.median(pintura) if pintura else None,
+        "total": statistics.median(total),
+        "pesados": pesados,
+        "error_pantalla": error,
+    }
+
+def _ms(segundos):
+    return "-" if segundos is None else f"{segundos * 1000:9.1f}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tiempos de arranque por módulo y presupuesto del menú.")
+    parser.add_argument("--presupuesto", type=float, default=PRESUPUESTO_ARRANQUE_S, help="Segundos máximos de arranque del menú")
+    parser.add_argument("--repeticiones", type=int, default=REPETICIONES, help="Arranques por medición (se reporta la mediana)")
+    args = parser.parse_args(argv)
+
+    print(f"{'Módulo':<16} | {'Importar (ms)':>13} | {'Tras el menú (ms)':>17} | Dependencias pesadas")
+    print("-" * 80)
+    for modulo in MODULOS:
+        solo = medir_importacion(modulo, repeticiones=args.repeticiones)
+        if "error" in solo:
+            print(f"{modulo:<16} | {'error':>13} | {'':>17} | {solo['error']}")
+            continue
+        tras_menu = None
+        if modulo in HERRAMIENTAS:
+            res = medir_importacion(modulo, previo="import menu_principal", repeticiones=args.repeticiones)
+            tras_menu = res.get("importar")
+        print(f"{modulo:<16} | {_ms(solo['importar']):>13} | {_ms(tras_menu):>17} | {', '.join(solo['pesados']) or '-'}")
+
+    menu = medir_menu(args.repeticiones)
+    if "error" in menu:
+        print(f"\nNo se pudo medir el menú: {menu['error']}")
+        return 1
+
+    print("\nArranque en frío del menú")
+    print(f"  Importar menu_principal:  {_ms(menu['importar'])} ms")
+    print(f"  Primera pintura:          {_ms(menu['pintura'])} ms")
+    if menu["error_pantalla"]:
+        print(f"  (Sin pantalla: {menu['error_pantalla']}; el total llega solo hasta la importación)")
+    print(f"  Total desde el lanzamiento: {_ms(menu['total'])} ms (presupuesto {args.presupuesto * 1000:.0f} ms)")
+
+    fallas = []
+    if menu["total"] > args.presupuesto:
+        fallas.append(f"el arranque ({menu['total']:.2f} s) excede el presupuesto ({args.presupuesto:.2f} s)")
+    if menu["pesados"]:
+        fallas.append(f"el menú importa {', '.join(menu['pesados'])} al arrancar")
+    for falla in fallas:
+        print(f"FALLA: {falla}", file=sys.stderr)
+    if not fallas:
+        print("OK: dentro del presupuesto.")
+    return 1 if fallas else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
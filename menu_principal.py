@@ -1,40 +1,59 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import subprocess
-import sys
+import importlib
 import os
-import estilos
-import utilidades
+import datetime
 import webbrowser
+import estilos
+# pandas, numpy y matplotlib se cargan hasta que se abre una herramienta o se
+# lee un Excel (utilidades, sesion): el menú aparece sin esperarlos.
 
-ARCHIVO_MODELO_A = "modelo_a.py"
-ARCHIVO_MODELO_B = "modelo_b.py"
-ARCHIVO_GESTOR = "gestor_datos.py"
+MODULO_MODELO_A = "modelo_a"
+MODULO_MODELO_B = "modelo_b"
+MODULO_GESTOR = "gestor_datos"
 
 # Ruta seleccionada para modelos A/B
 RUTA_EXCEL = None
+root = None
 
-# ===================== EJECUCIÓN DE SCRIPTS =====================
-def ejecutar_script(nombre_script, pasar_excel=True):
-    if not os.path.exists(nombre_script):
-        messagebox.showerror("Error", f"Falta el archivo: {nombre_script}\nAsegúrate de que esté en la misma carpeta.")
+# ===================== APERTURA DE HERRAMIENTAS =====================
+def abrir_herramienta(nombre_modulo, pasar_excel=True):
+    """
+    Abre la herramienta como ventana de este mismo proceso. El módulo se importa
+    la primera vez que se usa y comparte con las demás el Excel ya leído
+    (ver sesion.py), así que reabrirla o cambiar de herramienta es inmediato.
+    """
+    try:
+        modulo = importlib.import_module(nombre_modulo)
+    except Exception as e:
+        messagebox.showerror("Error", f"No se pudo cargar {nombre_modulo}:\n{e}")
         return
-    args = [sys.executable, nombre_script]
-    if pasar_excel and RUTA_EXCEL:
-        args.append(RUTA_EXCEL)
     try:
-        subprocess.Popen(args)
+        if pasar_excel:
+            modulo.abrir(root, ruta_excel=RUTA_EXCEL)
+        else:
+            modulo.abrir(root)
     except Exception as e:
         messagebox.showerror("Error", str(e))
 
+def descargar_plantilla():
+    import utilidades
+    utilidades.generar_plantilla()
+
 def elegir_excel():
     global RUTA_EXCEL
+    import sesion
     ruta = filedialog.askopenfilename(
         title="Selecciona el Excel de datos (Modelos A/B)",
         filetypes=[("Archivos de Excel", "*.xlsx *.xls")]
     )
     if ruta:
         RUTA_EXCEL = ruta
+        try:
+            sesion.leer_excel(ruta)  # Se lee una sola vez; los Modelos A y B usan esta copia
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo leer el Excel:\n{e}")
+            return
         lbl_estado_excel.config(text=f"Archivo cargado: {os.path.basename(ruta)}", fg=estilos.COLOR_SUCCESS)
         messagebox.showinfo("Excel seleccionado", f"Usando:\n{RUTA_EXCEL}")
     else:
@@ -123,51 +142,7 @@ def abrir_presentacion():
 
     estilos.crear_boton(ventana_pres, "Cerrar Presentación", ventana_pres.destroy, tipo="danger").pack(pady=10)
 
-# ===================== INTERFAZ GRÁFICA PRINCIPAL =====================
-root = tk.Tk()
-root.title("Sistema Integral de Epidemiología - México")
-root.state('zoomed')
-estilos.aplicar_tema(root)
-
-# --- HEADER ---
-frame_header = tk.Frame(root, bg=estilos.COLOR_FONDO)
-frame_header.pack(fill="x", pady=(30, 20))
-
-tk.Label(frame_header, text="SISTEMA DE ANÁLISIS EPIDEMIOLÓGICO",
-         font=estilos.FONT_H1, fg=estilos.COLOR_TEXTO, bg=estilos.COLOR_FONDO).pack()
-tk.Label(frame_header, text="Modelo Matemático: Google Trends vs Casos Reales",
-         font=("Segoe UI", 12, "italic"), fg=estilos.COLOR_ACCENT, bg=estilos.COLOR_FONDO).pack()
-
-# --- CONTENEDOR PRINCIPAL (GRID) ---
-main_container = tk.Frame(root, bg=estilos.COLOR_FONDO)
-main_container.pack(fill="both", expand=True, padx=50)
-
-# COLUMNA IZQUIERDA: CONFIGURACIÓN Y AYUDA
-col_izq = tk.Frame(main_container, bg=estilos.COLOR_FONDO)
-col_izq.pack(side="left", fill="y", padx=20, anchor="n")
-
-card_config = estilos.crear_card(col_izq)
-card_config.pack(fill="x", pady=10)
-estilos.crear_label_subtitulo(card_config, "📂 Configuración de Datos", bg=estilos.COLOR_PANEL).pack(pady=(0, 10))
-
-lbl_estado_excel = tk.Label(card_config, text="No se ha seleccionado archivo", 
-                            font=estilos.FONT_SMALL, fg=estilos.COLOR_WARNING, bg=estilos.COLOR_PANEL)
-lbl_estado_excel.pack(pady=5)
-
-estilos.crear_boton(card_config, "Seleccionar Excel (Modelos A/B)", elegir_excel, tipo="secondary", width=25).pack(pady=5)
-estilos.crear_boton(card_config, "Descargar Plantilla", utilidades.generar_plantilla, tipo="success", width=25).pack(pady=5)
-
-card_help = estilos.crear_card(col_izq)
-card_help.pack(fill="x", pady=20)
-estilos.crear_label_subtitulo(card_help, "📘 Ayuda y Documentación", bg=estilos.COLOR_PANEL).pack(pady=(0, 10))
-estilos.crear_boton(card_help, "Ver Marco Teórico", abrir_presentacion, tipo="info", width=25).pack(pady=5)
-
-card_fuentes = estilos.crear_card(col_izq)
-card_fuentes.pack(fill="x", pady=10)
-estilos.crear_label_subtitulo(card_fuentes, "🌐 Consultar Datos", bg=estilos.COLOR_PANEL).pack(pady=(0, 10))
-
-import datetime
-
+# ===================== SELECTOR DE FECHAS (GOOGLE TRENDS) =====================
 def abrir_selector_fechas_trends():
     ventana_fechas = tk.Toplevel(root)
     ventana_fechas.title("Seleccionar Rango de Fechas")
@@ -228,42 +203,93 @@ def abrir_selector_fechas_trends():
 
     estilos.crear_boton(ventana_fechas, "Abrir en Google Trends", abrir_url, tipo="primary").pack(pady=20)
 
-
-url_trends = "https://trends.google.com/trends/explore?date=2024-12-29%202025-12-04&geo=MX&q=%2Fm%2F074m2&hl=es-419"
-url_boletin = "https://www.gob.mx/salud/documentos/boletinepidemiologico-sistema-nacional-de-vigilancia-epidemiologica-sistema-unico-de-informacion-387843"
-
-estilos.crear_boton(card_fuentes, "Google Trends", abrir_selector_fechas_trends, tipo="info", width=25).pack(pady=5)
-estilos.crear_boton(card_fuentes, "Boletín Epidemiológico", lambda: webbrowser.open(url_boletin), tipo="info", width=25).pack(pady=5)
-
-
-# COLUMNA DERECHA: MÓDULOS OPERATIVOS
-col_der = tk.Frame(main_container, bg=estilos.COLOR_FONDO)
-col_der.pack(side="left", fill="both", expand=True, padx=20)
-
-tk.Label(col_der, text="MÓDULOS OPERATIVOS", font=estilos.FONT_H3, fg=estilos.COLOR_TEXTO_SEC, bg=estilos.COLOR_FONDO).pack(anchor="w", pady=(10, 10))
-
-# Módulo 1: Gestor
-card_gestor = estilos.crear_card(col_der)
-card_gestor.pack(fill="x", pady=10)
-estilos.crear_label_subtitulo(card_gestor, "1. Gestión de Datos en Vivo", bg=estilos.COLOR_PANEL).pack(anchor="w")
-tk.Label(card_gestor, text="Registro semanal, edición y pronóstico inmediato.", font=estilos.FONT_BODY, fg="#bdc3c7", bg=estilos.COLOR_PANEL).pack(anchor="w", pady=2)
-estilos.crear_boton(card_gestor, "Abrir Gestor de Datos", lambda: ejecutar_script(ARCHIVO_GESTOR, pasar_excel=False), tipo="primary", width=30).pack(pady=10)
-
-# Módulo 2: Modelo A
-card_mod_a = estilos.crear_card(col_der)
-card_mod_a.pack(fill="x", pady=10)
-estilos.crear_label_subtitulo(card_mod_a, "2. Modelo A (Correlacional)", bg=estilos.COLOR_PANEL).pack(anchor="w")
-tk.Label(card_mod_a, text="Análisis estadístico estático (Regresión Lineal Simple).", font=estilos.FONT_BODY, fg="#bdc3c7", bg=estilos.COLOR_PANEL).pack(anchor="w", pady=2)
-estilos.crear_boton(card_mod_a, "Ejecutar Modelo A", lambda: ejecutar_script(ARCHIVO_MODELO_A, pasar_excel=True), tipo="warning", width=30).pack(pady=10)
-
-# Módulo 3: Modelo B
-card_mod_b = estilos.crear_card(col_der)
-card_mod_b.pack(fill="x", pady=10)
-estilos.crear_label_subtitulo(card_mod_b, "3. Modelo B (Predictivo)", bg=estilos.COLOR_PANEL).pack(anchor="w")
-tk.Label(card_mod_b, text="Análisis dinámico de tendencias y predicción basada en cambios (Deltas).", font=estilos.FONT_BODY, fg="#bdc3c7", bg=estilos.COLOR_PANEL).pack(anchor="w", pady=2)
-estilos.crear_boton(card_mod_b, "Ejecutar Modelo B", lambda: ejecutar_script(ARCHIVO_MODELO_B, pasar_excel=True), tipo="success", width=30).pack(pady=10)
-
-# Footer
-tk.Label(root, text="© 2025 Sistema de Vigilancia Epidemiológica", font=estilos.FONT_SMALL, fg="#7f8c8d", bg=estilos.COLOR_FONDO).pack(side="bottom", pady=10)
-
-root.mainloop()
+# ===================== INTERFAZ GRÁFICA PRINCIPAL =====================
+def construir_interfaz(ventana):
+    """Construye el menú dentro de ventana (separado para poder medir el arranque)."""
+    global root, lbl_estado_excel
+    root = ventana
+    root.title("Sistema Integral de Epidemiología - México")
+    root.state('zoomed')
+    estilos.aplicar_tema(root)
+
+    # --- HEADER ---
+    frame_header = tk.Frame(root, bg=estilos.COLOR_FONDO)
+    frame_header.pack(fill="x", pady=(30, 20))
+
+    tk.Label(frame_header, text="SISTEMA DE ANÁLISIS EPIDEMIOLÓGICO",
+             font=estilos.FONT_H1, fg=estilos.COLOR_TEXTO, bg=estilos.COLOR_FONDO).pack()
+    tk.Label(frame_header, text="Modelo Matemático: Google Trends vs Casos Reales",
+             font=("Segoe UI", 12, "italic"), fg=estilos.COLOR_ACCENT, bg=estilos.COLOR_FONDO).pack()
+
+    # --- CONTENEDOR PRINCIPAL (GRID) ---
+    main_container = tk.Frame(root, bg=estilos.COLOR_FONDO)
+    main_container.pack(fill="both", expand=True, padx=50)
+
+    # COLUMNA IZQUIERDA: CONFIGURACIÓN Y AYUDA
+    col_izq = tk.Frame(main_container, bg=estilos.COLOR_FONDO)
+    col_izq.pack(side="left", fill="y", padx=20, anchor="n")
+
+    card_config = estilos.crear_card(col_izq)
+    card_config.pack(fill="x", pady=10)
+    estilos.crear_label_subtitulo(card_config, "📂 Configuración de Datos", bg=estilos.COLOR_PANEL).pack(pady=(0, 10))
+
+    lbl_estado_excel = tk.Label(card_config, text="No se ha seleccionado archivo", 
+                                font=estilos.FONT_SMALL, fg=estilos.COLOR_WARNING, bg=estilos.COLOR_PANEL)
+    lbl_estado_excel.pack(pady=5)
+
+    estilos.crear_boton(card_config, "Seleccionar Excel (Modelos A/B)", elegir_excel, tipo="secondary", width=25).pack(pady=5)
+    estilos.crear_boton(card_config, "Descargar Plantilla", descargar_plantilla, tipo="success", width=25).pack(pady=5)
+
+    card_help = estilos.crear_card(col_izq)
+    card_help.pack(fill="x", pady=20)
+    estilos.crear_label_subtitulo(card_help, "📘 Ayuda y Documentación", bg=estilos.COLOR_PANEL).pack(pady=(0, 10))
+    estilos.crear_boton(card_help, "Ver Marco Teórico", abrir_presentacion, tipo="info", width=25).pack(pady=5)
+
+    card_fuentes = estilos.crear_card(col_izq)
+    card_fuentes.pack(fill="x", pady=10)
+    estilos.crear_label_subtitulo(card_fuentes, "🌐 Consultar Datos", bg=estilos.COLOR_PANEL).pack(pady=(0, 10))
+
+    url_trends = "https://trends.google.com/trends/explore?date=2024-12-29%202025-12-04&geo=MX&q=%2Fm%2F074m2&hl=es-419"
+    url_boletin = "https://www.gob.mx/salud/documentos/boletinepidemiologico-sistema-nacional-de-vigilancia-epidemiologica-sistema-unico-de-informacion-387843"
+
+    estilos.crear_boton(card_fuentes, "Google Trends", abrir_selector_fechas_trends, tipo="info", width=25).pack(pady=5)
+    estilos.crear_boton(card_fuentes, "Boletín Epidemiológico", lambda: webbrowser.open(url_boletin), tipo="info", width=25).pack(pady=5)
+
+    # COLUMNA DERECHA: MÓDULOS OPERATIVOS
+    col_der = tk.Frame(main_container, bg=estilos.COLOR_FONDO)
+    col_der.pack(side="left", fill="both", expand=True, padx=20)
+
+    tk.Label(col_der, text="MÓDULOS OPERATIVOS", font=estilos.FONT_H3, fg=estilos.COLOR_TEXTO_SEC, bg=estilos.COLOR_FONDO).pack(anchor="w", pady=(10, 10))
+
+    # Módulo 1: Gestor
+    card_gestor = estilos.crear_card(col_der)
+    card_gestor.pack(fill="x", pady=10)
+    estilos.crear_label_subtitulo(card_gestor, "1. Gestión de Datos en Vivo", bg=estilos.COLOR_PANEL).pack(anchor="w")
+    tk.Label(card_gestor, text="Registro semanal, edición y pronóstico inmediato.", font=estilos.FONT_BODY, fg="#bdc3c7", bg=estilos.COLOR_PANEL).pack(anchor="w", pady=2)
+    estilos.crear_boton(card_gestor, "Abrir Gestor de Datos", lambda: abrir_herramienta(MODULO_GESTOR, pasar_excel=False), tipo="primary", width=30).pack(pady=10)
+
+    # Módulo 2: Modelo A
+    card_mod_a = estilos.crear_card(col_der)
+    card_mod_a.pack(fill="x", pady=10)
+    estilos.crear_label_subtitulo(card_mod_a, "2. Modelo A (Correlacional)", bg=estilos.COLOR_PANEL).pack(anchor="w")
+    tk.Label(card_mod_a, text="Análisis estadístico estático (Regresión Lineal Simple).", font=estilos.FONT_BODY, fg="#bdc3c7", bg=estilos.COLOR_PANEL).pack(anchor="w", pady=2)
+    estilos.crear_boton(card_mod_a, "Ejecutar Modelo A", lambda: abrir_herramienta(MODULO_MODELO_A, pasar_excel=True), tipo="warning", width=30).pack(pady=10)
+
+    # Módulo 3: Modelo B
+    card_mod_b = estilos.crear_card(col_der)
+    card_mod_b.pack(fill="x", pady=10)
+    estilos.crear_label_subtitulo(card_mod_b, "3. Modelo B (Predictivo)", bg=estilos.COLOR_PANEL).pack(anchor="w")
+    tk.Label(card_mod_b, text="Análisis dinámico de tendencias y predicción basada en cambios (Deltas).", font=estilos.FONT_BODY, fg="#bdc3c7", bg=estilos.COLOR_PANEL).pack(anchor="w", pady=2)
+    estilos.crear_boton(card_mod_b, "Ejecutar Modelo B", lambda: abrir_herramienta(MODULO_MODELO_B, pasar_excel=True), tipo="success", width=30).pack(pady=10)
+
+    # Footer
+    tk.Label(root, text="© 2025 Sistema de Vigilancia Epidemiológica", font=estilos.FONT_SMALL, fg="#7f8c8d", bg=estilos.COLOR_FONDO).pack(side="bottom", pady=10)
+
+def main():
+    construir_interfaz(tk.Tk())
+    root.mainloop()
+
+if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()  # El ejecutable relanza este archivo en los procesos del importador de boletines
+    main()
@@ -8,6 +8,18 @@ a = Analysis(
     datas=[
         ('estilos.py', '.'),
         ('utilidades.py', '.'),
+        ('motor_modelo_a.py', '.'),
+        ('motor_modelo_b.py', '.'),
+        ('cache_excel.py', '.'),
+        ('bitacora.py', '.'),
+        ('tabla_virtual.py', '.'),
+        ('sesion.py', '.'),
+        ('tareas.py', '.'),
+        ('registro_referencias.py', '.'),
+        ('procesar_lote.py', '.'),
+        ('importar_trends.py', '.'),
+        ('importar_boletines.py', '.'),
+        ('graficas.py', '.'),
         ('modelo_a.py', '.'),
         ('modelo_b.py', '.'),
         ('gestor_datos.py', '.'),
@@ -17,12 +29,14 @@ a = Analysis(
         'tkcalendar',
         'pandas',
         'numpy',
-        'sklearn',
-        'sklearn.linear_model',
         'openpyxl',
         'webbrowser',
-        'subprocess',
         'datetime',
+        # Se importan con importlib al abrir cada herramienta
+        'modelo_a',
+        'modelo_b',
+        'gestor_datos',
+        'matplotlib.backends.backend_tkagg',
     ],
     hookspath=[],
     hooksconfig={},
@@ -1,19 +1,20 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
-import pandas as pd
+from tkinter import messagebox, filedialog
 import numpy as np
-from sklearn.linear_model import LinearRegression
 import os
 import sys
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-from matplotlib.figure import Figure
 import estilos
+import tabla_virtual
 import utilidades
+import sesion
+import tareas
 
 # ===================== RUTA DEL EXCEL (DINÁMICA) =====================
-RUTA_EXCEL = sys.argv[1] if len(sys.argv) > 1 else None
+RUTA_EXCEL = None  # Se recibe de abrir() o de la línea de comandos
+root = None
 
 df_modelo = None
+df_fuente = None  # Tabla completa (sin el filtro Semana >= 2) para el escaneo de retrasos
 pendiente_g = None
 intercepto_g = None
 r2_g = None
@@ -26,102 +27,83 @@ def seleccionar_excel():
     )
     return ruta if ruta else None
 
-def obtener_df():
+def obtener_ruta():
+    """Ruta del Excel a procesar; la pide si no hay una válida (hilo de Tk)."""
     global RUTA_EXCEL
     if not RUTA_EXCEL or not os.path.exists(RUTA_EXCEL):
         RUTA_EXCEL = seleccionar_excel()
     if not RUTA_EXCEL or not os.path.exists(RUTA_EXCEL):
         messagebox.showerror("Error", "No se seleccionó un archivo Excel válido.")
         return None
+    return RUTA_EXCEL
 
+def obtener_df(ruta):
+    """Lee y valida la tabla. Sin diálogos: los problemas se lanzan como ValueError (apto para hilos)."""
     try:
-        df = pd.read_excel(RUTA_EXCEL, sheet_name=0)
+        df = sesion.leer_excel(ruta, hoja=0)
     except Exception as e:
-        messagebox.showerror("Error", f"No se pudo leer el Excel:\n{e}")
-        return None
-
-    df = df.rename(columns={
-        "Numero de Semana Epidemiologica": utilidades.COL_SEMANA,
-        "Indice": utilidades.COL_INDICE,
-        "Indice t-1": utilidades.COL_INDICE_PREV,
-        "Casos Reportados": utilidades.COL_CASOS
-    })
-
-    # Validación mínima
-    if utilidades.COL_SEMANA not in df.columns or utilidades.COL_CASOS not in df.columns:
-        messagebox.showerror("Error", "Faltan columnas requeridas: Semana y/o Casos Reportados.")
-        return None
-    if utilidades.COL_INDICE_PREV not in df.columns and utilidades.COL_INDICE not in df.columns:
-        messagebox.showerror("Error", "Falta la columna Indice (o Indice t-1) en el Excel.")
-        return None
-
-    # Si falta Indice_t_1 pero existe Indice_t, lo calculamos con shift
-    if utilidades.COL_INDICE_PREV not in df.columns and utilidades.COL_INDICE in df.columns:
-        df[utilidades.COL_INDICE_PREV] = df[utilidades.COL_INDICE].shift(1)
-
-    return df
+        raise ValueError(f"No se pudo leer el Excel:\n{e}") from e
+    # Valida y convierte al esquema común (calcula Indice_t_1 si solo viene Indice)
+    return utilidades.normalizar_columnas(df)
 
 def procesar_modelo_a():
-    global df_modelo, pendiente_g, intercepto_g, r2_g, corr_g
-    try:
-        df = obtener_df()
-        if df is None:
-            return
-
-        df[utilidades.COL_SEMANA] = pd.to_numeric(df[utilidades.COL_SEMANA], errors='coerce')
-        df_a = df[df[utilidades.COL_SEMANA] >= 2].copy()
-        df_a = df_a.dropna(subset=[utilidades.COL_INDICE_PREV, utilidades.COL_CASOS]).reset_index(drop=True)
+    """Lee y ajusta en segundo plano; la interfaz se actualiza al terminar."""
+    ruta = obtener_ruta()
+    if ruta is None:
+        return
 
-        if df_a.empty:
-            messagebox.showwarning("Aviso", "No hay datos en el rango.")
-            return
+    def trabajo(tarea):
+        tarea.avance(0.05, "Leyendo el Excel...")
+        df = obtener_df(ruta)
+        tarea.avance(0.6, "Calculando correlaciones...")
+        # Mientras el archivo no cambie, reabrir el Modelo A no recalcula
+        df_a, res = sesion.resultado(ruta, "modelo_a", lambda: utilidades.calcular_modelo_a(df))
+        tarea.avance(1.0)
+        return df, df_a, res
+
+    tareas.ejecutar(root, trabajo, aplicar_modelo_a, panel=panel_progreso, texto="Procesando Modelo A...")
+
+def aplicar_modelo_a(resultado):
+    """Aplica de una vez el resultado de procesar_modelo_a (hilo de Tk)."""
+    global df_modelo, df_fuente, pendiente_g, intercepto_g, r2_g, corr_g
+    df, df_a, res = resultado
+    if df_a is None:
+        messagebox.showwarning("Aviso", "No hay datos en el rango.")
+        return
 
-        X = df_a[[utilidades.COL_INDICE_PREV]].values
-        y = df_a[utilidades.COL_CASOS].values
-
-        modelo = LinearRegression(fit_intercept=True)
-        modelo.fit(X, y)
-
-        pendiente = modelo.coef_[0]
-        intercepto = modelo.intercept_
-        corr = np.corrcoef(df_a[utilidades.COL_INDICE_PREV], df_a[utilidades.COL_CASOS])[0, 1]
-        r2 = corr ** 2
-
-        pendiente_g = pendiente
-        intercepto_g = intercepto
-        r2_g = r2
-        corr_g = corr
-        df_modelo = df_a
-
-        lbl_pendiente.config(text=f"Pendiente (b): {pendiente:.4f}")
-        lbl_intercepto.config(text=f"Intercepto (a): {intercepto:.4f}")
-        color_r2 = estilos.COLOR_DANGER if r2 < 0.1 else estilos.COLOR_TEXTO
-        lbl_r2.config(text=f"R² (Varianza explicada): {r2:.5f} ({r2*100:.2f}%)", fg=color_r2)
-        lbl_corr.config(text=f"Correlación (r): {corr:.5f}")
-
-        actualizar_tabla()
-        btn_grafica.config(state="normal")
-        btn_exportar.config(state="normal")
-        btn_conclusion.config(state="normal")
-        messagebox.showinfo("Éxito", "Análisis Correlacional (Modelo A) completado.")
-    except Exception as e:
-        messagebox.showerror("Error", str(e))
+    pendiente = res["pendiente"]
+    intercepto = res["intercepto"]
+    corr = res["corr"]
+    r2 = res["r2"]
+
+    pendiente_g = pendiente
+    intercepto_g = intercepto
+    r2_g = r2
+    corr_g = corr
+    df_modelo = df_a
+    df_fuente = df
+
+    lbl_pendiente.config(text=f"Pendiente (b): {pendiente:.4f}")
+    lbl_intercepto.config(text=f"Intercepto (a): {intercepto:.4f}")
+    color_r2 = estilos.COLOR_DANGER if r2 < 0.1 else estilos.COLOR_TEXTO
+    lbl_r2.config(text=f"R² (Varianza explicada): {r2:.5f} ({r2*100:.2f}%)", fg=color_r2)
+    lbl_corr.config(text=f"Correlación (r): {corr:.5f}")
+
+    actualizar_tabla()
+    btn_grafica.config(state="normal")
+    btn_exportar.config(state="normal")
+    btn_conclusion.config(state="normal")
+    btn_retrasos.config(state="normal")
+    btn_movil.config(state="normal")
+    messagebox.showinfo("Éxito", "Análisis Correlacional (Modelo A) completado.")
 
 def actualizar_tabla():
-    for row in tabla.get_children():
-        tabla.delete(row)
     if df_modelo is None:
+        tabla.limpiar()
         return
-    for _, row in df_modelo.iterrows():
-        periodo = row.get(utilidades.COL_PERIODO, "-")
-        if isinstance(periodo, pd.Timestamp):
-            periodo = periodo.strftime('%d/%m/%Y')
-        tabla.insert("", tk.END, values=[
-            row.get(utilidades.COL_SEMANA),
-            periodo,
-            row.get(utilidades.COL_INDICE_PREV),
-            row.get(utilidades.COL_CASOS)
-        ])
+    formatos = [tabla_virtual.fmt_texto, tabla_virtual.fmt_fecha, tabla_virtual.fmt_texto, tabla_virtual.fmt_texto,
+                tabla_virtual.fmt_decimal(3, si_nan="-")]
+    tabla.cargar_df(df_modelo, cols, formatos, relleno="-")
 
 def exportar_excel():
     if df_modelo is None:
@@ -133,9 +115,10 @@ def exportar_excel():
     )
     if ruta:
         try:
-            cols_export = [utilidades.COL_SEMANA, utilidades.COL_PERIODO, utilidades.COL_INDICE_PREV, utilidades.COL_CASOS]
+            cols_export = [utilidades.COL_SEMANA, utilidades.COL_PERIODO, utilidades.COL_INDICE_PREV, utilidades.COL_CASOS,
+                           utilidades.COL_R_MOVIL, utilidades.COL_R_ACUMULADA]
             final_cols = [c for c in cols_export if c in df_modelo.columns]
-            df_modelo[final_cols].to_excel(ruta, index=False)
+            utilidades.para_archivo(df_modelo[final_cols]).to_excel(ruta, index=False)
             messagebox.showinfo("Exportado", f"Datos guardados en:\n{ruta}")
         except Exception as e:
             messagebox.showerror("Error", str(e))
@@ -143,6 +126,11 @@ def exportar_excel():
 def mostrar_grafica():
     if df_modelo is None:
         return
+    # matplotlib se importa hasta la primera gráfica (arranque más rápido)
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+    from matplotlib.figure import Figure
+    import graficas
+
     top = tk.Toplevel(root)
     top.title("Dispersión: ¿Existe relación?")
     top.geometry("700x500")
@@ -152,7 +140,8 @@ def mostrar_grafica():
     ax = fig.add_subplot(111)
     x = df_modelo[utilidades.COL_INDICE_PREV]
     y = df_modelo[utilidades.COL_CASOS]
-    ax.scatter(x, y, label="Observaciones Reales", color='blue', alpha=0.6)
+    # Con muchas observaciones se dibuja la densidad (se recalcula al hacer zoom/pan)
+    dispersion = graficas.DispersionDensa(ax, x, y, label="Observaciones Reales", color='blue', alpha=0.6)
     x_line = np.linspace(x.min(), x.max(), 50)
     y_line = intercepto_g + pendiente_g * x_line
     ax.plot(x_line, y_line, label=f"Tendencia (R²={r2_g:.4f})", color='red', linestyle='--')
@@ -162,6 +151,7 @@ def mostrar_grafica():
     ax.legend()
     ax.grid(True, linestyle=':', alpha=0.6)
     canvas = FigureCanvasTkAgg(fig, master=top)
+    top.dispersion = dispersion  # matplotlib guarda referencias débiles a los callbacks
     canvas.draw()
     canvas.get_tk_widget().pack(fill="both", expand=True)
 
@@ -170,6 +160,132 @@ def mostrar_grafica():
     toolbar.update()
     canvas.get_tk_widget().pack(fill="both", expand=True)
 
+def mostrar_retrasos():
+    """Correlograma de casos vs índice adelantado -52..+52 semanas."""
+    if df_fuente is None:
+        return
+    tabla_r, mejor = sesion.resultado(RUTA_EXCEL, "retrasos", lambda: utilidades.escanear_retrasos(df_fuente))
+    if mejor is None:
+        messagebox.showwarning("Aviso", "No hay semanas suficientes para comparar retrasos.")
+        return
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+    from matplotlib.figure import Figure
+
+    top = tk.Toplevel(root)
+    top.title("Escaneo de Retrasos: Índice vs Casos")
+    top.geometry("900x600")
+    estilos.aplicar_tema(top)
+
+    k = mejor["retraso"]
+    if k > 0:
+        sentido = f"el índice se adelanta {k} semanas a los casos"
+    elif k < 0:
+        sentido = f"el índice va {-k} semanas detrás de los casos"
+    else:
+        sentido = "misma semana"
+    actual = tabla_r[tabla_r["retraso"] == 1]
+    texto = (f"Mejor retraso: {k:+d} semanas ({sentido}) — r = {mejor['r']:.4f}, "
+             f"R² = {mejor['r2']:.4f} ({mejor['pares']} pares)")
+    if not actual.empty:
+        texto += f"\nRetraso del Modelo A (+1): r = {actual['r'].iloc[0]:.4f}, R² = {actual['r2'].iloc[0]:.4f}"
+    tk.Label(top, text=texto, font=estilos.FONT_BODY_BOLD, bg=estilos.COLOR_FONDO, fg=estilos.COLOR_TEXTO, justify="left").pack(pady=10)
+
+    fig = Figure(figsize=(8, 4.5), dpi=100)
+    ax = fig.add_subplot(111)
+    retrasos = tabla_r["retraso"].to_numpy()
+    ax.bar(retrasos, tabla_r["r"], color=estilos.COLOR_ACCENT, width=0.8, label="r por retraso")
+    # Banda aproximada de r sin relación (±1.96/√n): con 105 retrasos algunos la cruzan por azar
+    banda = 1.96 / np.sqrt(np.maximum(tabla_r["pares"].to_numpy(), 1))
+    ax.fill_between(retrasos, -banda, banda, color="gray", alpha=0.2, step="mid", label="±1.96/√n")
+    ax.bar([k], [mejor["r"]], color=estilos.COLOR_DANGER, width=0.8, label=f"Mejor ({k:+d})")
+    ax.axhline(0, color="black", linewidth=0.8)
+    ax.set_title("Correlograma: Casos(t) vs Índice(t - k)")
+    ax.set_xlabel("Retraso k (semanas; k > 0: el índice se adelanta)")
+    ax.set_ylabel("r de Pearson")
+    ax.legend()
+    ax.grid(True, linestyle=":", alpha=0.6)
+
+    canvas = FigureCanvasTkAgg(fig, master=top)
+    canvas.draw()
+    canvas.get_tk_widget().pack(fill="both", expand=True)
+    toolbar = NavigationToolbar2Tk(canvas, top)
+    toolbar.update()
+
+def mostrar_correlacion_movil():
+    """Casos en el tiempo con la correlación móvil y la acumulada superpuestas."""
+    if df_modelo is None:
+        return
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+    from matplotlib.figure import Figure
+    import motor_modelo_a
+
+    top = tk.Toplevel(root)
+    top.title("Correlación Móvil: Índice (t-1) vs Casos")
+    top.geometry("1000x620")
+    estilos.aplicar_tema(top)
+
+    # df_modelo viene ordenado por grupo y Periodo (utilidades.calcular_modelo_a)
+    x = df_modelo[utilidades.COL_INDICE_PREV].to_numpy(dtype=float)
+    y = df_modelo[utilidades.COL_CASOS].to_numpy(dtype=float)
+    grupos, _ = utilidades.codigos_grupo(df_modelo, utilidades.columnas_grupo(df_modelo))
+    tramos = np.split(np.arange(len(grupos)), np.flatnonzero(np.diff(grupos)) + 1)
+    tiene_fecha = utilidades.COL_PERIODO in df_modelo.columns and df_modelo[utilidades.COL_PERIODO].notna().any()
+    eje_x = (df_modelo[utilidades.COL_PERIODO] if tiene_fecha else df_modelo[utilidades.COL_SEMANA]).to_numpy()
+    r_movil = df_modelo[utilidades.COL_R_MOVIL].to_numpy()
+    r_acumulada = df_modelo[utilidades.COL_R_ACUMULADA].to_numpy()
+
+    fig = Figure(figsize=(9, 4.5), dpi=100)
+    ax = fig.add_subplot(111)
+    ax_r = ax.twinx()
+    # Una línea por región/término: cada serie se recorre en su propio orden de fechas
+    lineas_movil = []
+    for i, filas in enumerate(tramos):
+        sufijo = "" if i == 0 else "_"  # Solo la primera de cada tipo va en la leyenda
+        ax.plot(eje_x[filas], y[filas], color="blue", alpha=0.5, label=sufijo + "Casos")
+        lineas_movil.append(ax_r.plot(eje_x[filas], r_movil[filas], color="red", label=sufijo + "r móvil")[0])
+        ax_r.plot(eje_x[filas], r_acumulada[filas], color="gray", linestyle="--", label=sufijo + "r acumulada")
+    ax.set_xlabel("Fecha" if tiene_fecha else "Semana")
+    ax.set_ylabel("Casos")
+    ax_r.axhline(corr_g, color="black", linestyle=":", linewidth=0.8, label=f"r global ({corr_g:.3f})")
+    ax_r.set_ylim(-1.05, 1.05)
+    ax_r.set_ylabel("r de Pearson")
+    lineas = [l for l in ax.get_lines() + ax_r.get_lines() if not l.get_label().startswith("_")]
+    ax_r.legend(lineas, [l.get_label() for l in lineas], loc="upper left", fontsize=8)
+    ax.grid(True, linestyle=":", alpha=0.6)
+    if tiene_fecha:
+        fig.autofmt_xdate()
+
+    def aplicar_ventana():
+        # Recalcular la curva cuesta O(n): se puede probar otra ventana al instante
+        try:
+            ventana = int(spin_ventana.get())
+        except ValueError:
+            return
+        if ventana < 3:
+            return
+        r = motor_modelo_a.correlacion_movil(x, y, ventana, grupos=grupos)
+        for linea, filas in zip(lineas_movil, tramos):
+            linea.set_ydata(r[filas])
+        lineas_movil[0].set_label(f"r móvil ({ventana} sem.)")
+        ax_r.legend(lineas, [l.get_label() for l in lineas], loc="upper left", fontsize=8)
+        canvas.draw_idle()
+
+    frame_ctrl = tk.Frame(top, bg=estilos.COLOR_FONDO)
+    frame_ctrl.pack(pady=5)
+    tk.Label(frame_ctrl, text="Ventana (semanas):", font=estilos.FONT_BODY, bg=estilos.COLOR_FONDO, fg=estilos.COLOR_TEXTO).pack(side="left", padx=5)
+    spin_ventana = tk.Spinbox(frame_ctrl, from_=3, to=520, width=6, font=estilos.FONT_BODY)
+    spin_ventana.delete(0, tk.END)
+    spin_ventana.insert(0, str(utilidades.VENTANA_CORRELACION))
+    spin_ventana.pack(side="left", padx=5)
+    estilos.crear_boton(frame_ctrl, "Aplicar", aplicar_ventana, tipo="primary", width=10).pack(side="left", padx=5)
+
+    canvas = FigureCanvasTkAgg(fig, master=top)
+    canvas.draw()
+    canvas.get_tk_widget().pack(fill="both", expand=True)
+    toolbar = NavigationToolbar2Tk(canvas, top)
+    toolbar.update()
+    aplicar_ventana()
+
 def mostrar_conclusion():
     if r2_g is None:
         return
@@ -185,67 +301,94 @@ def mostrar_conclusion():
     messagebox.showinfo("Interpretación Estadística", msg)
 
 # ===================== GUI =====================
-root = tk.Tk()
-root.title("Modelo A: Análisis Correlacional (Sin Predicción)")
-root.state('zoomed')
-estilos.aplicar_tema(root)
-
-# Header
-frame_header = tk.Frame(root, bg=estilos.COLOR_FONDO)
-frame_header.pack(fill="x", pady=20)
-tk.Label(frame_header, text="Modelo A: Análisis de Correlación", font=estilos.FONT_H1, bg=estilos.COLOR_FONDO, fg=estilos.COLOR_TEXTO).pack()
-
-estilos.crear_boton(frame_header, "⬅ Volver al Menú", root.destroy, tipo="secondary", width=20).pack(anchor="nw", padx=20)
-tk.Label(frame_header, text="(Este modelo solo mide la relación entre variables, no predice)", font=estilos.FONT_SMALL, bg=estilos.COLOR_FONDO, fg=estilos.COLOR_TEXTO_SEC).pack()
-
-# Auto-cargar al iniciar
-root.after(100, procesar_modelo_a)
-
-# Stats Card
-card_stats = estilos.crear_card(root)
-card_stats.pack(fill="x", padx=20, pady=10)
-estilos.crear_label_subtitulo(card_stats, "Resultados Estadísticos", bg=estilos.COLOR_PANEL).pack(anchor="w", pady=(0, 10))
-
-frame_stats_grid = tk.Frame(card_stats, bg=estilos.COLOR_PANEL)
-frame_stats_grid.pack(fill="x")
-
-lbl_pendiente = tk.Label(frame_stats_grid, text="Pendiente: --", font=estilos.FONT_BODY, bg=estilos.COLOR_PANEL, fg=estilos.COLOR_TEXTO)
-lbl_pendiente.grid(row=0, column=0, padx=20, pady=5)
-lbl_intercepto = tk.Label(frame_stats_grid, text="Intercepto: --", font=estilos.FONT_BODY, bg=estilos.COLOR_PANEL, fg=estilos.COLOR_TEXTO)
-lbl_intercepto.grid(row=0, column=1, padx=20, pady=5)
-lbl_corr = tk.Label(frame_stats_grid, text="Correlación (r): --", font=estilos.FONT_BODY_BOLD, bg=estilos.COLOR_PANEL, fg=estilos.COLOR_ACCENT)
-lbl_corr.grid(row=1, column=0, padx=20, pady=5)
-lbl_r2 = tk.Label(frame_stats_grid, text="R²: --", font=estilos.FONT_BODY_BOLD, bg=estilos.COLOR_PANEL, fg=estilos.COLOR_TEXTO)
-lbl_r2.grid(row=1, column=1, padx=20, pady=5)
-
-# Actions
-frame_btn = tk.Frame(root, bg=estilos.COLOR_FONDO)
-frame_btn.pack(pady=10)
-btn_grafica = estilos.crear_boton(frame_btn, "Ver Dispersión", mostrar_grafica, tipo="info", width=20)
-btn_grafica.pack(side="left", padx=5)
-
-btn_conclusion = estilos.crear_boton(frame_btn, "Leer Conclusión", mostrar_conclusion, tipo="primary", width=20)
-btn_conclusion.pack(side="left", padx=5)
-
-btn_exportar = estilos.crear_boton(frame_btn, "Exportar Datos a Excel", exportar_excel, tipo="success", width=25)
-btn_exportar.pack(side="left", padx=5)
-
-# Table
-frame_tab = tk.Frame(root, bg=estilos.COLOR_FONDO)
-frame_tab.pack(fill="both", expand=True, padx=20, pady=10)
-
-cols = [utilidades.COL_SEMANA, utilidades.COL_PERIODO, utilidades.COL_INDICE_PREV, utilidades.COL_CASOS]
-scroll = ttk.Scrollbar(frame_tab, orient="vertical")
-tabla = ttk.Treeview(frame_tab, columns=cols, show="headings", yscrollcommand=scroll.set)
-scroll.config(command=tabla.yview)
-scroll.pack(side="right", fill="y")
-tabla.pack(side="left", fill="both", expand=True)
-
-tabla.heading(utilidades.COL_SEMANA, text="Semana")
-tabla.heading(utilidades.COL_PERIODO, text="Periodo")
-tabla.heading(utilidades.COL_INDICE_PREV, text="Índice (t-1)")
-tabla.heading(utilidades.COL_CASOS, text="Casos")
-for col in cols:
-    tabla.column(col, anchor="center")
-
-root.mainloop()
+def construir_interfaz(ventana):
+    """Construye la interfaz dentro de ventana (Tk propia o Toplevel del menú)."""
+    global root, lbl_pendiente, lbl_intercepto, lbl_corr, lbl_r2, btn_grafica, btn_conclusion, btn_exportar, btn_retrasos, btn_movil, cols, tabla, panel_progreso
+    root = ventana
+    root.title("Modelo A: Análisis Correlacional (Sin Predicción)")
+    root.state('zoomed')
+    estilos.aplicar_tema(root)
+
+    # Header
+    frame_header = tk.Frame(root, bg=estilos.COLOR_FONDO)
+    frame_header.pack(fill="x", pady=20)
+    tk.Label(frame_header, text="Modelo A: Análisis de Correlación", font=estilos.FONT_H1, bg=estilos.COLOR_FONDO, fg=estilos.COLOR_TEXTO).pack()
+
+    estilos.crear_boton(frame_header, "⬅ Volver al Menú", root.destroy, tipo="secondary", width=20).pack(anchor="nw", padx=20)
+    tk.Label(frame_header, text="(Este modelo solo mide la relación entre variables, no predice)", font=estilos.FONT_SMALL, bg=estilos.COLOR_FONDO, fg=estilos.COLOR_TEXTO_SEC).pack()
+
+    # Avance de la lectura y el ajuste (se procesan en segundo plano)
+    panel_progreso = tareas.PanelProgreso(frame_header)
+    panel_progreso.pack()
+
+    # Auto-cargar al iniciar
+    root.after(100, procesar_modelo_a)
+
+    # Stats Card
+    card_stats = estilos.crear_card(root)
+    card_stats.pack(fill="x", padx=20, pady=10)
+    estilos.crear_label_subtitulo(card_stats, "Resultados Estadísticos", bg=estilos.COLOR_PANEL).pack(anchor="w", pady=(0, 10))
+
+    frame_stats_grid = tk.Frame(card_stats, bg=estilos.COLOR_PANEL)
+    frame_stats_grid.pack(fill="x")
+
+    lbl_pendiente = tk.Label(frame_stats_grid, text="Pendiente: --", font=estilos.FONT_BODY, bg=estilos.COLOR_PANEL, fg=estilos.COLOR_TEXTO)
+    lbl_pendiente.grid(row=0, column=0, padx=20, pady=5)
+    lbl_intercepto = tk.Label(frame_stats_grid, text="Intercepto: --", font=estilos.FONT_BODY, bg=estilos.COLOR_PANEL, fg=estilos.COLOR_TEXTO)
+    lbl_intercepto.grid(row=0, column=1, padx=20, pady=5)
+    lbl_corr = tk.Label(frame_stats_grid, text="Correlación (r): --", font=estilos.FONT_BODY_BOLD, bg=estilos.COLOR_PANEL, fg=estilos.COLOR_ACCENT)
+    lbl_corr.grid(row=1, column=0, padx=20, pady=5)
+    lbl_r2 = tk.Label(frame_stats_grid, text="R²: --", font=estilos.FONT_BODY_BOLD, bg=estilos.COLOR_PANEL, fg=estilos.COLOR_TEXTO)
+    lbl_r2.grid(row=1, column=1, padx=20, pady=5)
+
+    # Actions
+    frame_btn = tk.Frame(root, bg=estilos.COLOR_FONDO)
+    frame_btn.pack(pady=10)
+    btn_grafica = estilos.crear_boton(frame_btn, "Ver Dispersión", mostrar_grafica, tipo="info", width=20)
+    btn_grafica.pack(side="left", padx=5)
+
+    btn_retrasos = estilos.crear_boton(frame_btn, "Escanear Retrasos", mostrar_retrasos, tipo="info", width=20)
+    btn_retrasos.pack(side="left", padx=5)
+
+    btn_movil = estilos.crear_boton(frame_btn, "Correlación Móvil", mostrar_correlacion_movil, tipo="info", width=20)
+    btn_movil.pack(side="left", padx=5)
+
+    btn_conclusion = estilos.crear_boton(frame_btn, "Leer Conclusión", mostrar_conclusion, tipo="primary", width=20)
+    btn_conclusion.pack(side="left", padx=5)
+
+    btn_exportar = estilos.crear_boton(frame_btn, "Exportar Datos a Excel", exportar_excel, tipo="success", width=25)
+    btn_exportar.pack(side="left", padx=5)
+
+    # Table
+    frame_tab = tk.Frame(root, bg=estilos.COLOR_FONDO)
+    frame_tab.pack(fill="both", expand=True, padx=20, pady=10)
+
+    cols = [utilidades.COL_SEMANA, utilidades.COL_PERIODO, utilidades.COL_INDICE_PREV, utilidades.COL_CASOS, utilidades.COL_R_MOVIL]
+    tabla = tabla_virtual.TablaVirtual(frame_tab, cols, ancho=200, titulos={
+        utilidades.COL_SEMANA: "Semana",
+        utilidades.COL_PERIODO: "Periodo",
+        utilidades.COL_INDICE_PREV: "Índice (t-1)",
+        utilidades.COL_CASOS: "Casos",
+        utilidades.COL_R_MOVIL: f"r móvil ({utilidades.VENTANA_CORRELACION} sem.)",
+    })
+    tabla.pack(fill="both", expand=True)
+
+def abrir(maestro=None, ruta_excel=None):
+    """
+    Abre el Modelo A. Con maestro se crea como Toplevel del menú (mismo
+    proceso); si ya está abierta con el mismo archivo solo se trae al frente.
+    """
+    global RUTA_EXCEL
+    if root is not None and root.winfo_exists():
+        if not ruta_excel or ruta_excel == RUTA_EXCEL:
+            estilos.traer_al_frente(root)
+            return root
+        root.destroy()
+    if ruta_excel:
+        RUTA_EXCEL = ruta_excel
+    construir_interfaz(estilos.crear_ventana(maestro))
+    return root
+
+if __name__ == "__main__":
+    RUTA_EXCEL = sys.argv[1] if len(sys.argv) > 1 else None
+    abrir().mainloop()
@@ -1,29 +1,45 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
+from tkinter import messagebox, filedialog, simpledialog
 import pandas as pd
 import numpy as np
-from sklearn.linear_model import LinearRegression
 import os
 import sys
 import datetime
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-from matplotlib.figure import Figure
 import estilos
+import tabla_virtual
 import utilidades
+import cache_excel
+import bitacora
+import sesion
+import tareas
 
 try:
     from tkcalendar import DateEntry
 except ImportError:
     messagebox.showerror("Error", "Falta tkcalendar. Instala: pip install tkcalendar")
-    sys.exit()
+    raise
 
 # ===================== CONFIGURACIÓN =====================
-RUTA_EXCEL = sys.argv[1] if len(sys.argv) > 1 else None
+RUTA_EXCEL = None  # Se recibe de abrir() o de la línea de comandos
+root = None
 
 df_datos = None
 modelo_alpha = 0.0
 modelo_beta = 0.0
 modelo_listo = False
+bitacora_actual = None  # Bitácora de cambios del libro abierto
+UMBRAL_COMPACTACION = 25  # Cambios en bitácora antes de reescribir el libro en segundo plano
+TITULOS_TABLA = {
+    utilidades.COL_SEMANA: "Semana",
+    utilidades.COL_PERIODO: "Fecha",
+    utilidades.COL_INDICE: "Índice (t)",
+    utilidades.COL_INDICE_PREV: "Índice (t-1)",
+    utilidades.COL_CASOS: "Casos",
+    utilidades.COL_EST_SIN: "Est. SIN Intercepto",
+    utilidades.COL_EST_CON: "Est. CON Intercepto",
+}
+AVISO_REGIONES = ("El archivo tiene varias regiones/términos y esta ventana ajusta una sola serie.\n\n"
+                  "Usa \"Modelo B por Región\" para ajustar y predecir cada una por separado.")
 
 # ===================== UTILIDADES =====================
 def seleccionar_excel():
@@ -33,42 +49,27 @@ def seleccionar_excel():
     )
     return ruta or None
 
-def leer_excel():
+def obtener_ruta():
+    """Ruta del libro de trabajo; la pide si no hay una válida (hilo de Tk)."""
     global RUTA_EXCEL
     if not RUTA_EXCEL or not os.path.exists(RUTA_EXCEL):
         RUTA_EXCEL = seleccionar_excel()
     if not RUTA_EXCEL or not os.path.exists(RUTA_EXCEL):
         messagebox.showerror("Error", "No se seleccionó un Excel válido.")
         return None
+    return RUTA_EXCEL
+
+def leer_excel(ruta):
+    """Lee y normaliza el libro. Sin diálogos: los problemas se lanzan como ValueError (apto para hilos)."""
     try:
-        df = pd.read_excel(RUTA_EXCEL, sheet_name=0)
+        df = sesion.leer_excel(ruta, hoja=0)
     except Exception as e:
-        messagebox.showerror("Error", f"No se pudo leer el Excel:\n{e}")
-        return None
+        raise ValueError(f"No se pudo leer el Excel:\n{e}") from e
+    return utilidades.normalizar_columnas(df)
 
-    df = df.rename(columns={
-        "Numero de Semana Epidemiologica": utilidades.COL_SEMANA,
-        "No. Semana": utilidades.COL_SEMANA,
-        "Indice": utilidades.COL_INDICE,
-        "Indice t-1": utilidades.COL_INDICE_PREV,
-        "Casos Reportados": utilidades.COL_CASOS,
-        "Casos": utilidades.COL_CASOS
-    })
-
-    cols_necesarias = [utilidades.COL_SEMANA, utilidades.COL_PERIODO, utilidades.COL_INDICE, utilidades.COL_INDICE_PREV, utilidades.COL_CASOS]
-    for col in cols_necesarias:
-        if col not in df.columns:
-            df[col] = np.nan
-
-    if utilidades.COL_PERIODO in df.columns:
-        df[utilidades.COL_PERIODO] = pd.to_datetime(df[utilidades.COL_PERIODO], errors="coerce")
-
-    faltantes = [utilidades.COL_SEMANA, utilidades.COL_INDICE, utilidades.COL_CASOS]
-    if any(c not in df.columns for c in faltantes):
-        messagebox.showerror("Error", f"Faltan columnas requeridas: {', '.join(faltantes)}")
-        return None
-
-    return df[cols_necesarias].copy()
+def escribir_libro(df, ruta):
+    """Escribe el libro sin columnas calculadas. No usa diálogos (se llama desde hilos)."""
+    utilidades.escribir_libro(df, ruta)
 
 def guardar_excel(df):
     global RUTA_EXCEL
@@ -81,17 +82,8 @@ def guardar_excel(df):
         messagebox.showwarning("Aviso", "No se guardó el archivo.")
         return
     try:
-        df_export = df.copy()
-        for col in [utilidades.COL_EST_SIN, utilidades.COL_EST_CON]:
-            if col in df_export.columns:
-                df_export = df_export.drop(columns=[col])
-        df_export = df_export.rename(columns={
-            utilidades.COL_SEMANA: "Numero de Semana Epidemiologica",
-            utilidades.COL_INDICE: "Indice",
-            utilidades.COL_INDICE_PREV: "Indice t-1",
-            utilidades.COL_CASOS: "Casos Reportados"
-        })
-        df_export.to_excel(RUTA_EXCEL, index=False)
+        escribir_libro(df, RUTA_EXCEL)
+        cache_excel.invalidar(RUTA_EXCEL)
         messagebox.showinfo("Guardado", f"Datos guardados en:\n{RUTA_EXCEL}")
     except PermissionError:
         messagebox.showerror("Error de Permiso", f"No se pudo guardar el archivo.\n\nPARECE QUE TIENES EL EXCEL ABIERTO.\nCierra el archivo '{os.path.basename(RUTA_EXCEL)}' y vuelve a intentarlo.")
@@ -99,71 +91,138 @@ def guardar_excel(df):
         messagebox.showerror("Error", f"No se pudo guardar:\n{e}")
 
 # ===================== LÓGICA MODELO B =====================
-def calcular_modelo_b_completo(df):
-    global modelo_alpha, modelo_beta, modelo_listo
-    modelo_listo = False
+def varias_series(df):
+    """True si el libro trae más de una región/término (formato largo)."""
+    claves = utilidades.columnas_grupo(df)
+    return bool(claves) and len(df[claves].drop_duplicates()) > 1
+
+def avisar_sin_modelo():
+    if varias_series(df_datos):
+        messagebox.showwarning("Aviso", AVISO_REGIONES)
+    else:
+        messagebox.showwarning("Aviso", "Se necesitan al menos 3 semanas para el modelo.")
+
+def estimar_modelo_b(df):
+    """
+    Ajusta y agrega las estimaciones sin tocar el estado global. Devuelve (df, alpha, beta);
+    alpha None sin modelo (menos de 3 semanas, o varias regiones: ver mostrar_resumen_regiones).
+    """
     df[utilidades.COL_EST_SIN] = 0.0
     df[utilidades.COL_EST_CON] = 0.0
 
-    if df is None or len(df) < 3:
-        return df
+    if df is None or len(df) < 3 or varias_series(df):
+        return df, None, None
 
-    df_calc = df.copy()
-    df_calc[utilidades.COL_INDICE_PREV] = df_calc[utilidades.COL_INDICE].shift(1)
-    df_calc["Delta_Casos"] = df_calc[utilidades.COL_CASOS].diff()
-    df_calc["Delta_Indice"] = df_calc[utilidades.COL_INDICE_PREV].diff()
+    alpha, beta = utilidades.calcular_coeficientes(df)
+    if alpha is None:
+        return df, None, None
+    return utilidades.aplicar_estimaciones(df, alpha, beta), alpha, beta
 
-    df_train = df_calc.dropna(subset=["Delta_Casos", "Delta_Indice"])
-    if df_train.empty:
-        return df
+def fijar_modelo(alpha, beta):
+    global modelo_alpha, modelo_beta, modelo_listo
+    modelo_listo = alpha is not None
+    if modelo_listo:
+        modelo_alpha = alpha
+        modelo_beta = beta
 
-    X = df_train[["Delta_Indice"]].values
-    y = df_train["Delta_Casos"].values
-    try:
-        modelo = LinearRegression(fit_intercept=True)
-        modelo.fit(X, y)
-        modelo_alpha = modelo.intercept_
-        modelo_beta = modelo.coef_[0]
-        modelo_listo = True
-    except Exception:
-        return df
-
-    lista_sin = [0.0] * len(df)
-    lista_con = [0.0] * len(df)
-    for i in range(1, len(df)):
-        casos_prev = df_calc.iloc[i - 1][utilidades.COL_CASOS]
-        ind_t1_actual = df_calc.iloc[i][utilidades.COL_INDICE_PREV]
-        ind_t1_prev = df_calc.iloc[i - 1][utilidades.COL_INDICE_PREV]
-        delta_ind = 0 if (pd.isna(ind_t1_actual) or pd.isna(ind_t1_prev)) else ind_t1_actual - ind_t1_prev
-        est_sin = casos_prev + modelo_beta * delta_ind
-        est_con = casos_prev + modelo_alpha + modelo_beta * delta_ind
-        lista_sin[i] = est_sin
-        lista_con[i] = est_con
-
-    df[utilidades.COL_EST_SIN] = lista_sin
-    df[utilidades.COL_EST_CON] = lista_con
+def calcular_modelo_b_completo(df):
+    df, alpha, beta = estimar_modelo_b(df)
+    fijar_modelo(alpha, beta)
     return df
 
 # ===================== GESTIÓN DE DATOS =====================
 def cargar_datos():
-    global df_datos
-    df = leer_excel()
-    if df is None:
+    """Lee el libro, recupera la bitácora y ajusta en segundo plano; la interfaz se actualiza al terminar."""
+    ruta = obtener_ruta()
+    if ruta is None:
         return
-    df_datos = df.sort_values(by=utilidades.COL_PERIODO).reset_index(drop=True)
-    df_datos[utilidades.COL_INDICE_PREV] = df_datos[utilidades.COL_INDICE].shift(1)
-    df_datos[utilidades.COL_INDICE_PREV] = df_datos[utilidades.COL_INDICE].shift(1)
-    actualizar_tabla_ui()
-    sugerir_siguientes_datos()
 
-def guardar_cambios():
+    def trabajo(tarea):
+        tarea.avance(0.05, "Leyendo el Excel...")
+        df = bitacora.ordenar(leer_excel(ruta))
+        tarea.avance(0.5, "Recuperando cambios...")
+        # Reaplicar cambios que no alcanzaron a escribirse en el libro (cierre abrupto)
+        bitacora_libro = bitacora.Bitacora(ruta)
+        df, recuperados = bitacora_libro.recuperar(df)
+        df[utilidades.COL_INDICE_PREV] = utilidades.indice_previo(df)
+        tarea.avance(0.8, "Ajustando el Modelo B...")
+        df, alpha, beta = estimar_modelo_b(df)
+        tarea.avance(1.0)
+        return df, alpha, beta, bitacora_libro, recuperados
+
+    tareas.ejecutar(root, trabajo, aplicar_datos, panel=panel_progreso, texto="Cargando datos...")
+
+def aplicar_datos(resultado):
+    """Aplica de una vez lo que preparó cargar_datos (hilo de Tk)."""
+    global df_datos, bitacora_actual
+    df_datos, alpha, beta, bitacora_actual, recuperados = resultado
+    fijar_modelo(alpha, beta)
+    if df_datos.empty:
+        tabla.limpiar()
+    else:
+        tabla.cargar_df(df_datos, cols, tabla_virtual.FORMATOS_MODELO_B)
+    sugerir_siguientes_datos()
+    if varias_series(df_datos):
+        messagebox.showinfo("Varias Regiones", AVISO_REGIONES)
+    if recuperados:
+        messagebox.showinfo("Cambios Recuperados", f"Se recuperaron {recuperados} cambios no guardados de la sesión anterior.")
+
+def aplicar_cambio(op):
+    """
+    Aplica un alta/edición/baja en memoria y la registra en la bitácora.
+    Devuelve (fila, filas agregadas) para refrescar solo esa parte de la tabla.
+    """
     global df_datos
+    cambio = bitacora.posicion_operacion(df_datos, op)
+    df_datos = bitacora.aplicar_operacion(df_datos, op)
+    if bitacora_actual is not None:
+        try:
+            bitacora_actual.registrar(op)
+        except OSError as e:
+            messagebox.showwarning("Aviso", f"No se pudo escribir la bitácora de cambios:\n{e}\n\nSe guardará el libro completo.")
+            guardar_excel(df_datos)
+    return cambio
+
+def guardar_cambios(cambio=None):
+    """Refresca el modelo; el libro se reescribe en segundo plano cada UMBRAL_COMPACTACION cambios."""
+    global df_datos, bitacora_actual
     if df_datos is None:
         return
-    df_datos = df_datos.sort_values(by=utilidades.COL_PERIODO).reset_index(drop=True)
-    df_datos[utilidades.COL_INDICE_PREV] = df_datos[utilidades.COL_INDICE].shift(1)
-    guardar_excel(df_datos)
-    actualizar_tabla_ui()
+    df_datos[utilidades.COL_INDICE_PREV] = utilidades.indice_previo(df_datos)
+    if bitacora_actual is None:
+        # Aún no hay libro: se pide la ruta y a partir de ahí se usa la bitácora
+        guardar_excel(df_datos)
+        if RUTA_EXCEL:
+            bitacora_actual = bitacora.Bitacora(RUTA_EXCEL)
+            bitacora_actual.descartar()  # El libro recién escrito ya lo incluye todo
+    elif bitacora_actual.pendientes >= UMBRAL_COMPACTACION:
+        bitacora_actual.compactar(df_datos, escribir_libro)
+    actualizar_tabla_ui(cambio)
+
+def guardar_archivo():
+    """Guardado explícito: escribe el libro con todos los cambios y vacía la bitácora."""
+    if df_datos is None:
+        return
+    if bitacora_actual is None:
+        guardar_cambios()
+        return
+    try:
+        bitacora_actual.compactar(df_datos, escribir_libro, en_segundo_plano=False)
+        messagebox.showinfo("Guardado", f"Datos guardados en:\n{RUTA_EXCEL}")
+    except PermissionError:
+        messagebox.showerror("Error de Permiso", f"No se pudo guardar el archivo.\n\nPARECE QUE TIENES EL EXCEL ABIERTO.\nCierra el archivo '{os.path.basename(RUTA_EXCEL)}' y vuelve a intentarlo.\n\nTus cambios siguen a salvo en la bitácora.")
+    except Exception as e:
+        messagebox.showerror("Error", f"No se pudo guardar:\n{e}")
+
+def cerrar():
+    """Compacta los cambios pendientes antes de volver al menú."""
+    if bitacora_actual is not None and bitacora_actual.pendientes and df_datos is not None:
+        try:
+            bitacora_actual.compactar(df_datos, escribir_libro, en_segundo_plano=False)
+        except Exception as e:
+            if not messagebox.askyesno("Aviso", f"No se pudo escribir el libro:\n{e}\n\nLos cambios quedan en la bitácora y se recuperarán al abrirlo.\n¿Salir de todos modos?"):
+                return
+    root.destroy()
 
 # ===================== PREDICCIÓN FUTURA =====================
 def predecir_siguiente():
@@ -172,7 +231,7 @@ def predecir_siguiente():
         messagebox.showwarning("Aviso", "No hay datos suficientes.")
         return
     if not modelo_listo:
-        messagebox.showwarning("Aviso", "Se necesitan al menos 3 semanas para el modelo.")
+        avisar_sin_modelo()
         return
 
     last_row = df_datos.iloc[-1]
@@ -190,17 +249,81 @@ def predecir_siguiente():
             f"• Tendencia del Índice Google: {delta_ind_next:+.2f}\n\n"
             f"RESULTADOS DEL MODELO B:\n"
             f"🟢 Estimado SIN intercepto:  {pred_sin:.2f} casos\n"
-            f"🔵 Estimado CON intercepto:  {pred_con:.2f} casos\n"
+            f"🔵 Estimado CON intercepto:  {pred_con:.2f} casos\n\n"
         )
+        mensaje += "\n".join(utilidades.texto_intervalos(utilidades.intervalos_siguiente(df_datos)))
         messagebox.showinfo("Predicción Futura", mensaje)
     except Exception as e:
         messagebox.showerror("Error de Cálculo", f"No se pudo predecir: {e}")
 
+# ===================== PROYECCIÓN A VARIAS SEMANAS =====================
+def mostrar_proyeccion():
+    """Proyecta varias semanas bajo persistencia, tendencia y escenarios del índice."""
+    if df_datos is None or df_datos.empty:
+        messagebox.showwarning("Aviso", "No hay datos cargados.")
+        return
+    if not modelo_listo:
+        avisar_sin_modelo()
+        return
+    horizonte = simpledialog.askinteger("Proyección", "¿Cuántas semanas proyectar?", parent=root,
+                                        initialvalue=utilidades.HORIZONTE_PROYECCION, minvalue=1, maxvalue=104)
+    if not horizonte:
+        return
+    tabla_proy, _ = utilidades.proyectar_modelo_b(df_datos, horizonte)
+    if tabla_proy is None:
+        messagebox.showwarning("Aviso", "No se pudo ajustar el modelo con los datos actuales.")
+        return
+
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+    from matplotlib.figure import Figure
+
+    top = tk.Toplevel(root)
+    top.title(f"Proyección a {horizonte} semanas (Modelo B)")
+    top.geometry("1000x750")
+    estilos.aplicar_tema(top)
+
+    fig = Figure(figsize=(9, 4.5), dpi=100)
+    ax = fig.add_subplot(111)
+    recientes = df_datos.tail(max(3 * horizonte, 12))
+    fechas = tabla_proy[utilidades.COL_PERIODO]
+    ax.plot(recientes[utilidades.COL_PERIODO], recientes[utilidades.COL_CASOS], marker="o", markersize=3, color="blue", label="Reales")
+    ax.fill_between(fechas, tabla_proy["escenarios_p5"], tabla_proy["escenarios_p95"], color="purple", alpha=0.2,
+                    label=f"Escenarios del índice (5-95%, {utilidades.ESCENARIOS_PROYECCION:,})")
+    ax.plot(fechas, tabla_proy["escenarios_p50"], color="purple", label="Mediana de escenarios")
+    ax.plot(fechas, tabla_proy["pred_persistencia"], linestyle="--", color="green", label="Índice sin cambio")
+    ax.plot(fechas, tabla_proy["pred_tendencia"], linestyle=":", color="orange", label="Índice con tendencia")
+    ax.set_title("Proyección con intercepto")
+    ax.set_xlabel("Fecha")
+    ax.set_ylabel("Casos")
+    ax.legend(fontsize=8)
+    ax.grid(True, linestyle=":", alpha=0.6)
+    fig.autofmt_xdate()
+
+    canvas = FigureCanvasTkAgg(fig, master=top)
+    canvas.draw()
+    canvas.get_tk_widget().pack(fill="both", expand=True)
+    toolbar = NavigationToolbar2Tk(canvas, top)
+    toolbar.update()
+
+    cols_proy = [utilidades.COL_SEMANA, utilidades.COL_PERIODO, "pred_persistencia", "pred_tendencia", "escenarios_p5", "escenarios_p50", "escenarios_p95"]
+    titulos = {"pred_persistencia": "Índice sin cambio", "pred_tendencia": "Índice con tendencia",
+               "escenarios_p5": "Escenarios 5%", "escenarios_p50": "Mediana", "escenarios_p95": "Escenarios 95%"}
+    tabla_vista = tabla_virtual.TablaVirtual(top, cols_proy, titulos=titulos, ancho=120)
+    tabla_vista.pack(fill="x", padx=20, pady=10)
+    tabla_vista.cargar_df(tabla_proy, cols_proy, [tabla_virtual.fmt_texto, tabla_virtual.fmt_fecha] + [tabla_virtual.fmt_decimal(2)] * 5)
+
 # ===================== GRÁFICA DE SERIE =====================
 def mostrar_grafica_serie():
     if df_datos is None or df_datos.empty:
         messagebox.showwarning("Aviso", "No hay datos cargados.")
         return
+    if varias_series(df_datos):
+        messagebox.showwarning("Aviso", AVISO_REGIONES)
+        return
+    # matplotlib se importa hasta la primera gráfica (arranque más rápido)
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+    from matplotlib.figure import Figure
+    import graficas
 
     top = tk.Toplevel(root)
     top.title("Serie Temporal: Reales vs Estimados")
@@ -227,77 +350,27 @@ def mostrar_grafica_serie():
     # Formato de fecha en eje X
     fig.autofmt_xdate()
 
-    # --- ELEMENTOS INTERACTIVOS (Cursor y Tooltip) ---
-    # Línea vertical que sigue al mouse
-    cursor_line = ax.axvline(x=fechas.iloc[0], color='gray', linestyle='--', alpha=0.5)
-    cursor_line.set_visible(False)
-
-    # Texto flotante (Tooltip)
-    annot = ax.annotate("", xy=(0,0), xytext=(10,10), textcoords="offset points",
-                        bbox=dict(boxstyle="round", fc="w", alpha=0.9),
-                        arrowprops=dict(arrowstyle="->"))
-    annot.set_visible(False)
-
-    def update_annot(ind):
-        # Obtener la fecha (x) y casos (y) del punto más cercano
-        x = fechas.iloc[ind]
-        y = df_datos[utilidades.COL_CASOS].iloc[ind]
-        
-        # Mover la anotación
-        annot.xy = (x, y)
-        
-        # Texto del tooltip
-        semana = df_datos[utilidades.COL_SEMANA].iloc[ind]
-        est_sin = df_datos[utilidades.COL_EST_SIN].iloc[ind]
-        est_con = df_datos[utilidades.COL_EST_CON].iloc[ind]
-        
-        text = (f"Semana: {semana}\n"
-                f"Fecha: {x.strftime('%d/%m/%Y')}\n"
-                f"Reales: {y}\n"
-                f"Sin Int: {est_sin:.2f}\n"
-                f"Con Int: {est_con:.2f}")
-        
-        annot.set_text(text)
-        annot.get_bbox_patch().set_alpha(0.9)
-
-    def hover(event):
-        vis = annot.get_visible()
-        if event.inaxes == ax:
-            # Encontrar el índice de la fecha más cercana
-            # Convertimos las fechas a números de matplotlib para comparar
-            import matplotlib.dates as mdates
-            x_mouse = event.xdata
-            if x_mouse is None: return
-            
-            # Buscar el índice más cercano en el dataframe
-            # (Asumiendo que las fechas están ordenadas)
-            try:
-                # Convertir la columna de fechas a números float de matplotlib
-                x_dates = mdates.date2num(fechas)
-                # Encontrar el índice del valor más cercano
-                ind = (np.abs(x_dates - x_mouse)).argmin()
-                
-                # Actualizar línea vertical
-                cursor_line.set_xdata([fechas.iloc[ind]])
-                cursor_line.set_visible(True)
-                
-                # Actualizar tooltip
-                update_annot(ind)
-                annot.set_visible(True)
-                fig.canvas.draw_idle()
-            except Exception:
-                pass
-        else:
-            if vis:
-                annot.set_visible(False)
-                cursor_line.set_visible(False)
-                fig.canvas.draw_idle()
-
-    # Conectar evento
-    fig.canvas.mpl_connect("motion_notify_event", hover)
-
     # --- CANVAS Y TOOLBAR ---
     canvas = FigureCanvasTkAgg(fig, master=top)
+
+    # --- ELEMENTOS INTERACTIVOS (Cursor y Tooltip) ---
+    # Columnas extraídas una vez; el cursor solo indexa en cada movimiento
+    semanas = df_datos[utilidades.COL_SEMANA].to_numpy()
+    casos = df_datos[utilidades.COL_CASOS].to_numpy()
+    est_sin = df_datos[utilidades.COL_EST_SIN].to_numpy()
+    est_con = df_datos[utilidades.COL_EST_CON].to_numpy()
+
+    def texto_tooltip(ind):
+        return (f"Semana: {semanas[ind]}\n"
+                f"Fecha: {fechas.iloc[ind].strftime('%d/%m/%Y')}\n"
+                f"Reales: {casos[ind]}\n"
+                f"Sin Int: {est_sin[ind]:.2f}\n"
+                f"Con Int: {est_con[ind]:.2f}")
+
+    # matplotlib guarda referencias débiles a los callbacks: se conservan en la ventana
+    top.cursor = graficas.CursorSerie(ax, fechas, casos, texto_tooltip)
+    # Series largas: solo mínimo y máximo por píxel, recalculado al hacer zoom/pan
+    top.lod = graficas.LineasLOD(ax, fechas, [(line_real, casos), (line_sin, est_sin), (line_con, est_con)])
     canvas.draw()
     canvas.get_tk_widget().pack(fill="both", expand=True)
     
@@ -306,22 +379,76 @@ def mostrar_grafica_serie():
     toolbar.update()
     canvas.get_tk_widget().pack(fill="both", expand=True)
 
+# ===================== MODELO B POR REGIÓN =====================
+def mostrar_resumen_regiones():
+    """Ajusta el Modelo B de todas las regiones/términos a la vez y los muestra en una tabla navegable."""
+    if df_datos is None or df_datos.empty:
+        messagebox.showwarning("Aviso", "No hay datos cargados.")
+        return
+    claves = utilidades.columnas_grupo(df_datos)
+    if not claves:
+        messagebox.showwarning("Aviso", "El archivo no tiene columna de región (Estado / Entidad / Region).\n\nUsa formato largo: una fila por región y semana.")
+        return
+
+    df_reg, resumen = utilidades.calcular_modelo_b_por_region(df_datos)
+
+    top = tk.Toplevel(root)
+    top.title("Modelo B por Región")
+    top.geometry("1100x700")
+    estilos.aplicar_tema(top)
+    tk.Label(top, text=f"Modelo B de {len(resumen)} grupos ({' / '.join(claves)})", font=estilos.FONT_H3, bg=estilos.COLOR_FONDO, fg=estilos.COLOR_TEXTO).pack(pady=10)
+
+    # Resumen: una fila por grupo (TablaVirtual: solo se formatean las filas visibles)
+    cols_res = claves + ["filas", "alpha", "beta", "semana_siguiente", "pred_sin_int", "pred_con_int"]
+    titulos = {"filas": "Semanas", "alpha": "Alpha", "beta": "Beta", "semana_siguiente": "Sig. Semana", "pred_sin_int": "Pred. SIN Int", "pred_con_int": "Pred. CON Int"}
+    tabla_res = tabla_virtual.TablaVirtual(top, cols_res, titulos=titulos, ancho=110)
+    tabla_res.pack(fill="both", expand=True, padx=20, pady=5)
+    tabla_res.cargar_df(resumen, cols_res, [tabla_virtual.fmt_texto] * (len(claves) + 1) + [
+        tabla_virtual.fmt_decimal(4, si_nan="-"), tabla_virtual.fmt_decimal(4, si_nan="-"),
+        tabla_virtual.fmt_decimal(0, si_nan="-"), tabla_virtual.fmt_decimal(2, si_nan="-"), tabla_virtual.fmt_decimal(2, si_nan="-")
+    ])
+
+    # Detalle del grupo seleccionado: df_reg viene ordenado por grupo, así que
+    # cada uno es un tramo contiguo de filas
+    grupos = df_reg.groupby(claves, sort=True, dropna=False, observed=True).ngroup().to_numpy()
+    limites = np.searchsorted(grupos, np.arange(len(resumen) + 1))
+    tabla_det = tabla_virtual.TablaVirtual(top, cols, titulos=TITULOS_TABLA)
+    tabla_det.pack(fill="both", expand=True, padx=20, pady=5)
+
+    def on_select_region(event):
+        sel = tabla_res.selection()
+        if not sel:
+            return
+        i = int(sel[0])
+        tabla_det.cargar_df(df_reg.iloc[limites[i]:limites[i + 1]], cols, tabla_virtual.FORMATOS_MODELO_B)
+    tabla_res.bind("<<TreeviewSelect>>", on_select_region)
+
+    def exportar():
+        ruta = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel", "*.xlsx")], title="Exportar Modelo B por Región")
+        if not ruta:
+            return
+        try:
+            with pd.ExcelWriter(ruta) as writer:
+                utilidades.para_archivo(resumen).to_excel(writer, sheet_name="Resumen", index=False)
+                utilidades.para_archivo(df_reg).to_excel(writer, sheet_name="Estimaciones", index=False)
+            messagebox.showinfo("Exportado", f"Resultados guardados en:\n{ruta}")
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+
+    estilos.crear_boton(top, "Exportar Resultados a Excel", exportar, tipo="success", width=30).pack(pady=10)
+
 # ===================== CRUD =====================
 def agregar_registro():
     global df_datos
     try:
-        sem = ent_semana.get().strip()
+        if ent_semana.get().strip() == "":
+            return
+        sem = int(ent_semana.get().strip())
         fecha = pd.Timestamp(ent_fecha.get_date())
         ind = float(ent_indice.get().strip())
         casos = float(ent_casos.get().strip())
-        if sem == "":
-            return
         nueva = {utilidades.COL_SEMANA: sem, utilidades.COL_PERIODO: fecha, utilidades.COL_INDICE: ind, utilidades.COL_INDICE_PREV: 0, utilidades.COL_CASOS: casos}
-        if df_datos is None:
-            df_datos = pd.DataFrame([nueva])
-        else:
-            df_datos = pd.concat([df_datos, pd.DataFrame([nueva])], ignore_index=True)
-        guardar_cambios()
+        guardar_cambios(aplicar_cambio(bitacora.op_alta(nueva)))
         limpiar_formulario()
     except ValueError:
         messagebox.showerror("Error", "Números inválidos.")
@@ -333,11 +460,13 @@ def actualizar_registro():
         return
     try:
         idx = int(sel[0])
-        df_datos.at[idx, utilidades.COL_SEMANA] = ent_semana.get().strip()
-        df_datos.at[idx, utilidades.COL_PERIODO] = pd.Timestamp(ent_fecha.get_date())
-        df_datos.at[idx, utilidades.COL_INDICE] = float(ent_indice.get().strip())
-        df_datos.at[idx, utilidades.COL_CASOS] = float(ent_casos.get().strip())
-        guardar_cambios()
+        cambio = aplicar_cambio(bitacora.op_edicion(idx, {
+            utilidades.COL_SEMANA: int(ent_semana.get().strip()),
+            utilidades.COL_PERIODO: pd.Timestamp(ent_fecha.get_date()),
+            utilidades.COL_INDICE: float(ent_indice.get().strip()),
+            utilidades.COL_CASOS: float(ent_casos.get().strip())
+        }))
+        guardar_cambios(cambio)
         limpiar_formulario()
     except ValueError:
         messagebox.showerror("Error", "Datos inválidos.")
@@ -349,8 +478,7 @@ def eliminar_registro():
         return
     if messagebox.askyesno("Confirmar", "¿Eliminar?"):
         idx = int(sel[0])
-        df_datos = df_datos.drop(df_datos.index[idx]).reset_index(drop=True)
-        guardar_cambios()
+        guardar_cambios(aplicar_cambio(bitacora.op_baja(idx)))
         limpiar_formulario()
 
 def sugerir_siguientes_datos():
@@ -384,27 +512,21 @@ def limpiar_formulario():
     sugerir_siguientes_datos()
 
 # ===================== UI =====================
-def actualizar_tabla_ui():
+def actualizar_tabla_ui(cambio=None):
+    """Tras un alta/edición/baja (cambio) conserva el desplazamiento y solo repinta lo que cambió."""
     global df_datos
-    for row in tabla.get_children():
-        tabla.delete(row)
     if df_datos is None or df_datos.empty:
+        tabla.limpiar()
         return
 
-    df_datos[utilidades.COL_INDICE_PREV] = df_datos[utilidades.COL_INDICE].shift(1)
+    df_datos[utilidades.COL_INDICE_PREV] = utilidades.indice_previo(df_datos)
     df_datos = calcular_modelo_b_completo(df_datos)
 
-    for i, row in df_datos.iterrows():
-        fecha_str = row[utilidades.COL_PERIODO].strftime('%d/%m/%Y') if isinstance(row[utilidades.COL_PERIODO], pd.Timestamp) else str(row[utilidades.COL_PERIODO])
-        ind_t1 = row.get(utilidades.COL_INDICE_PREV, 0)
-        ind_t1_str = f"{ind_t1:.1f}" if pd.notna(ind_t1) else "0.0"
-        est_sin = row.get(utilidades.COL_EST_SIN, 0)
-        est_con = row.get(utilidades.COL_EST_CON, 0)
-        str_sin = f"{est_sin:.2f}" if est_sin != 0 else "-"
-        str_con = f"{est_con:.2f}" if est_con != 0 else "-"
-        tabla.insert("", tk.END, iid=str(i), values=[
-            row[utilidades.COL_SEMANA], fecha_str, row[utilidades.COL_INDICE], ind_t1_str, row[utilidades.COL_CASOS], str_sin, str_con
-        ])
+    # Solo se formatean las filas visibles
+    if cambio is None:
+        tabla.cargar_df(df_datos, cols, tabla_virtual.FORMATOS_MODELO_B)
+    else:
+        tabla.actualizar_df(df_datos, cols, tabla_virtual.FORMATOS_MODELO_B, cambio)
 
 def on_select(event):
     sel = tabla.selection()
@@ -423,78 +545,98 @@ def on_select(event):
     ent_casos.delete(0, tk.END); ent_casos.insert(0, str(row[utilidades.COL_CASOS]))
 
 # ===================== GUI SETUP =====================
-root = tk.Tk()
-root.title("Gestor de Datos + Modelo B (Completo)")
-root.state('zoomed')
-estilos.aplicar_tema(root)
-
-# Header
-frame_header = tk.Frame(root, bg=estilos.COLOR_FONDO)
-frame_header.pack(fill="x", pady=20)
-tk.Label(frame_header, text="ADMINISTRACIÓN DE DATOS Y PROYECCIONES", font=estilos.FONT_H1, bg=estilos.COLOR_FONDO, fg=estilos.COLOR_TEXTO).pack()
-
-estilos.crear_boton(frame_header, "⬅ Volver al Menú", root.destroy, tipo="secondary", width=20).pack(anchor="nw", padx=20)
-
-# Input Card
-card_input = estilos.crear_card(root)
-card_input.pack(fill="x", padx=20, pady=10)
-estilos.crear_label_subtitulo(card_input, "Datos Semanales", bg=estilos.COLOR_PANEL).pack(anchor="w", pady=(0, 10))
-
-frame_form = tk.Frame(card_input, bg=estilos.COLOR_PANEL)
-frame_form.pack(fill="x")
-
-tk.Label(frame_form, text="Semana:", bg=estilos.COLOR_PANEL, fg="white", font=estilos.FONT_BODY).grid(row=0, column=0, padx=5)
-ent_semana = tk.Entry(frame_form, width=10, font=estilos.FONT_BODY); ent_semana.grid(row=0, column=1, padx=5)
-
-tk.Label(frame_form, text="Fecha:", bg=estilos.COLOR_PANEL, fg="white", font=estilos.FONT_BODY).grid(row=0, column=2, padx=5)
-ent_fecha = DateEntry(frame_form, width=12, date_pattern='dd/mm/y', background=estilos.COLOR_ACCENT, foreground='white')
-ent_fecha.grid(row=0, column=3, padx=5)
-
-tk.Label(frame_form, text="Índice (t):", bg=estilos.COLOR_PANEL, fg="white", font=estilos.FONT_BODY).grid(row=0, column=4, padx=5)
-ent_indice = tk.Entry(frame_form, width=10, font=estilos.FONT_BODY); ent_indice.grid(row=0, column=5, padx=5)
-
-tk.Label(frame_form, text="Casos Reales:", bg=estilos.COLOR_PANEL, fg="white", font=estilos.FONT_BODY).grid(row=0, column=6, padx=5)
-ent_casos = tk.Entry(frame_form, width=10, font=estilos.FONT_BODY); ent_casos.grid(row=0, column=7, padx=5)
-
-# Actions
-frame_actions = tk.Frame(card_input, bg=estilos.COLOR_PANEL)
-frame_actions.pack(pady=15)
-estilos.crear_boton(frame_actions, "💾 AGREGAR", agregar_registro, tipo="success", width=15).pack(side="left", padx=5)
-estilos.crear_boton(frame_actions, "✏ EDITAR", actualizar_registro, tipo="warning", width=15).pack(side="left", padx=5)
-estilos.crear_boton(frame_actions, "🗑 BORRAR", eliminar_registro, tipo="danger", width=15).pack(side="left", padx=5)
-estilos.crear_boton(frame_actions, "LIMPIAR", limpiar_formulario, tipo="secondary", width=15).pack(side="left", padx=5)
-
-# Prediction Card
-card_pred = estilos.crear_card(root)
-card_pred.pack(fill="x", padx=20, pady=5)
-estilos.crear_label_subtitulo(card_pred, "Predicciones", bg=estilos.COLOR_PANEL).pack(anchor="w", pady=(0, 10))
-
-frame_pred_actions = tk.Frame(card_pred, bg=estilos.COLOR_PANEL)
-frame_pred_actions.pack(pady=5)
-
-estilos.crear_boton(frame_pred_actions, "🔮 PREDECIR SIGUIENTE SEMANA", predecir_siguiente, tipo="info", width=30).pack(side="left", padx=10)
-estilos.crear_boton(frame_pred_actions, "📈 Gráfica Reales vs Estimados", mostrar_grafica_serie, tipo="primary", width=30).pack(side="left", padx=10)
-
-# Table
-frame_table = tk.Frame(root, bg=estilos.COLOR_FONDO)
-frame_table.pack(fill="both", expand=True, padx=20, pady=10)
-
-cols = [utilidades.COL_SEMANA, utilidades.COL_PERIODO, utilidades.COL_INDICE, utilidades.COL_INDICE_PREV, utilidades.COL_CASOS, utilidades.COL_EST_SIN, utilidades.COL_EST_CON]
-scroll = ttk.Scrollbar(frame_table, orient="vertical")
-tabla = ttk.Treeview(frame_table, columns=cols, show="headings", yscrollcommand=scroll.set)
-scroll.config(command=tabla.yview); scroll.pack(side="right", fill="y")
-tabla.pack(side="left", fill="both", expand=True)
-
-tabla.heading(utilidades.COL_SEMANA, text="Semana")
-tabla.heading(utilidades.COL_PERIODO, text="Fecha")
-tabla.heading(utilidades.COL_INDICE, text="Índice (t)")
-tabla.heading(utilidades.COL_INDICE_PREV, text="Índice (t-1)")
-tabla.heading(utilidades.COL_CASOS, text="Casos")
-tabla.heading(utilidades.COL_EST_SIN, text="Est. SIN Intercepto")
-tabla.heading(utilidades.COL_EST_CON, text="Est. CON Intercepto")
-for c in cols:
-    tabla.column(c, width=100, anchor="center")
-tabla.bind("<<TreeviewSelect>>", on_select)
-
-cargar_datos()
-root.mainloop()
+def construir_interfaz(ventana):
+    """Construye la interfaz dentro de ventana (Tk propia o Toplevel del menú)."""
+    global root, ent_semana, ent_fecha, ent_indice, ent_casos, cols, tabla, panel_progreso
+    root = ventana
+    root.title("Gestor de Datos + Modelo B (Completo)")
+    root.state('zoomed')
+    estilos.aplicar_tema(root)
+
+    # Header
+    frame_header = tk.Frame(root, bg=estilos.COLOR_FONDO)
+    frame_header.pack(fill="x", pady=20)
+    tk.Label(frame_header, text="ADMINISTRACIÓN DE DATOS Y PROYECCIONES", font=estilos.FONT_H1, bg=estilos.COLOR_FONDO, fg=estilos.COLOR_TEXTO).pack()
+
+    estilos.crear_boton(frame_header, "⬅ Volver al Menú", cerrar, tipo="secondary", width=20).pack(anchor="nw", padx=20)
+    root.protocol("WM_DELETE_WINDOW", cerrar)
+
+    # Avance de la carga del libro (se lee y ajusta en segundo plano)
+    panel_progreso = tareas.PanelProgreso(frame_header)
+    panel_progreso.pack()
+
+    # Input Card
+    card_input = estilos.crear_card(root)
+    card_input.pack(fill="x", padx=20, pady=10)
+    estilos.crear_label_subtitulo(card_input, "Datos Semanales", bg=estilos.COLOR_PANEL).pack(anchor="w", pady=(0, 10))
+
+    frame_form = tk.Frame(card_input, bg=estilos.COLOR_PANEL)
+    frame_form.pack(fill="x")
+
+    tk.Label(frame_form, text="Semana:", bg=estilos.COLOR_PANEL, fg="white", font=estilos.FONT_BODY).grid(row=0, column=0, padx=5)
+    ent_semana = tk.Entry(frame_form, width=10, font=estilos.FONT_BODY); ent_semana.grid(row=0, column=1, padx=5)
+
+    tk.Label(frame_form, text="Fecha:", bg=estilos.COLOR_PANEL, fg="white", font=estilos.FONT_BODY).grid(row=0, column=2, padx=5)
+    ent_fecha = DateEntry(frame_form, width=12, date_pattern='dd/mm/y', background=estilos.COLOR_ACCENT, foreground='white')
+    ent_fecha.grid(row=0, column=3, padx=5)
+
+    tk.Label(frame_form, text="Índice (t):", bg=estilos.COLOR_PANEL, fg="white", font=estilos.FONT_BODY).grid(row=0, column=4, padx=5)
+    ent_indice = tk.Entry(frame_form, width=10, font=estilos.FONT_BODY); ent_indice.grid(row=0, column=5, padx=5)
+
+    tk.Label(frame_form, text="Casos Reales:", bg=estilos.COLOR_PANEL, fg="white", font=estilos.FONT_BODY).grid(row=0, column=6, padx=5)
+    ent_casos = tk.Entry(frame_form, width=10, font=estilos.FONT_BODY); ent_casos.grid(row=0, column=7, padx=5)
+
+    # Actions
+    frame_actions = tk.Frame(card_input, bg=estilos.COLOR_PANEL)
+    frame_actions.pack(pady=15)
+    estilos.crear_boton(frame_actions, "💾 AGREGAR", agregar_registro, tipo="success", width=15).pack(side="left", padx=5)
+    estilos.crear_boton(frame_actions, "✏ EDITAR", actualizar_registro, tipo="warning", width=15).pack(side="left", padx=5)
+    estilos.crear_boton(frame_actions, "🗑 BORRAR", eliminar_registro, tipo="danger", width=15).pack(side="left", padx=5)
+    estilos.crear_boton(frame_actions, "LIMPIAR", limpiar_formulario, tipo="secondary", width=15).pack(side="left", padx=5)
+    estilos.crear_boton(frame_actions, "💾 GUARDAR ARCHIVO", guardar_archivo, tipo="info", width=20).pack(side="left", padx=20)
+
+    # Prediction Card
+    card_pred = estilos.crear_card(root)
+    card_pred.pack(fill="x", padx=20, pady=5)
+    estilos.crear_label_subtitulo(card_pred, "Predicciones", bg=estilos.COLOR_PANEL).pack(anchor="w", pady=(0, 10))
+
+    frame_pred_actions = tk.Frame(card_pred, bg=estilos.COLOR_PANEL)
+    frame_pred_actions.pack(pady=5)
+
+    estilos.crear_boton(frame_pred_actions, "🔮 PREDECIR SIGUIENTE SEMANA", predecir_siguiente, tipo="info", width=30).pack(side="left", padx=10)
+    estilos.crear_boton(frame_pred_actions, "📈 Gráfica Reales vs Estimados", mostrar_grafica_serie, tipo="primary", width=30).pack(side="left", padx=10)
+    estilos.crear_boton(frame_pred_actions, "📅 Proyección Varias Semanas", mostrar_proyeccion, tipo="info", width=30).pack(side="left", padx=10)
+    estilos.crear_boton(frame_pred_actions, "🗺 Modelo B por Región", mostrar_resumen_regiones, tipo="secondary", width=30).pack(side="left", padx=10)
+
+    # Table
+    frame_table = tk.Frame(root, bg=estilos.COLOR_FONDO)
+    frame_table.pack(fill="both", expand=True, padx=20, pady=10)
+
+    cols = [utilidades.COL_SEMANA, utilidades.COL_PERIODO, utilidades.COL_INDICE, utilidades.COL_INDICE_PREV, utilidades.COL_CASOS, utilidades.COL_EST_SIN, utilidades.COL_EST_CON]
+    tabla = tabla_virtual.TablaVirtual(frame_table, cols, titulos=TITULOS_TABLA)
+    tabla.pack(fill="both", expand=True)
+    tabla.bind("<<TreeviewSelect>>", on_select)
+
+    cargar_datos()
+
+def abrir(maestro=None, ruta_excel=None):
+    """
+    Abre el Modelo B. Con maestro se crea como Toplevel del menú (mismo
+    proceso); si ya está abierta con el mismo archivo solo se trae al frente.
+    """
+    global RUTA_EXCEL
+    if root is not None and root.winfo_exists():
+        if not ruta_excel or ruta_excel == RUTA_EXCEL:
+            estilos.traer_al_frente(root)
+            return root
+        cerrar()  # Compacta la bitácora del libro anterior
+        if root.winfo_exists():
+            return root
+    if ruta_excel:
+        RUTA_EXCEL = ruta_excel
+    construir_interfaz(estilos.crear_ventana(maestro))
+    return root
+
+if __name__ == "__main__":
+    RUTA_EXCEL = sys.argv[1] if len(sys.argv) > 1 else None
+    abrir().mainloop()
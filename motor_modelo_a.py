@@ -0,0 +1,123 @@
+import numpy as np
+
+# ===================== MOTOR NUMÉRICO DEL MODELO A =====================
+# Correlación entre el índice de Google y los casos más allá del único
+# retraso fijo (Indice_t_1) del Modelo A. Igual que motor_modelo_b, todo se
+# calcula sobre arreglos completos; los faltantes (NaN) se excluyen por pares.
+
+def _con_mascara(valores):
+    """(valores con NaN -> 0, máscara de válidos como float)."""
+    valores = np.asarray(valores, dtype=np.float64)
+    validos = ~np.isnan(valores)
+    return np.where(validos, valores, 0.0), validos.astype(np.float64)
+
+def _pearson_desde_sumas(n, sx, sy, sxx, syy, sxy, minimo=3):
+    """r de Pearson a partir de sumas (escalares o arreglos); NaN con menos de `minimo` pares."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = n * sxy - sx * sy
+        var_x = n * sxx - sx * sx
+        var_y = n * syy - sy * sy
+        r = cov / np.sqrt(var_x * var_y)
+    r = np.where((n >= minimo) & (var_x > 0) & (var_y > 0), r, np.nan)
+    return np.clip(r, -1.0, 1.0)
+
+# ===================== CORRELACIÓN CRUZADA (FFT) =====================
+def _separar_grupos(valores, grupos, hueco):
+    """Intercala `hueco` NaN entre grupos contiguos: ningún retraso ≤ hueco empareja dos grupos."""
+    cortes = np.flatnonzero(np.diff(grupos)) + 1
+    return np.insert(valores, np.repeat(cortes, hueco), np.nan)
+
+def correlacion_cruzada(indice, casos, retraso_max=52, grupos=None):
+    """
+    r de Pearson entre Casos[t] e Indice[t - k] para cada retraso k en
+    -retraso_max..+retraso_max (k > 0: el índice se adelanta k semanas a los
+    casos; el Modelo A usa k = 1). Los pares con NaN se omiten en cada retraso.
+    Con grupos (códigos contiguos, filas ordenadas por grupo y fecha) solo se
+    emparejan semanas del mismo grupo y las sumas de todos se agregan.
+
+    Las seis sumas por retraso (n, Σx, Σy, Σx², Σy², Σxy sobre la parte que se
+    traslapa) son correlaciones cruzadas de las series y sus máscaras, así que
+    salen de unas cuantas FFT: O(n log n) para todos los retrasos.
+    Devuelve (retrasos, r, n_pares).
+    """
+    indice = np.asarray(indice, dtype=float)
+    casos = np.asarray(casos, dtype=float)
+    largo_serie = len(casos)
+    if grupos is not None and len(grupos):
+        grupos = np.asarray(grupos)
+        largo_serie = int(np.diff(np.flatnonzero(np.r_[True, grupos[1:] != grupos[:-1], True])).max())
+    retraso_max = int(min(retraso_max, max(largo_serie - 1, 0)))
+    retrasos = np.arange(-retraso_max, retraso_max + 1)
+    if grupos is not None and len(grupos):
+        indice = _separar_grupos(indice, grupos, retraso_max)
+        casos = _separar_grupos(casos, grupos, retraso_max)
+    x, mx = _con_mascara(indice)
+    y, my = _con_mascara(casos)
+    n = len(y)
+    if n == 0:
+        return retrasos, np.full(len(retrasos), np.nan), np.zeros(len(retrasos), dtype=np.int64)
+
+    # Centrar evita la cancelación de n·Σx² - (Σx)² con valores grandes
+    x = np.where(mx > 0, x - x.sum() / max(mx.sum(), 1), 0.0)
+    y = np.where(my > 0, y - y.sum() / max(my.sum(), 1), 0.0)
+
+    largo = 1 << int(np.ceil(np.log2(2 * n)))
+    fx = {nombre: np.fft.rfft(v, largo) for nombre, v in (("m", mx), ("x", x), ("xx", x * x))}
+    fy = {nombre: np.fft.rfft(v, largo) for nombre, v in (("m", my), ("y", y), ("yy", y * y))}
+
+    def cruzada(a, b):
+        # Σ_t a[t]·b[t-k], con los k negativos al final del arreglo circular
+        return np.fft.irfft(fy[a] * np.conj(fx[b]), largo)[retrasos % largo]
+
+    pares = np.rint(cruzada("m", "m")).astype(np.int64)
+    r = _pearson_desde_sumas(pares, cruzada("m", "x"), cruzada("y", "m"),
+                             cruzada("m", "xx"), cruzada("yy", "m"), cruzada("y", "x"))
+    return retrasos, r, pares
+
+def mejor_retraso(r, pares, min_pares=10):
+    """
+    Posición del retraso con mayor |r| entre los que tienen al menos
+    min_pares pares (en los extremos quedan pocos y r es poco confiable).
+    None si ninguno califica.
+    """
+    candidatos = np.where(np.asarray(pares) >= min_pares, np.abs(r), np.nan)
+    if np.isnan(candidatos).all():
+        return None
+    return int(np.nanargmax(candidatos))
+
+# ===================== CORRELACIÓN MÓVIL =====================
+def inicio_de_grupo(grupos):
+    """Posición de la primera fila del grupo de cada fila (grupos contiguos, p. ej. ordenados)."""
+    grupos = np.asarray(grupos)
+    cambios = np.ones(len(grupos), dtype=bool)
+    cambios[1:] = grupos[1:] != grupos[:-1]
+    return np.maximum.accumulate(np.where(cambios, np.arange(len(grupos)), 0))
+
+def correlacion_movil(x, y, ventana=None, minimo=3, grupos=None):
+    """
+    r de Pearson de cada fila con las `ventana` filas que terminan en ella
+    (ventana=None: todas las anteriores, es decir, acumulada). Los pares con
+    NaN se omiten; con menos de `minimo` pares en la ventana queda NaN.
+    Con grupos (códigos contiguos, filas ordenadas por grupo y fecha) ninguna
+    ventana cruza al grupo anterior.
+
+    Se usan sumas acumuladas de (1, x, y, x², y², xy): la ventana que termina
+    en i es S[i+1] - S[i+1-ventana], así que toda la serie cuesta O(n).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    validos = ~(np.isnan(x) | np.isnan(y))
+    n = len(x)
+    if not validos.any():
+        return np.full(n, np.nan)
+    # Centrado global: reduce la cancelación en n·Σx² - (Σx)² de cada ventana
+    xc = np.where(validos, x - x[validos].mean(), 0.0)
+    yc = np.where(validos, y - y[validos].mean(), 0.0)
+
+    sumas = np.zeros((6, n + 1))
+    np.cumsum(np.stack([validos.astype(np.float64), xc, yc, xc * xc, yc * yc, xc * yc]), axis=1, out=sumas[:, 1:])
+    fin = np.arange(1, n + 1)
+    primera = np.zeros(n, dtype=np.int64) if grupos is None else inicio_de_grupo(grupos)
+    inicio = primera if ventana is None else np.maximum(fin - int(ventana), primera)
+    tramo = sumas[:, fin] - sumas[:, inicio]
+    return _pearson_desde_sumas(np.rint(tramo[0]), *tramo[1:], minimo=minimo)
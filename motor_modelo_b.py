@@ -0,0 +1,620 @@
+import numpy as np
+import math
+from statistics import NormalDist
+from concurrent.futures import ProcessPoolExecutor
+
+# ===================== MOTOR NUMÉRICO DEL MODELO B =====================
+# Todas las funciones trabajan sobre arreglos completos (sin bucles por fila)
+# para que el costo sea lineal y dominado por NumPy, no por el intérprete.
+
+def _a_arreglo(valores):
+    """Convierte una columna/lista a un arreglo float64 (None -> NaN)."""
+    return np.asarray(valores, dtype=np.float64)
+
+def desplazar(valores, pasos=1):
+    """
+    Equivalente vectorizado de Series.shift(pasos).
+    Acepta arreglos 1-D o pilas 2-D (una serie por fila); desplaza sobre el último eje.
+    """
+    valores = _a_arreglo(valores)
+    res = np.full(valores.shape, np.nan)
+    n = valores.shape[-1]
+    if pasos < n:
+        res[..., pasos:] = valores[..., :n - pasos]
+    return res
+
+def diferenciar(valores):
+    """Equivalente vectorizado de Series.diff() sobre el último eje (1-D o 2-D)."""
+    valores = _a_arreglo(valores)
+    res = np.full(valores.shape, np.nan)
+    if valores.shape[-1] > 1:
+        res[..., 1:] = valores[..., 1:] - valores[..., :-1]
+    return res
+
+def calcular_deltas(indice, casos):
+    """
+    Calcula las variables del Modelo B a partir de las series crudas.
+    Devuelve (indice_prev, delta_indice, delta_casos), donde
+    delta_indice[i] = Indice_t_1[i] - Indice_t_1[i-1] y delta_casos[i] = Casos[i] - Casos[i-1].
+    """
+    indice_prev = desplazar(indice, 1)
+    return indice_prev, diferenciar(indice_prev), diferenciar(casos)
+
+def calcular_estimaciones(indice, casos, alpha, beta):
+    """
+    Reconstruye las columnas Est_Sin_Int y Est_Con_Int de una sola vez.
+    La fila 0 queda en 0.0; si falta alguno de los índices del delta se usa 0
+    (igual que el cálculo original fila por fila).
+    """
+    casos = _a_arreglo(casos)
+    n = len(casos)
+    est_sin = np.zeros(n)
+    est_con = np.zeros(n)
+    if n < 2:
+        return est_sin, est_con
+
+    _, delta_ind, _ = calcular_deltas(indice, casos)
+    delta_ind = np.where(np.isnan(delta_ind), 0.0, delta_ind)
+
+    casos_prev = casos[:-1]
+    tendencia = beta * delta_ind[1:]
+    est_sin[1:] = casos_prev + tendencia
+    est_con[1:] = casos_prev + alpha + tendencia
+    return est_sin, est_con
+
+def pares_modelo_b(indice, casos, desde=0):
+    """
+    Pares válidos (ΔIndice_t_1, ΔCasos) de las filas desde..fin de la serie dada.
+    Cada fila solo depende de ella misma y de las dos anteriores, así que basta
+    pasar un tramo corto (con dos filas de contexto) para recalcular una zona.
+    """
+    _, delta_ind, delta_casos = calcular_deltas(indice, casos)
+    x = delta_ind[desde:]
+    y = delta_casos[desde:]
+    validos = ~(np.isnan(x) | np.isnan(y))
+    return x[validos], y[validos]
+
+def predecir_siguiente(indice, casos, alpha, beta):
+    """
+    Proyección de la semana siguiente a partir de la última fila:
+    Casos + beta·(Indice_t - Indice_t_1) y la misma con intercepto.
+    Devuelve (pred_sin, pred_con, delta_indice).
+    """
+    indice = _a_arreglo(indice)
+    casos = _a_arreglo(casos)
+    delta = indice[-1] - indice[-2] if len(indice) > 1 else np.nan
+    pred_sin = casos[-1] + beta * delta
+    pred_con = casos[-1] + alpha + beta * delta
+    return float(pred_sin), float(pred_con), float(delta)
+
+# ===================== AJUSTE OLS (FORMA CERRADA) =====================
+def coeficientes_desde_sumas(n, sx, sy, sxx, sxy):
+    """
+    Intercepto y pendiente de y = a + b*x a partir de estadísticos suficientes
+    (n, Σx, Σy, Σx², Σxy). Funciona con escalares o arreglos (un ajuste por elemento).
+    Si x no varía la pendiente es 0 (mismo criterio que sklearn); sin datos devuelve NaN.
+    Una varianza del orden del error de redondeo de Σx² se trata como cero.
+    """
+    n = np.asarray(n, dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media_x = sx / n
+        media_y = sy / n
+        var_x = sxx - sx * media_x
+        cov_xy = sxy - sx * media_y
+        varia = var_x > 1e-12 * np.abs(sxx)
+        pendiente = np.where(varia, cov_xy / np.where(varia, var_x, 1.0), 0.0)
+        intercepto = media_y - pendiente * media_x
+    sin_datos = n == 0
+    pendiente = np.where(sin_datos, np.nan, pendiente)
+    intercepto = np.where(sin_datos, np.nan, intercepto)
+    return intercepto, pendiente
+
+def ajustar_ols(x, y):
+    """
+    Ajuste lineal simple y = a + b*x para una serie (1-D) o para N series a la vez
+    (arreglos 2-D de forma (N, T)). Los pares con NaN se ignoran, igual que dropna().
+    Devuelve (intercepto, pendiente) como escalares o arreglos de longitud N.
+
+    Los estadísticos se calculan sobre datos centrados en la media de cada serie,
+    lo que evita la cancelación numérica de Σx² - (Σx)²/n con valores grandes.
+    """
+    x = _a_arreglo(x)
+    y = _a_arreglo(y)
+    validos = ~(np.isnan(x) | np.isnan(y))
+    n = validos.sum(axis=-1)
+
+    x0 = np.where(validos, x, 0.0)
+    y0 = np.where(validos, y, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media_x = x0.sum(axis=-1) / n
+        media_y = y0.sum(axis=-1) / n
+    xc = np.where(validos, x - np.expand_dims(media_x, -1), 0.0)
+    yc = np.where(validos, y - np.expand_dims(media_y, -1), 0.0)
+
+    _, pendiente = coeficientes_desde_sumas(n, 0.0, 0.0, (xc * xc).sum(axis=-1), (xc * yc).sum(axis=-1))
+    intercepto = media_y - pendiente * media_x
+    if intercepto.ndim == 0:
+        return float(intercepto), float(pendiente)
+    return intercepto, pendiente
+
+def ajustar_modelo_b(indice, casos):
+    """
+    Ajusta ΔCasos = alpha + beta·ΔIndice_t_1 para una serie o una pila 2-D de series.
+    Devuelve (alpha, beta); NaN donde no hay pares válidos.
+    """
+    _, delta_ind, delta_casos = calcular_deltas(indice, casos)
+    return ajustar_ols(delta_ind, delta_casos)
+
+# ===================== AJUSTE INCREMENTAL =====================
+class RegresionIncremental:
+    """
+    Estado en línea del ajuste ΔCasos = alpha + beta·ΔIndice_t_1.
+
+    Mantiene los estadísticos suficientes (n, Σx, Σy, Σx², Σxy) de los pares,
+    de modo que agregar o quitar pares cuesta O(k) y consultar alpha/beta O(1).
+    Las sumas se guardan desplazadas por la media del último reconstruir()
+    para que las correcciones sucesivas no pierdan precisión.
+    """
+
+    def __init__(self):
+        self.x0 = 0.0
+        self.y0 = 0.0
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.n = 0
+        self.sx = 0.0
+        self.sy = 0.0
+        self.sxx = 0.0
+        self.sxy = 0.0
+
+    def reconstruir(self, indice, casos):
+        """Recalcula el estado desde cero con la serie completa (O(n))."""
+        x, y = pares_modelo_b(indice, casos)
+        self.reiniciar()
+        self.x0 = float(x.mean()) if len(x) else 0.0
+        self.y0 = float(y.mean()) if len(y) else 0.0
+        self.agregar(x, y)
+
+    def _acumular(self, x, y, signo):
+        x = _a_arreglo(x) - self.x0
+        y = _a_arreglo(y) - self.y0
+        self.n += signo * x.size
+        self.sx += signo * float(x.sum())
+        self.sy += signo * float(y.sum())
+        self.sxx += signo * float((x * x).sum())
+        self.sxy += signo * float((x * y).sum())
+
+    def agregar(self, x, y):
+        self._acumular(x, y, 1)
+
+    def quitar(self, x, y):
+        self._acumular(x, y, -1)
+        if self.n <= 0:
+            self.reiniciar()
+
+    def corregir(self, pares_anteriores, pares_nuevos):
+        """Sustituye los pares de una zona editada por los nuevos."""
+        self.quitar(*pares_anteriores)
+        self.agregar(*pares_nuevos)
+
+    def coeficientes(self):
+        """Devuelve (alpha, beta) o (None, None) si aún no hay pares."""
+        if self.n == 0:
+            return None, None
+        a, b = coeficientes_desde_sumas(self.n, self.sx, self.sy, self.sxx, self.sxy)
+        alpha = float(a) + self.y0 - float(b) * self.x0
+        return alpha, float(b)
+
+# ===================== VARIAS SERIES EN FORMATO LARGO =====================
+# Las funciones *_por_grupo reciben todas las series concatenadas (formato
+# largo) y un arreglo de códigos de grupo 0..G-1. Las filas de cada grupo deben
+# ser contiguas y estar en orden temporal; así todo se resuelve en una sola
+# pasada vectorizada, sin iterar por región.
+
+def inicios_de_grupo(grupos):
+    """Máscara booleana con True en la primera fila de cada grupo."""
+    grupos = np.asarray(grupos)
+    inicio = np.ones(len(grupos), dtype=bool)
+    inicio[1:] = grupos[1:] != grupos[:-1]
+    return inicio
+
+def desplazar_por_grupo(valores, grupos):
+    """shift(1) dentro de cada grupo (la primera fila de cada grupo queda en NaN)."""
+    res = desplazar(valores, 1)
+    res[inicios_de_grupo(grupos)] = np.nan
+    return res
+
+def diferenciar_por_grupo(valores, grupos):
+    """diff() dentro de cada grupo."""
+    res = diferenciar(valores)
+    res[inicios_de_grupo(grupos)] = np.nan
+    return res
+
+def calcular_deltas_por_grupo(indice, casos, grupos):
+    indice_prev = desplazar_por_grupo(indice, grupos)
+    return indice_prev, diferenciar_por_grupo(indice_prev, grupos), diferenciar_por_grupo(casos, grupos)
+
+def ajustar_ols_por_grupo(x, y, grupos, n_grupos):
+    """
+    OLS y = a + b*x de cada grupo con sumas por grupo (np.bincount), ignorando
+    pares con NaN. Devuelve (intercepto, pendiente, n) de longitud n_grupos.
+    """
+    x = _a_arreglo(x)
+    y = _a_arreglo(y)
+    grupos = np.asarray(grupos)
+    validos = ~(np.isnan(x) | np.isnan(y))
+    g = grupos[validos]
+    xv = x[validos]
+    yv = y[validos]
+
+    n = np.bincount(g, minlength=n_grupos).astype(np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media_x = np.bincount(g, weights=xv, minlength=n_grupos) / n
+        media_y = np.bincount(g, weights=yv, minlength=n_grupos) / n
+    xc = xv - media_x[g]
+    yc = yv - media_y[g]
+    sxx = np.bincount(g, weights=xc * xc, minlength=n_grupos)
+    sxy = np.bincount(g, weights=xc * yc, minlength=n_grupos)
+
+    _, pendiente = coeficientes_desde_sumas(n, 0.0, 0.0, sxx, sxy)
+    intercepto = media_y - pendiente * media_x
+    return intercepto, pendiente, n.astype(np.int64)
+
+def calcular_modelo_b_por_grupo(indice, casos, grupos, n_grupos, min_filas=3, nivel=0.95):
+    """
+    Modelo B de todas las series a la vez.
+    Devuelve un dict con alpha, beta y pares por grupo, las estimaciones por fila
+    (est_sin, est_con), la predicción de la semana siguiente de cada grupo y el
+    semiancho de su intervalo de predicción OLS al `nivel` dado.
+    Los grupos con menos de min_filas filas o sin pares válidos quedan en NaN.
+    """
+    indice = _a_arreglo(indice)
+    casos = _a_arreglo(casos)
+    grupos = np.asarray(grupos)
+
+    indice_prev, delta_ind, delta_casos = calcular_deltas_por_grupo(indice, casos, grupos)
+    alpha, beta, pares = ajustar_ols_por_grupo(delta_ind, delta_casos, grupos, n_grupos)
+    filas = np.bincount(grupos, minlength=n_grupos)
+    sin_modelo = (filas < min_filas) | (pares == 0)
+    alpha[sin_modelo] = np.nan
+    beta[sin_modelo] = np.nan
+
+    # Estimaciones: 0 en la primera fila del grupo y donde falta el delta
+    inicio = inicios_de_grupo(grupos)
+    delta0 = np.where(np.isnan(delta_ind), 0.0, delta_ind)
+    casos_prev = desplazar(casos, 1)
+    tendencia = beta[grupos] * delta0
+    est_sin = np.where(inicio, 0.0, casos_prev + tendencia)
+    est_con = np.where(inicio, 0.0, casos_prev + alpha[grupos] + tendencia)
+    est_sin[sin_modelo[grupos]] = 0.0
+    est_con[sin_modelo[grupos]] = 0.0
+
+    # Predicción desde la última fila de cada grupo
+    ultima = np.flatnonzero(np.append(inicio[1:], True))
+    delta_sig = indice[ultima] - indice_prev[ultima]
+    pred_sin = casos[ultima] + beta * delta_sig
+    pred_con = casos[ultima] + alpha + beta * delta_sig
+    margen = margen_prediccion_por_grupo(delta_ind, delta_casos, grupos, n_grupos, delta_sig, nivel)
+    margen[sin_modelo] = np.nan
+
+    return {
+        "alpha": alpha,
+        "beta": beta,
+        "pares": pares,
+        "filas": filas,
+        "indice_prev": indice_prev,
+        "est_sin": est_sin,
+        "est_con": est_con,
+        "ultima_fila": ultima,
+        "delta_indice": delta_sig,
+        "pred_sin": pred_sin,
+        "pred_con": pred_con,
+        "margen": margen,
+    }
+
+# ===================== VALIDACIÓN WALK-FORWARD =====================
+# Cada semana j se pronostica con alpha/beta ajustados solo con los pares
+# anteriores (fuera de muestra). En lugar de reajustar n veces, se guardan
+# sumas acumuladas de (1, x, y, x², xy): los estadísticos de cualquier tramo
+# [lo, hi) son S[hi] - S[lo], así que todos los orígenes cuestan O(n) en total.
+
+def pronosticos_walk_forward(indice, casos, grupos=None, ventana=None, minimo=3):
+    """
+    Pronósticos a un paso desde cada origen, para una serie o varias en
+    formato largo (grupos contiguos y en orden temporal, como en *_por_grupo).
+
+    ventana=None usa una ventana expansiva (todos los pares anteriores del
+    grupo); un entero usa solo los pares de las últimas `ventana` semanas.
+    Se pronostica solo si hay al menos `minimo` pares de entrenamiento.
+    Igual que calcular_estimaciones, un ΔIndice faltante cuenta como 0.
+
+    Devuelve un dict con la fila pronosticada (objetivo), el valor real, los
+    pronósticos sin/con intercepto y el alpha, beta y pares de cada origen.
+    """
+    indice = _a_arreglo(indice)
+    casos = _a_arreglo(casos)
+    n = len(casos)
+    grupos = np.zeros(n, dtype=np.int64) if grupos is None else np.asarray(grupos)
+
+    _, delta_ind, delta_casos = calcular_deltas_por_grupo(indice, casos, grupos)
+    validos = ~(np.isnan(delta_ind) | np.isnan(delta_casos))
+    media_x = delta_ind[validos].mean() if validos.any() else 0.0
+    media_y = delta_casos[validos].mean() if validos.any() else 0.0
+    xc = np.where(validos, delta_ind - media_x, 0.0)
+    yc = np.where(validos, delta_casos - media_y, 0.0)
+
+    # S[k] = suma de las filas 0..k-1 (datos centrados para no perder precisión)
+    sumas = np.zeros((5, n + 1))
+    np.cumsum(np.stack([validos.astype(np.float64), xc, yc, xc * xc, xc * yc]), axis=1, out=sumas[:, 1:])
+
+    # Inicio del grupo de cada fila; el objetivo j necesita casos[j-1] del mismo grupo
+    inicio = np.maximum.accumulate(np.where(inicios_de_grupo(grupos), np.arange(n), 0))
+    objetivo = np.flatnonzero(np.arange(n) > inicio)
+    hi = objetivo                        # Pares de las filas < j
+    lo = inicio[objetivo]
+    if ventana is not None:
+        lo = np.maximum(lo, objetivo - int(ventana))
+
+    tramo = sumas[:, hi] - sumas[:, lo]
+    pares = np.rint(tramo[0]).astype(np.int64)
+    a, beta = coeficientes_desde_sumas(tramo[0], tramo[1], tramo[2], tramo[3], tramo[4])
+    alpha = a + media_y - beta * media_x
+
+    usar = (pares >= minimo) & ~np.isnan(casos[objetivo]) & ~np.isnan(casos[objetivo - 1])
+    objetivo, pares, alpha, beta = objetivo[usar], pares[usar], alpha[usar], beta[usar]
+    delta = np.nan_to_num(delta_ind[objetivo], nan=0.0)
+    base = casos[objetivo - 1]
+    return {
+        "objetivo": objetivo,
+        "real": casos[objetivo],
+        "pred_sin": base + beta * delta,
+        "pred_con": base + alpha + beta * delta,
+        "alpha": alpha,
+        "beta": beta,
+        "pares": pares,
+    }
+
+def metricas_error(real, pred, grupos=None, n_grupos=None):
+    """
+    MAE, RMSE y MAPE (%) de todo el arreglo o de cada grupo 0..n_grupos-1
+    (con np.bincount). El MAPE omite las semanas con valor real 0.
+    Devuelve un dict de escalares o de arreglos por grupo; NaN si no hay datos.
+    """
+    real = _a_arreglo(real)
+    pred = _a_arreglo(pred)
+    total = grupos is None
+    if total:
+        grupos = np.zeros(len(real), dtype=np.int64)
+        n_grupos = 1
+    error = pred - real
+    con_pct = real != 0
+    pct = np.abs(error[con_pct] / real[con_pct])
+
+    n = np.bincount(grupos, minlength=n_grupos).astype(np.float64)
+    n_pct = np.bincount(grupos[con_pct], minlength=n_grupos).astype(np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        res = {
+            "n": n.astype(np.int64),
+            "mae": np.bincount(grupos, weights=np.abs(error), minlength=n_grupos) / n,
+            "rmse": np.sqrt(np.bincount(grupos, weights=error * error, minlength=n_grupos) / n),
+            "mape": 100 * np.bincount(grupos[con_pct], weights=pct, minlength=n_grupos) / n_pct,
+        }
+    if total:
+        return {k: v[0].item() for k, v in res.items()}
+    return res
+
+# ===================== INTERVALOS DE PREDICCIÓN =====================
+# El intervalo es para los casos reales de la semana siguiente según el ajuste
+# OLS con intercepto (ΔCasos = alpha + beta·ΔIndice + ε); las dos estimaciones
+# puntuales (sin/con intercepto) se comparan contra ese mismo rango.
+
+MAX_ELEMENTOS_BOOTSTRAP = 4_000_000  # Remuestras × pares por bloque (acota la memoria)
+
+GL_EXACTO = 30  # Hasta aquí el cuantil t es exacto; arriba Cornish-Fisher ya yerra < 1e-5
+
+def _cuantil_t_aproximado(z, gl):
+    """Expansión de Cornish-Fisher alrededor del cuantil normal z."""
+    g1 = (z**3 + z) / 4
+    g2 = (5 * z**5 + 16 * z**3 + 3 * z) / 96
+    g3 = (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / 384
+    g4 = (79 * z**9 + 776 * z**7 + 1482 * z**5 - 1920 * z**3 - 945 * z) / 92160
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return z + g1 / gl + g2 / gl**2 + g3 / gl**3 + g4 / gl**4
+
+def _t_bilateral(t, gl):
+    """P(|T| < t) con gl entero, por la serie finita de Abramowitz y Stegun 26.7.3-4."""
+    theta = np.arctan(t / math.sqrt(gl))
+    c2 = np.cos(theta) ** 2
+    termino, suma = 1.0, 0.0
+    if gl % 2:
+        for j in range(1, (gl - 1) // 2 + 1):
+            suma = suma + termino
+            termino = termino * (2 * j) / (2 * j + 1) * c2
+        return 2 / math.pi * (theta + np.sin(theta) * np.cos(theta) * suma)
+    for j in range(1, gl // 2 + 1):
+        suma = suma + termino
+        termino = termino * (2 * j - 1) / (2 * j) * c2
+    return np.sin(theta) * suma
+
+def _cuantil_t_exacto(p, gl, inicio):
+    """Newton sobre la distribución exacta desde `inicio` (por debajo de la raíz si p > 1/2)."""
+    q = abs(p - 0.5) * 2  # P(|T| < t) buscada
+    t = abs(inicio)
+    cte = math.exp(math.lgamma((gl + 1) / 2) - math.lgamma(gl / 2)) / math.sqrt(gl * math.pi)
+    for _ in range(50):
+        densidad = 2 * cte * (1 + t * t / gl) ** (-(gl + 1) / 2)
+        paso = (q - _t_bilateral(t, gl)) / densidad
+        t += paso
+        if abs(paso) < 1e-12 * max(t, 1.0):
+            break
+    return math.copysign(t, p - 0.5)
+
+def cuantil_t(p, gl):
+    """
+    Cuantil p de la t de Student con gl grados de libertad (escalar o arreglo).
+    Exacto hasta GL_EXACTO (los intervalos con 3 o 4 pares dependen de gl = 1, 2);
+    con más grados de libertad, la expansión de Cornish-Fisher. NaN si gl < 1.
+    """
+    z = NormalDist().inv_cdf(p)
+    gl = np.asarray(gl, dtype=np.float64)
+    t = np.asarray(_cuantil_t_aproximado(z, gl), dtype=np.float64).copy()
+    for g in np.unique(gl[(gl >= 1) & (gl <= GL_EXACTO)]):
+        t[gl == g] = _cuantil_t_exacto(p, int(g), _cuantil_t_aproximado(z, g))
+    t[gl < 1] = np.nan
+    return t if t.ndim else t[()]
+
+def margen_prediccion_por_grupo(x, y, grupos, n_grupos, x0, nivel=0.95):
+    """
+    Semiancho del intervalo de predicción OLS del siguiente ΔCasos de cada
+    grupo en x0 (arreglo de longitud n_grupos):
+        t(n-2) · s · sqrt(1 + 1/n + (x0 - x̄)² / Sxx),   s² = Σ residuo² / (n-2)
+    NaN en los grupos con menos de 3 pares.
+    """
+    x = _a_arreglo(x)
+    y = _a_arreglo(y)
+    grupos = np.asarray(grupos)
+    alpha, beta, n = ajustar_ols_por_grupo(x, y, grupos, n_grupos)
+    validos = ~(np.isnan(x) | np.isnan(y))
+    g = grupos[validos]
+    xv = x[validos]
+    residuo = y[validos] - (alpha[g] + beta[g] * xv)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        gl = np.where(n > 2, n - 2, np.nan)
+        s2 = np.bincount(g, weights=residuo * residuo, minlength=n_grupos) / gl
+        media_x = np.bincount(g, weights=xv, minlength=n_grupos) / n
+        xc = xv - media_x[g]
+        sxx = np.bincount(g, weights=xc * xc, minlength=n_grupos)
+        palanca = np.where(sxx > 0, (_a_arreglo(x0) - media_x) ** 2 / np.where(sxx > 0, sxx, 1.0), 0.0)
+        return cuantil_t(0.5 + nivel / 2, gl) * np.sqrt(s2 * (1 + 1 / n + palanca))
+
+def _bloque_bootstrap(args):
+    """Un bloque de remuestras (función de módulo para poder repartirla entre procesos)."""
+    residuos, xc, sxx, media_x, media_y, beta, x0, filas, semilla = args
+    rng = np.random.default_rng(semilla)
+    n = len(residuos)
+    e = residuos[rng.integers(0, n, size=(filas, n))]
+    # y* = ŷ + e*: con x fijo, beta* = beta + xc·e*/Sxx y ȳ* = ȳ + media(e*)
+    beta_b = beta + (e @ xc) / sxx if sxx > 0 else np.zeros(filas)
+    alpha_b = media_y + e.mean(axis=1) - beta_b * media_x
+    return alpha_b + beta_b * x0 + residuos[rng.integers(0, n, size=filas)]
+
+def bootstrap_prediccion(x, y, x0, muestras=2000, semilla=None, procesos=1):
+    """
+    Bootstrap de residuos del siguiente ΔCasos en x0: remuestrea los residuos
+    del ajuste, reajusta alpha/beta y suma un residuo nuevo, todo con
+    operaciones de matrices (muestras × pares) por bloques de tamaño acotado.
+    Con procesos > 1 los bloques se reparten en un pool de procesos; cada
+    bloque tiene su propia semilla derivada, así que el resultado no depende
+    del número de procesos. Devuelve el arreglo de ΔCasos simulados.
+    """
+    x = _a_arreglo(x)
+    y = _a_arreglo(y)
+    validos = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[validos], y[validos]
+    n = len(x)
+    if n < 3 or muestras <= 0 or np.isnan(x0):
+        return np.full(max(muestras, 0), np.nan)
+
+    alpha, beta = ajustar_ols(x, y)
+    media_x, media_y = x.mean(), y.mean()
+    xc = x - media_x
+    # Los residuos del ajuste subestiman la varianza del error: se inflan por n/(n-2)
+    residuos = (y - alpha - beta * x) * np.sqrt(n / (n - 2))
+
+    filas = max(1, MAX_ELEMENTOS_BOOTSTRAP // n)
+    tamanos = [min(filas, muestras - i) for i in range(0, muestras, filas)]
+    semillas = np.random.SeedSequence(semilla).spawn(len(tamanos))
+    tareas = [(residuos, xc, float(xc @ xc), media_x, media_y, beta, x0, t, sem)
+              for t, sem in zip(tamanos, semillas)]
+    if procesos and procesos > 1 and len(tareas) > 1:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            return np.concatenate(list(pool.map(_bloque_bootstrap, tareas)))
+    return np.concatenate([_bloque_bootstrap(t) for t in tareas])
+
+def intervalos_siguiente(indice, casos, nivel=0.95, muestras=0, semilla=None, procesos=1):
+    """
+    Intervalos de predicción de los casos de la semana siguiente a la última
+    fila. Devuelve un dict con el nivel, el intervalo analítico OLS y, si
+    muestras > 0, el intervalo percentil del bootstrap de residuos.
+    """
+    indice = _a_arreglo(indice)
+    casos = _a_arreglo(casos)
+    x, y = pares_modelo_b(indice, casos)
+    x0 = float(indice[-1] - indice[-2]) if len(indice) > 1 else np.nan
+    alpha, beta = ajustar_ols(x, y) if len(x) else (np.nan, np.nan)
+    centro = casos[-1] + alpha + beta * x0
+    margen = float(margen_prediccion_por_grupo(x, y, np.zeros(len(x), dtype=np.int64), 1, x0, nivel)[0])
+    res = {
+        "nivel": nivel,
+        "analitico": (float(centro - margen), float(centro + margen)),
+        "bootstrap": None,
+        "muestras": muestras,
+        "semilla": semilla,
+    }
+    if muestras > 0:
+        simulados = casos[-1] + bootstrap_prediccion(x, y, x0, muestras, semilla, procesos)
+        if np.isnan(simulados).all():
+            res["bootstrap"] = (np.nan, np.nan)
+        else:
+            inf, sup = np.quantile(simulados, [0.5 - nivel / 2, 0.5 + nivel / 2])
+            res["bootstrap"] = (float(inf), float(sup))
+    return res
+
+# ===================== PROYECCIÓN A VARIAS SEMANAS =====================
+# Al encadenar el modelo incremental h semanas, los cambios del índice se
+# telescopan:
+#     Casos[T+h] = Casos[T] + h·alpha + beta·(Indice[T+h-1] - Indice[T-1])
+# así que todos los horizontes de todos los escenarios salen de una sola
+# operación sobre la matriz de trayectorias (escenarios × semanas).
+
+def proyectar_trayectorias(indice, casos, alpha, beta, futuro):
+    """
+    Proyecta los casos de las semanas T+1..T+H desde la última fila T.
+    futuro: valores del índice de las semanas T+1..T+H, de forma (H,) o
+    (escenarios, H); el de T+H no influye en los casos hasta T+H.
+    Devuelve (pred_sin, pred_con) de forma (escenarios, H).
+    """
+    indice = _a_arreglo(indice)
+    casos = _a_arreglo(casos)
+    futuro = np.atleast_2d(_a_arreglo(futuro))
+    escenarios, horizonte = futuro.shape
+    previo = indice[-2] if len(indice) > 1 else np.nan
+
+    # Índice que empuja cada semana: Indice[T], Indice[T+1], ..., Indice[T+H-1]
+    camino = np.empty((escenarios, horizonte))
+    camino[:, 0] = indice[-1]
+    camino[:, 1:] = futuro[:, :-1]
+    tendencia = beta * (camino - previo)
+    pred_sin = casos[-1] + tendencia
+    pred_con = pred_sin + alpha * np.arange(1, horizonte + 1)
+    return pred_sin, pred_con
+
+def trayectoria_persistencia(indice, horizonte):
+    """El índice se queda en su último valor."""
+    return np.full((1, horizonte), _a_arreglo(indice)[-1])
+
+def trayectoria_tendencia(indice, horizonte, ventana=8, limites=(0.0, 100.0)):
+    """Extiende la recta ajustada a las últimas `ventana` semanas del índice."""
+    reciente = _a_arreglo(indice)[-ventana:]
+    t = np.arange(len(reciente), dtype=np.float64)
+    a, b = ajustar_ols(t, reciente)
+    futuro = a + b * np.arange(len(reciente), len(reciente) + horizonte)
+    return np.clip(futuro, *limites)[np.newaxis, :]
+
+def escenarios_indice(indice, horizonte, escenarios=1000, semilla=None, ventana=52, limites=(0.0, 100.0)):
+    """
+    Trayectorias del índice como caminatas aleatorias: cada semana suma un
+    cambio semanal remuestreado de las últimas `ventana` semanas. Todas las
+    trayectorias se generan con un cumsum sobre la matriz (escenarios, H).
+    Los valores se recortan a la escala de Google Trends (0-100).
+    """
+    indice = _a_arreglo(indice)
+    cambios = np.diff(indice[-(ventana + 1):])
+    cambios = cambios[~np.isnan(cambios)]
+    if len(cambios) == 0:
+        cambios = np.zeros(1)
+    rng = np.random.default_rng(semilla)
+    pasos = cambios[rng.integers(0, len(cambios), size=(escenarios, horizonte))]
+    return np.clip(indice[-1] + np.cumsum(pasos, axis=1), *limites)
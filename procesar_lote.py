@@ -0,0 +1,206 @@
+"""
+Ejecución sin interfaz de los Modelos A y B sobre uno o muchos archivos.
+
+Cada archivo (Excel o CSV) se procesa de forma independiente: correlación del
+Modelo A, ajuste alpha/beta del Modelo B, estimaciones y predicción de la
+siguiente semana con su intervalo de predicción. Los archivos se reparten entre todos los núcleos con un
+pool de procesos y el resumen se escribe en JSON, CSV o Parquet.
+
+Uso:
+    python procesar_lote.py datos/*.xlsx --salida resumen.json
+    python procesar_lote.py carpeta_datos --salida resumen.csv --detalle estimaciones/
+    python procesar_lote.py Datos.xlsx --bootstrap 5000 --semilla 7 --nivel 0.9
+    python procesar_lote.py Datos.xlsx --horizonte 52 --escenarios 5000
+"""
+import os
+import sys
+import glob
+import json
+import math
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import utilidades
+
+EXTENSIONES = (".xlsx", ".xls", ".csv")
+FORMATOS = ("json", "csv", "parquet")
+
+# ===================== PROCESAMIENTO =====================
+def expandir_entradas(entradas, extensiones=EXTENSIONES):
+    """Expande carpetas y comodines (en Windows la terminal no los expande)."""
+    rutas = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            for nombre in sorted(os.listdir(entrada)):
+                if nombre.lower().endswith(extensiones) and not nombre.startswith("~$"):
+                    rutas.append(os.path.join(entrada, nombre))
+        elif any(c in entrada for c in "*?["):
+            rutas.extend(sorted(glob.glob(entrada)))
+        else:
+            rutas.append(entrada)
+    return rutas
+
+def procesar_archivo(ruta, carpeta_detalle=None, formato="csv", nivel=utilidades.NIVEL_INTERVALO,
+                     muestras=0, semilla=utilidades.SEMILLA_BOOTSTRAP, horizonte=0,
+                     escenarios=utilidades.ESCENARIOS_PROYECCION, trayectorias=None,
+                     ventana_corr=utilidades.VENTANA_CORRELACION):
+    """
+    Procesa un archivo y devuelve un registro con los resultados (o el error).
+    nivel/muestras/semilla: intervalo de predicción de la semana siguiente
+    (muestras > 0 agrega el bootstrap de residuos, solo para series únicas).
+    horizonte > 0 agrega la proyección a varias semanas (series únicas), con
+    `escenarios` caminatas del índice o las `trayectorias` dadas.
+    ventana_corr: semanas de la correlación móvil del Modelo A.
+    """
+    registro = {"archivo": ruta}
+    try:
+        df = utilidades.cargar_tabla(ruta)
+        registro["filas"] = len(df)
+
+        df_a, res_a = utilidades.calcular_modelo_a(df, ventana_corr)
+        registro["modelo_a"] = res_a
+
+        if utilidades.columnas_grupo(df):
+            # Formato largo: un Modelo B por región/término en una sola pasada
+            df_b, resumen = utilidades.calcular_modelo_b_por_region(df, nivel)
+            registro["regiones"] = resumen.to_dict("records")
+        else:
+            df_b, res_b = utilidades.calcular_modelo_b(df, nivel, muestras, semilla)
+            registro["modelo_b"] = res_b
+            if horizonte > 0 and res_b is not None:
+                proyeccion, _ = utilidades.proyectar_modelo_b(df, horizonte, escenarios, semilla, trayectorias)
+                registro["proyeccion"] = proyeccion.to_dict("records")
+
+        if carpeta_detalle and len(df_b):
+            nombre = os.path.splitext(os.path.basename(ruta))[0]
+            registro["detalle"] = escribir_tabla(df_b, os.path.join(carpeta_detalle, nombre), formato)
+            if df_a is not None:
+                # Correlación móvil y acumulada por semana
+                registro["detalle_a"] = escribir_tabla(df_a, os.path.join(carpeta_detalle, nombre + "_modelo_a"), formato)
+    except Exception as e:
+        registro["error"] = f"{type(e).__name__}: {e}"
+    return registro
+
+def _procesar_args(args):
+    return procesar_archivo(*args)
+
+def procesar_lote(rutas, procesos=None, carpeta_detalle=None, formato="csv", nivel=utilidades.NIVEL_INTERVALO,
+                  muestras=0, semilla=utilidades.SEMILLA_BOOTSTRAP, horizonte=0,
+                  escenarios=utilidades.ESCENARIOS_PROYECCION, trayectorias=None,
+                  ventana_corr=utilidades.VENTANA_CORRELACION):
+    """Procesa todos los archivos; con más de uno usa un pool de procesos."""
+    tareas = [(ruta, carpeta_detalle, formato, nivel, muestras, semilla, horizonte, escenarios, trayectorias, ventana_corr)
+              for ruta in rutas]
+    if len(tareas) <= 1 or procesos == 1:
+        return [_procesar_args(t) for t in tareas]
+    procesos = procesos or os.cpu_count() or 1
+    chunksize = max(1, len(tareas) // (procesos * 4))
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        return list(pool.map(_procesar_args, tareas, chunksize=chunksize))
+
+# ===================== SALIDA =====================
+def _limpiar(valor):
+    """Convierte NaN y tipos de numpy a valores JSON válidos."""
+    if isinstance(valor, dict):
+        return {k: _limpiar(v) for k, v in valor.items()}
+    if isinstance(valor, list):
+        return [_limpiar(v) for v in valor]
+    if isinstance(valor, pd.Timestamp):
+        return valor.isoformat()
+    if hasattr(valor, "item"):
+        valor = valor.item()
+    if isinstance(valor, float) and not math.isfinite(valor):
+        return None
+    return valor
+
+def escribir_tabla(df, ruta_sin_ext, formato):
+    df = utilidades.para_archivo(df)
+    if formato == "parquet":
+        ruta = ruta_sin_ext + ".parquet"
+        df.to_parquet(ruta, index=False)
+    elif formato == "json":
+        ruta = ruta_sin_ext + ".json"
+        df.to_json(ruta, orient="records", date_format="iso", force_ascii=False)
+    else:
+        ruta = ruta_sin_ext + ".csv"
+        df.to_csv(ruta, index=False)
+    return ruta
+
+TABLAS_ANIDADAS = ("regiones", "proyeccion")  # Listas de filas dentro de cada registro
+
+def escribir_resumen(registros, ruta_salida, formato):
+    """
+    Escribe el resumen por archivo. Los resultados por región y las
+    proyecciones se consolidan en tablas "<salida>_regiones" y
+    "<salida>_proyeccion" (en JSON van dentro de cada registro).
+    """
+    if formato != "json":
+        base, ext = os.path.splitext(ruta_salida)
+        for nombre in TABLAS_ANIDADAS:
+            filas = [dict(r, archivo=reg["archivo"]) for reg in registros for r in reg.get(nombre, [])]
+            if not filas:
+                continue
+            tabla_anidada = pd.DataFrame(filas)
+            tabla_anidada = tabla_anidada[["archivo"] + [c for c in tabla_anidada.columns if c != "archivo"]]
+            if formato == "parquet":
+                tabla_anidada.to_parquet(f"{base}_{nombre}{ext}", index=False)
+            else:
+                tabla_anidada.to_csv(f"{base}_{nombre}{ext}", index=False)
+        registros = [{k: v for k, v in reg.items() if k not in TABLAS_ANIDADAS} for reg in registros]
+    registros = [_limpiar(r) for r in registros]
+    if formato == "json":
+        with open(ruta_salida, "w", encoding="utf-8") as f:
+            json.dump(registros, f, ensure_ascii=False, indent=2)
+        return
+    tabla = pd.json_normalize(registros, sep=".")
+    if formato == "parquet":
+        tabla.to_parquet(ruta_salida, index=False)
+    else:
+        tabla.to_csv(ruta_salida, index=False)
+
+def _formato_de(ruta, formato):
+    if formato:
+        return formato
+    ext = os.path.splitext(ruta)[1].lower().lstrip(".")
+    return ext if ext in FORMATOS else "json"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Modelos A y B sin interfaz sobre uno o varios archivos.")
+    parser.add_argument("entradas", nargs="+", help="Archivos .xlsx/.xls/.csv, carpetas o comodines")
+    parser.add_argument("-o", "--salida", default="resumen_modelos.json", help="Archivo de resumen (json/csv/parquet)")
+    parser.add_argument("-f", "--formato", choices=FORMATOS, help="Formato de salida (por defecto, según la extensión)")
+    parser.add_argument("-d", "--detalle", help="Carpeta donde escribir las estimaciones por archivo")
+    parser.add_argument("-p", "--procesos", type=int, default=None, help="Procesos en paralelo (por defecto, todos los núcleos)")
+    parser.add_argument("--ventana-corr", type=int, default=utilidades.VENTANA_CORRELACION,
+                        help="Semanas de la correlación móvil del Modelo A")
+    parser.add_argument("--nivel", type=float, default=utilidades.NIVEL_INTERVALO, help="Nivel del intervalo de predicción (0-1)")
+    parser.add_argument("--bootstrap", type=int, default=0, metavar="MUESTRAS",
+                        help="Remuestras del intervalo bootstrap (0 = solo el analítico)")
+    parser.add_argument("--semilla", type=int, default=utilidades.SEMILLA_BOOTSTRAP, help="Semilla del bootstrap y de los escenarios")
+    parser.add_argument("--horizonte", type=int, default=0, help="Semanas a proyectar (0 = solo la siguiente)")
+    parser.add_argument("--escenarios", type=int, default=utilidades.ESCENARIOS_PROYECCION, help="Escenarios del índice de la proyección")
+    parser.add_argument("--trayectorias", help="CSV con trayectorias del índice (una fila por escenario, una columna por semana)")
+    args = parser.parse_args(argv)
+
+    rutas = expandir_entradas(args.entradas)
+    if not rutas:
+        print("No se encontraron archivos de entrada.", file=sys.stderr)
+        return 1
+
+    formato = _formato_de(args.salida, args.formato)
+    if args.detalle:
+        os.makedirs(args.detalle, exist_ok=True)
+
+    trayectorias = pd.read_csv(args.trayectorias).to_numpy(dtype=float) if args.trayectorias else None
+    registros = procesar_lote(rutas, args.procesos, args.detalle, formato, args.nivel, args.bootstrap, args.semilla,
+                              args.horizonte, args.escenarios, trayectorias, args.ventana_corr)
+    escribir_resumen(registros, args.salida, formato)
+
+    errores = [r for r in registros if "error" in r]
+    print(f"Procesados {len(registros) - len(errores)} de {len(registros)} archivos -> {args.salida}")
+    for r in errores:
+        print(f"  ERROR {r['archivo']}: {r['error']}", file=sys.stderr)
+    return 1 if errores else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
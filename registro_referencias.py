@@ -0,0 +1,308 @@
+import os
+import json
+import hashlib
+import datetime
+import numpy as np
+import pandas as pd
+import motor_modelo_b
+import utilidades
+
+# ===================== REGISTRO DE MODELOS DE REFERENCIA =====================
+# Modelos B ya ajustados de temporadas anteriores, guardados fuera de los libros
+# para el arranque en frío del gestor (menos de 3 semanas propias). Todo vive en
+# un solo índice JSON en la carpeta del usuario: elegir una referencia no vuelve
+# a abrir ni a reajustar el Excel original.
+#
+# Cada entrada se identifica por el hash del contenido del libro, así que
+# registrar dos veces el mismo archivo (aunque se haya movido o renombrado) no
+# duplica nada ni vuelve a leerlo. Además de alpha/beta guarda los estadísticos
+# del ajuste (n, s, x̄, Sxx, r²) con los que se arma el intervalo de predicción
+# sin los datos originales, y el rango de semanas y fechas de la temporada.
+
+CARPETA_REGISTRO = os.environ.get(
+    "SIFILIS_REFERENCIAS", os.path.join(os.path.expanduser("~"), ".sistema_epidemiologico"))
+ARCHIVO_INDICE = "referencias.json"
+VERSION = 1
+
+_indice = None  # (firma del archivo, datos) del último índice leído
+_version = 0    # Cambia cada vez que el índice en memoria cambia
+_matriz = None  # (versión, entradas, rasgos) para la búsqueda de vecinos
+
+def _ruta_indice():
+    return os.path.join(CARPETA_REGISTRO, ARCHIVO_INDICE)
+
+def hash_archivo(ruta):
+    h = hashlib.sha1()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+def _vacio():
+    return {"version": VERSION, "actual": None, "entradas": {}}
+
+def _leer():
+    """Índice completo; se relee solo si el archivo cambió desde la última vez."""
+    global _indice, _version
+    ruta = _ruta_indice()
+    try:
+        st = os.stat(ruta)
+    except OSError:
+        if _indice is not None:
+            _indice = None
+            _version += 1
+        return _vacio()
+    firma = (st.st_mtime_ns, st.st_size)
+    if _indice is not None and _indice[0] == firma:
+        return _indice[1]
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            datos = json.load(f)
+    except (OSError, ValueError):
+        datos = None
+    if not isinstance(datos, dict) or datos.get("version") != VERSION:
+        datos = _vacio()
+    _indice = (firma, datos)
+    _version += 1
+    return datos
+
+def _escribir(datos):
+    global _indice, _version
+    ruta = _ruta_indice()
+    os.makedirs(CARPETA_REGISTRO, exist_ok=True)
+    tmp = ruta + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(datos, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, ruta)
+    st = os.stat(ruta)
+    _indice = ((st.st_mtime_ns, st.st_size), datos)
+    _version += 1
+
+# ===================== AJUSTE =====================
+def _fecha_iso(valor):
+    return None if pd.isna(valor) else pd.Timestamp(valor).date().isoformat()
+
+def ajustar_referencia(df):
+    """
+    Ajuste OLS del Modelo B con sus estadísticos, listo para guardarse.
+    df debe tener las columnas internas (utilidades.normalizar_columnas).
+    None si el ajuste no es finito (menos de 2 pares o ΔIndice constante);
+    con solo 2 pares no hay error residual y s queda en None.
+    """
+    indice = df[utilidades.COL_INDICE].to_numpy(dtype=float, na_value=np.nan)
+    casos = df[utilidades.COL_CASOS].to_numpy(dtype=float, na_value=np.nan)
+    x, y = motor_modelo_b.pares_modelo_b(indice, casos)
+    if len(x) == 0:
+        return None
+    alpha, beta = motor_modelo_b.ajustar_ols(x, y)
+    if not (np.isfinite(alpha) and np.isfinite(beta)):
+        return None
+
+    residuo = y - (alpha + beta * x)
+    yc = y - y.mean()
+    syy = float((yc * yc).sum())
+    semanas = pd.to_numeric(df[utilidades.COL_SEMANA], errors="coerce")
+    periodo = pd.to_datetime(df[utilidades.COL_PERIODO], errors="coerce")
+    return {
+        "alpha": float(alpha),
+        "beta": float(beta),
+        "pares": int(len(x)),
+        "s": float(np.sqrt((residuo * residuo).sum() / (len(x) - 2))) if len(x) > 2 else None,
+        "r2": float(1 - (residuo * residuo).sum() / syy) if syy > 0 else None,
+        "media_x": float(x.mean()),
+        "sxx": float(((x - x.mean()) ** 2).sum()),
+        "filas": int(len(df)),
+        "semana_desde": None if semanas.isna().all() else int(semanas.min()),
+        "semana_hasta": None if semanas.isna().all() else int(semanas.max()),
+        "desde": _fecha_iso(periodo.min()),
+        "hasta": _fecha_iso(periodo.max()),
+        "rasgos": [None if np.isnan(v) else float(v) for v in rasgos_temporada(indice, casos)],
+    }
+
+# ===================== CONSULTA Y ALTA =====================
+def listar():
+    """Entradas registradas, la más reciente primero."""
+    entradas = list(_leer()["entradas"].values())
+    return sorted(entradas, key=lambda e: e["registrado"], reverse=True)
+
+def obtener(clave):
+    return _leer()["entradas"].get(clave)
+
+def registrar(ruta, leer, nombre=None):
+    """
+    Registra el libro de ruta y devuelve su entrada (None si no alcanza para un
+    ajuste). leer() debe devolver su DataFrame normalizado y solo se llama si
+    ese contenido aún no está en el registro (o si su entrada es anterior a
+    los rasgos de temporada).
+    """
+    clave = hash_archivo(ruta)
+    existente = obtener(clave)
+    if existente is not None and "rasgos" in existente:
+        return existente
+
+    ajuste = ajustar_referencia(leer())
+    if ajuste is None:
+        return None
+    entrada = {
+        "clave": clave,
+        "nombre": nombre or os.path.basename(ruta),
+        "ruta": os.path.abspath(ruta),
+        "registrado": datetime.datetime.now().isoformat(timespec="seconds"),
+        **ajuste,
+    }
+    datos = _leer()
+    datos["entradas"][clave] = entrada
+    _escribir(datos)
+    return entrada
+
+def eliminar(clave):
+    datos = _leer()
+    if datos["entradas"].pop(clave, None) is None:
+        return
+    if datos["actual"] == clave:
+        datos["actual"] = None
+    _escribir(datos)
+
+def actual():
+    """Referencia elegida en la última sesión (o None)."""
+    datos = _leer()
+    return datos["entradas"].get(datos["actual"]) if datos["actual"] else None
+
+def fijar_actual(clave):
+    datos = _leer()
+    if datos["actual"] != clave:
+        datos["actual"] = clave
+        _escribir(datos)
+
+# ===================== PREDICCIÓN =====================
+def margen_prediccion(entrada, x0, nivel=0.95):
+    """
+    Semiancho del intervalo de predicción del siguiente ΔCasos en x0 con los
+    estadísticos guardados (misma fórmula que motor_modelo_b.margen_prediccion_por_grupo).
+    NaN si la referencia tiene menos de 3 pares.
+    """
+    n = entrada["pares"]
+    if entrada["s"] is None:
+        return float("nan")
+    palanca = (x0 - entrada["media_x"]) ** 2 / entrada["sxx"] if entrada["sxx"] > 0 else 0.0
+    t = float(motor_modelo_b.cuantil_t(0.5 + nivel / 2, n - 2))
+    return t * entrada["s"] * float(np.sqrt(1 + 1 / n + palanca))
+
+# ===================== TEMPORADAS SIMILARES =====================
+# Sin fórmula elegida, el arranque en frío busca las temporadas registradas que
+# más se parecen a las primeras semanas de la actual y promedia sus fórmulas.
+# Cada temporada se describe con un vector corto de rasgos de sus primeras
+# SEMANAS_RASGOS semanas; la temporada actual solo tiene algunos, así que la
+# distancia usa únicamente los rasgos que ya se conocen.
+#
+# Con pocos rasgos (8) una búsqueda exhaustiva vectorizada sobre la matriz de
+# todas las temporadas cuesta O(N·d): con miles de temporadas toma fracciones
+# de milisegundo, menos que construir un árbol k-d. La matriz se arma una vez
+# por versión del índice.
+
+SEMANAS_RASGOS = 3
+VECINOS_REFERENCIA = 5
+NOMBRES_RASGOS = (["nivel_casos", "nivel_indice"]
+                  + [f"delta_indice_{i}" for i in range(2, SEMANAS_RASGOS + 1)]
+                  + [f"delta_casos_{i}" for i in range(2, SEMANAS_RASGOS + 1)]
+                  + ["volatilidad_indice"])
+
+def rasgos_temporada(indice, casos, semanas=SEMANAS_RASGOS):
+    """
+    Rasgos de las primeras `semanas` filas de una temporada (NaN los que aún no
+    existen): nivel de casos e índice de la semana 1, cambios semanales del
+    índice y de los casos desde la semana 2, y la volatilidad del índice (media
+    de |ΔIndice| disponibles). Todo sale de las series Indice y Casos: la
+    semana 1 no tiene cambio porque no hay una semana anterior en la temporada
+    (Indice_t_1 vale NaN en los libros y 0 en las altas del gestor).
+    """
+    indice = np.asarray(indice, dtype=np.float64)[:semanas]
+    casos = np.asarray(casos, dtype=np.float64)[:semanas]
+    d_ind = np.full(semanas - 1, np.nan)
+    d_cas = np.full(semanas - 1, np.nan)
+    if len(indice):
+        d_ind[:len(indice) - 1] = np.diff(indice)
+        d_cas[:len(casos) - 1] = np.diff(casos)
+    nivel = [casos[0] if len(casos) else np.nan, indice[0] if len(indice) else np.nan]
+    with np.errstate(invalid="ignore"):
+        volatilidad = np.nanmean(np.abs(d_ind)) if np.isfinite(d_ind).any() else np.nan
+    return np.concatenate([nivel, d_ind, d_cas, [volatilidad]])
+
+def _matriz_rasgos():
+    """(entradas, rasgos N×d) de las temporadas registradas con rasgos (NaN los que faltan)."""
+    global _matriz
+    datos = _leer()
+    if _matriz is not None and _matriz[0] == _version:
+        return _matriz[1], _matriz[2]
+    entradas = [e for e in datos["entradas"].values() if len(e.get("rasgos") or ()) == len(NOMBRES_RASGOS)]
+    rasgos = np.array([[np.nan if v is None else v for v in e["rasgos"]] for e in entradas],
+                      dtype=np.float64).reshape(len(entradas), len(NOMBRES_RASGOS))
+    _matriz = (_version, entradas, rasgos)
+    return entradas, rasgos
+
+def vecinos_cercanos(rasgos, consulta, k=VECINOS_REFERENCIA):
+    """
+    Posiciones y distancias de las k filas de `rasgos` más cercanas a
+    `consulta`, de la más cercana a la más lejana. Cada rasgo se estandariza con
+    la media y la desviación de todas las filas; la distancia es la raíz de la
+    media de las diferencias² en los rasgos que ambas conocen (las filas sin
+    ninguno en común quedan fuera). Los rasgos constantes no cuentan.
+    """
+    consulta = np.asarray(consulta, dtype=np.float64)
+    if len(rasgos) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    conocidos = np.isfinite(rasgos)
+    valores = np.where(conocidos, rasgos, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = valores.sum(axis=0) / conocidos.sum(axis=0)
+        desv = np.sqrt(np.where(conocidos, (valores - media) ** 2, 0.0).sum(axis=0) / conocidos.sum(axis=0))
+    usar = np.isfinite(consulta) & (desv > 0)
+    z = (rasgos[:, usar] - media[usar]) / desv[usar]
+    zq = (consulta[usar] - media[usar]) / desv[usar]
+    diferencia = (z - zq) ** 2
+    comunes = np.isfinite(diferencia).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        distancia = np.sqrt(np.nansum(diferencia, axis=1) / comunes)
+    candidatos = np.flatnonzero(comunes > 0)
+
+    k = min(k, len(candidatos))
+    if k == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    cercanos = candidatos[np.argpartition(distancia[candidatos], k - 1)[:k]]
+    cercanos = cercanos[np.argsort(distancia[cercanos], kind="stable")]
+    return cercanos, distancia[cercanos]
+
+def pronostico_ensamble(indice, casos, k=VECINOS_REFERENCIA):
+    """
+    Pronóstico de arranque en frío con las k temporadas registradas más
+    parecidas a la actual (series de la temporada en curso, en orden).
+    Pesos inversos a la distancia; como el modelo es lineal, promediar las
+    predicciones equivale a usar alpha y beta promediados.
+    None si no hay temporadas con rasgos o la temporada actual no tiene filas.
+    """
+    casos = np.asarray(casos, dtype=np.float64)
+    indice = np.asarray(indice, dtype=np.float64)
+    if len(casos) == 0:
+        return None
+    entradas, rasgos = _matriz_rasgos()
+    posiciones, distancias = vecinos_cercanos(rasgos, rasgos_temporada(indice, casos), k)
+    if len(posiciones) == 0:
+        return None
+
+    vecinos = [entradas[i] for i in posiciones]
+    pesos = 1.0 / (distancias + 1e-9)
+    pesos /= pesos.sum()
+    alpha = np.array([e["alpha"] for e in vecinos])
+    beta = np.array([e["beta"] for e in vecinos])
+    # Igual que el gestor y motor_modelo_b: la tendencia sale de la serie Indice
+    delta = indice[-1] - indice[-2] if len(indice) > 1 else np.nan
+    predicciones = casos[-1] + alpha + beta * delta
+    return {
+        "vecinos": vecinos,
+        "distancias": distancias,
+        "pesos": pesos,
+        "alpha": float(pesos @ alpha),
+        "beta": float(pesos @ beta),
+        "predicciones": predicciones,
+        "prediccion": float(pesos @ predicciones),
+    }
@@ -0,0 +1,80 @@
+import os
+import threading
+from collections import OrderedDict
+import cache_excel
+
+# ===================== SESIÓN COMPARTIDA =====================
+# El menú abre el gestor y los Modelos A y B como ventanas del mismo proceso.
+# Este módulo guarda lo que comparten: las tablas ya leídas y los resultados
+# de los modelos, para que cambiar de herramienta no vuelva a leer el archivo
+# ni a recalcular.
+#
+# Cada entrada se valida con (mtime, tamaño) del archivo: si el libro se
+# reescribe (guardar, compactar la bitácora) la siguiente lectura lo recarga.
+#
+# Las herramientas leen y calculan en hilos de trabajo (ver tareas.py): los
+# diccionarios se protegen con un candado, pero la lectura y el cálculo se
+# hacen fuera de él para no bloquear a la interfaz.
+
+MAX_TABLAS = 4         # Libros distintos que se conservan en memoria
+
+_tablas = OrderedDict()     # (ruta, hoja) -> (firma, DataFrame)
+_resultados = {}            # (ruta, nombre) -> (firma, resultado)
+_candado = threading.Lock()
+
+def _ruta_norm(ruta):
+    return os.path.normcase(os.path.abspath(ruta))
+
+def _firma(ruta):
+    st = os.stat(ruta)
+    return (st.st_mtime_ns, st.st_size)
+
+def leer_excel(ruta_excel, hoja=0):
+    """
+    Como cache_excel.leer_excel, pero conserva la tabla en memoria mientras el
+    archivo no cambie. Devuelve una copia: cada herramienta puede modificarla.
+    """
+    clave = (_ruta_norm(ruta_excel), hoja)
+    firma = _firma(ruta_excel)
+    with _candado:
+        entrada = _tablas.get(clave)
+        if entrada is not None and entrada[0] == firma:
+            _tablas.move_to_end(clave)
+            return entrada[1].copy()
+
+    df = cache_excel.leer_excel(ruta_excel, hoja=hoja)
+    with _candado:
+        _tablas[clave] = (firma, df)
+        _tablas.move_to_end(clave)
+        while len(_tablas) > MAX_TABLAS:
+            _tablas.popitem(last=False)
+    return df.copy()
+
+def resultado(ruta_excel, nombre, calcular):
+    """
+    Resultado de calcular() asociado a la versión actual del archivo; se
+    recalcula solo si el archivo cambió. El resultado es compartido: no debe
+    modificarse en el lugar.
+    """
+    clave = (_ruta_norm(ruta_excel), nombre)
+    firma = _firma(ruta_excel)
+    with _candado:
+        entrada = _resultados.get(clave)
+    if entrada is not None and entrada[0] == firma:
+        return entrada[1]
+    valor = calcular()
+    with _candado:
+        _resultados[clave] = (firma, valor)
+    return valor
+
+def invalidar(ruta_excel=None):
+    """Olvida lo guardado de un archivo, o todo si no se indica ruta."""
+    with _candado:
+        if ruta_excel is None:
+            _tablas.clear()
+            _resultados.clear()
+            return
+        ruta = _ruta_norm(ruta_excel)
+        for cache in (_tablas, _resultados):
+            for clave in [c for c in cache if c[0] == ruta]:
+                del cache[clave]
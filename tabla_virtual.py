@@ -0,0 +1,276 @@
+import tkinter as tk
+from tkinter import ttk
+import numpy as np
+import pandas as pd
+import estilos
+
+# ===================== TABLA VIRTUALIZADA =====================
+# Un ttk.Treeview con tantos renglones como caben en pantalla. Los datos viven
+# en arreglos por columna y solo se formatean las filas visibles al desplazarse,
+# así que cargar 1 o 1,000,000 de filas cuesta lo mismo para la interfaz.
+#
+# Imita la parte de Treeview que usan las ventanas: selection() devuelve el
+# índice de fila (como texto) y al seleccionar se emite <<TreeviewSelect>>.
+#
+# Cada renglón recuerda lo que muestra; al repintar solo se llama a
+# tree.item en los renglones cuyo texto cambió (p. ej. tras un alta/edición).
+
+# ---------- Formateadores (se aplican solo a las filas visibles) ----------
+def fmt_texto(valor):
+    return str(valor)
+
+def fmt_numero(valor):
+    """Enteros sin ".0" (semanas y casos se guardan como Int32/float32); vacío si falta."""
+    if pd.isna(valor):
+        return ""
+    if isinstance(valor, (float, np.floating)) and float(valor).is_integer():
+        return str(int(valor))
+    return str(valor)
+
+def fmt_fecha(valor):
+    if isinstance(valor, np.datetime64):
+        valor = pd.Timestamp(valor)
+    if isinstance(valor, pd.Timestamp) and not pd.isna(valor):
+        return valor.strftime('%d/%m/%Y')
+    return str(valor)
+
+def fmt_decimal(decimales, si_nan=None, si_cero=None):
+    """Formateador con decimales fijos; si_nan/si_cero sustituyen esos casos."""
+    def formatear(valor):
+        try:
+            if pd.isna(valor):
+                return si_nan if si_nan is not None else str(valor)
+            if si_cero is not None and valor == 0:
+                return si_cero
+            return f"{valor:.{decimales}f}"
+        except (TypeError, ValueError):
+            return str(valor)
+    return formatear
+
+# Semana, Fecha, Índice (t), Índice (t-1), Casos, Est. SIN, Est. CON
+FORMATOS_MODELO_B = [fmt_numero, fmt_fecha, fmt_texto, fmt_decimal(1, si_nan="0.0"), fmt_numero,
+                     fmt_decimal(2, si_cero="-"), fmt_decimal(2, si_cero="-")]
+
+class TablaVirtual(tk.Frame):
+    def __init__(self, parent, columnas, titulos=None, ancho=100, anchor="center", **kwargs):
+        kwargs.setdefault("bg", estilos.COLOR_FONDO)
+        super().__init__(parent, **kwargs)
+        self.columnas = list(columnas)
+        self.tree = ttk.Treeview(self, columns=self.columnas, show="headings", selectmode="none")
+        self.scroll = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.scroll.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+
+        titulos = titulos or {}
+        for c in self.columnas:
+            self.tree.heading(c, text=titulos.get(c, c))
+            self.tree.column(c, width=ancho, anchor=anchor)
+        self.tree.tag_configure("seleccionada", background=estilos.COLOR_ACCENT, foreground="white")
+
+        self._datos = [np.empty(0, dtype=object) for _ in self.columnas]
+        self._formatos = [fmt_texto for _ in self.columnas]
+        self._n = 0
+        self._inicio = 0          # Primera fila de datos visible
+        self._slots = []          # iids de los renglones reutilizables del Treeview
+        self._mostrado = []       # (valores, tags) que muestra cada renglón
+        self.ultimos_repintados = 0  # Renglones tocados en el último repintado
+        self._seleccion = None    # Índice de fila de datos seleccionada
+
+        self.tree.bind("<Configure>", self._on_configure)
+        self.tree.bind("<Button-1>", self._on_click)
+        for evento in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(evento, self._on_rueda)
+        for tecla, paso in (("<Up>", -1), ("<Down>", 1), ("<Prior>", "pag-"), ("<Next>", "pag+")):
+            self.tree.bind(tecla, lambda e, p=paso: self._on_tecla(p))
+        self.tree.bind("<Home>", lambda e: self._mover_seleccion_a(0))
+        self.tree.bind("<End>", lambda e: self._mover_seleccion_a(self._n - 1))
+
+    # ---------- Datos ----------
+    def _asignar(self, columnas, formatos):
+        self._datos = [np.asarray(c, dtype=object) if not isinstance(c, np.ndarray) else c for c in columnas]
+        self._formatos = list(formatos) if formatos else [fmt_texto for _ in self.columnas]
+        self._n = len(self._datos[0]) if self._datos else 0
+        self._seleccion = None  # Igual que al vaciar un Treeview
+
+    def cargar(self, columnas, formatos=None):
+        """
+        columnas: un arreglo por columna (todas de la misma longitud).
+        formatos: un formateador por columna (por defecto str).
+        Vuelve al inicio de la tabla.
+        """
+        self._asignar(columnas, formatos)
+        self._inicio = 0
+        self._pintar()
+
+    def actualizar(self, columnas, formatos=None, cambio=None):
+        """
+        Reemplaza los datos conservando la posición de desplazamiento y repinta
+        solo los renglones visibles cuyo texto cambió.
+        cambio: (fila, filas_agregadas) del alta (+1), baja (-1) o edición (0)
+        que originó la actualización, o una lista de ellos en el orden en que
+        ocurrieron; si ocurrió arriba de lo visible, la vista se recorre para
+        seguir mostrando las mismas filas.
+        """
+        if cambio is not None:
+            for fila, delta in ([cambio] if isinstance(cambio, tuple) else cambio):
+                if delta and fila < self._inicio:
+                    self._inicio += delta
+        self._asignar(columnas, formatos)
+        self._pintar()
+
+    def _arreglos_df(self, df, columnas_df, relleno):
+        # Copias: la tabla sigue mostrando la misma foto aunque el DataFrame se
+        # edite en el lugar antes del siguiente repintado
+        return [df[c].to_numpy(copy=True) if c in df.columns else np.full(len(df), relleno, dtype=object) for c in columnas_df]
+
+    def cargar_df(self, df, columnas_df, formatos=None, relleno=""):
+        """Atajo: toma las columnas del DataFrame (las faltantes se muestran con relleno)."""
+        self.cargar(self._arreglos_df(df, columnas_df, relleno), formatos)
+
+    def actualizar_df(self, df, columnas_df, formatos=None, cambio=None, relleno=""):
+        self.actualizar(self._arreglos_df(df, columnas_df, relleno), formatos, cambio)
+
+    def limpiar(self):
+        self.cargar([np.empty(0, dtype=object) for _ in self.columnas])
+
+    def __len__(self):
+        return self._n
+
+    # ---------- API compatible con Treeview ----------
+    def selection(self):
+        return (str(self._seleccion),) if self._seleccion is not None else ()
+
+    def seleccionar(self, idx, emitir=True):
+        self._seleccion = idx
+        if idx is not None:
+            self.ver(idx)
+        self._pintar()
+        if emitir:
+            self.event_generate("<<TreeviewSelect>>")
+
+    def heading(self, columna, **kwargs):
+        return self.tree.heading(columna, **kwargs)
+
+    def column(self, columna, **kwargs):
+        return self.tree.column(columna, **kwargs)
+
+    def ver(self, idx):
+        """Desplaza lo mínimo necesario para que la fila idx quede visible."""
+        visibles = max(len(self._slots), 1)
+        if idx < self._inicio:
+            self._inicio = idx
+        elif idx >= self._inicio + visibles:
+            self._inicio = idx - visibles + 1
+        self._limitar_inicio()
+
+    # ---------- Pintado ----------
+    def _alto_fila(self):
+        try:
+            return int(ttk.Style().lookup("Treeview", "rowheight")) or 25
+        except (tk.TclError, ValueError):
+            return 25
+
+    def _on_configure(self, event):
+        alto_fila = self._alto_fila()
+        encabezado = alto_fila
+        if self._slots:
+            bbox = self.tree.bbox(self._slots[0])
+            if bbox:
+                encabezado = bbox[1]
+        visibles = max(1, (event.height - encabezado) // alto_fila)
+        if visibles != len(self._slots):
+            self._crear_slots(visibles)
+            self._pintar()
+
+    def _crear_slots(self, cantidad):
+        for iid in self._slots[cantidad:]:
+            self.tree.delete(iid)
+        del self._slots[cantidad:]
+        del self._mostrado[cantidad:]
+        vacio = [""] * len(self.columnas)
+        while len(self._slots) < cantidad:
+            iid = f"slot{len(self._slots)}"
+            self.tree.insert("", tk.END, iid=iid, values=vacio)
+            self._slots.append(iid)
+            self._mostrado.append((vacio, ()))
+
+    def _limitar_inicio(self):
+        maximo = max(0, self._n - len(self._slots))
+        self._inicio = min(max(0, self._inicio), maximo)
+
+    def _valores_fila(self, idx):
+        return [fmt(col[idx]) for col, fmt in zip(self._datos, self._formatos)]
+
+    def _pintar(self):
+        self._limitar_inicio()
+        repintados = 0
+        for k, iid in enumerate(self._slots):
+            idx = self._inicio + k
+            if idx < self._n:
+                nuevo = (self._valores_fila(idx), ("seleccionada",) if idx == self._seleccion else ())
+            else:
+                nuevo = ([""] * len(self.columnas), ())
+            if nuevo != self._mostrado[k]:
+                self.tree.item(iid, values=nuevo[0], tags=nuevo[1])
+                self._mostrado[k] = nuevo
+                repintados += 1
+        self.ultimos_repintados = repintados
+        self._actualizar_scrollbar()
+
+    def _actualizar_scrollbar(self):
+        if self._n == 0:
+            self.scroll.set(0.0, 1.0)
+            return
+        primero = self._inicio / self._n
+        ultimo = min(1.0, (self._inicio + len(self._slots)) / self._n)
+        self.scroll.set(primero, ultimo)
+
+    # ---------- Eventos ----------
+    def _desplazar(self, filas):
+        self._inicio += filas
+        self._pintar()
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self._inicio = int(float(args[1]) * self._n)
+            self._pintar()
+        elif args[0] == "scroll":
+            cantidad = int(args[1])
+            if args[2] == "pages":
+                cantidad *= max(1, len(self._slots) - 1)
+            self._desplazar(cantidad)
+
+    def _on_rueda(self, event):
+        if getattr(event, "num", None) == 4:
+            paso = -3
+        elif getattr(event, "num", None) == 5:
+            paso = 3
+        else:
+            paso = -3 if event.delta > 0 else 3
+        self._desplazar(paso)
+        return "break"
+
+    def _on_click(self, event):
+        if self.tree.identify_region(event.x, event.y) != "cell":
+            return
+        iid = self.tree.identify_row(event.y)
+        if iid in self._slots:
+            idx = self._inicio + self._slots.index(iid)
+            if idx < self._n:
+                self.tree.focus_set()
+                self.seleccionar(idx)
+        return "break"
+
+    def _mover_seleccion_a(self, idx):
+        if self._n == 0:
+            return "break"
+        self.seleccionar(min(max(0, idx), self._n - 1))
+        return "break"
+
+    def _on_tecla(self, paso):
+        if paso == "pag-":
+            paso = -max(1, len(self._slots) - 1)
+        elif paso == "pag+":
+            paso = max(1, len(self._slots) - 1)
+        actual = self._seleccion if self._seleccion is not None else self._inicio - paso
+        return self._mover_seleccion_a(actual + paso)
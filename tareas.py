@@ -0,0 +1,173 @@
+import queue
+import threading
+import tkinter as tk
+from tkinter import ttk, messagebox
+import estilos
+
+# ===================== TAREAS EN SEGUNDO PLANO =====================
+# Leer un libro grande y ajustar los modelos puede tardar segundos; hecho en el
+# hilo de Tk, la ventana deja de responder. Una Tarea corre ese trabajo en un
+# hilo aparte que nunca toca widgets: publica su avance en una cola que la
+# ventana revisa con after(). Al terminar, el resultado completo se entrega a
+# al_terminar en el hilo de Tk, que lo aplica de una sola vez; si la tarea se
+# canceló (o la reemplazó otra) el resultado se descarta sin tocar la interfaz.
+#
+# Se usan hilos y no procesos: los DataFrames pasan a la interfaz sin copiarse
+# ni serializarse, y aunque openpyxl retiene el GIL, el intérprete lo cede cada
+# pocos milisegundos, así que la ventana sigue pintándose y respondiendo.
+#
+# La cancelación es cooperativa: el trabajo llama a tarea.avance() entre
+# etapas y ahí se interrumpe con Cancelada.
+
+INTERVALO_MS = 50  # Cada cuánto revisa la ventana la cola de la tarea
+
+class Cancelada(Exception):
+    """Se lanza en el hilo de trabajo cuando la tarea fue cancelada."""
+
+class Tarea:
+    """
+    Ejecuta trabajo(tarea) en un hilo. Los callbacks corren en el hilo de Tk:
+    al_avance(fraccion, texto), al_terminar(resultado) y al_error(excepcion)
+    (por defecto un messagebox de error).
+    """
+
+    def __init__(self, ventana, trabajo, al_terminar, al_error=None, al_avance=None):
+        self.ventana = ventana
+        self._trabajo = trabajo
+        self._al_terminar = al_terminar
+        self._al_error = al_error
+        self._al_avance = al_avance
+        self._cola = queue.Queue()
+        self._cancelada = threading.Event()
+        self.terminada = False
+        self._hilo = threading.Thread(target=self._correr, daemon=True)
+        self._hilo.start()
+        ventana.after(INTERVALO_MS, self._revisar)
+
+    # ---------- Hilo de trabajo ----------
+    def avance(self, fraccion, texto=""):
+        """Reporta el avance (0..1); si la tarea se canceló, lanza Cancelada."""
+        if self._cancelada.is_set():
+            raise Cancelada()
+        self._cola.put(("avance", fraccion, texto))
+
+    def _correr(self):
+        try:
+            resultado = self._trabajo(self)
+        except Cancelada:
+            self._cola.put(("cancelada",))
+        except Exception as e:
+            self._cola.put(("error", e))
+        else:
+            self._cola.put(("fin", resultado))
+
+    # ---------- Hilo de Tk ----------
+    def cancelar(self):
+        self._cancelada.set()
+
+    def cancelada(self):
+        return self._cancelada.is_set()
+
+    def en_curso(self):
+        return not self.terminada
+
+    def _revisar(self):
+        try:
+            if not self.ventana.winfo_exists():
+                self._cancelada.set()
+                return
+        except tk.TclError:
+            self._cancelada.set()
+            return
+
+        avance, final = None, None
+        while final is None:
+            try:
+                mensaje = self._cola.get_nowait()
+            except queue.Empty:
+                break
+            if mensaje[0] == "avance":
+                avance = mensaje  # Solo se pinta el último de la ráfaga
+            else:
+                final = mensaje
+
+        if avance is not None and self._al_avance is not None and not self.cancelada():
+            self._al_avance(avance[1], avance[2])
+        if final is None:
+            self.ventana.after(INTERVALO_MS, self._revisar)
+            return
+
+        self.terminada = True
+        if self.cancelada() or final[0] == "cancelada":
+            return
+        if final[0] == "error":
+            if self._al_error is not None:
+                self._al_error(final[1])
+            else:
+                messagebox.showerror("Error", str(final[1]), parent=self.ventana)
+            return
+        self._al_terminar(final[1])
+
+class PanelProgreso(tk.Frame):
+    """
+    Barra de avance con botón de cancelar. Queda vacía (sin alto) mientras no
+    hay tarea; ejecutar() la muestra y la oculta sola.
+    """
+
+    def __init__(self, parent, **kwargs):
+        kwargs.setdefault("bg", estilos.COLOR_FONDO)
+        super().__init__(parent, **kwargs)
+        self.tarea = None
+        self._contenido = tk.Frame(self, bg=kwargs["bg"])
+        self._lbl = tk.Label(self._contenido, text="", font=estilos.FONT_SMALL, bg=kwargs["bg"], fg=estilos.COLOR_TEXTO_SEC)
+        self._lbl.pack(side="left", padx=5)
+        self._barra = ttk.Progressbar(self._contenido, length=240, maximum=1.0, mode="determinate")
+        self._barra.pack(side="left", padx=5)
+        estilos.crear_boton(self._contenido, "✖ Cancelar", self.cancelar, tipo="danger", width=12).pack(side="left", padx=5)
+
+    def mostrar(self, texto):
+        self._lbl.config(text=texto)
+        self._barra["value"] = 0.0
+        self._contenido.pack(pady=5)
+
+    def actualizar(self, fraccion, texto=""):
+        self._barra["value"] = fraccion
+        if texto:
+            self._lbl.config(text=texto)
+
+    def ocultar(self):
+        self._contenido.pack_forget()
+
+    def cancelar(self):
+        if self.tarea is not None:
+            self.tarea.cancelar()
+        self.tarea = None
+        self.ocultar()
+
+def ejecutar(ventana, trabajo, al_terminar, panel=None, texto="Procesando...", al_error=None):
+    """
+    Lanza trabajo(tarea) en segundo plano y, si hay panel, muestra ahí su avance.
+    Una tarea nueva en el mismo panel cancela la anterior (su resultado ya no
+    se aplica). Devuelve la Tarea.
+    """
+    if panel is None:
+        return Tarea(ventana, trabajo, al_terminar, al_error)
+
+    panel.cancelar()
+    panel.mostrar(texto)
+
+    def terminar(resultado):
+        panel.ocultar()
+        panel.tarea = None
+        al_terminar(resultado)
+
+    def fallar(error):
+        panel.ocultar()
+        panel.tarea = None
+        if al_error is not None:
+            al_error(error)
+        else:
+            messagebox.showerror("Error", str(error), parent=ventana)
+
+    panel.tarea = Tarea(ventana, trabajo, terminar, fallar, panel.actualizar)
+    return panel.tarea
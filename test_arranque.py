@@ -0,0 +1,24 @@
+"""
+Presupuesto de arranque del menú (ver medir_arranque.py): cada medición corre
+en un intérprete nuevo. Sin pantalla se mide hasta la importación del menú.
+
+Uso:
+    python -m pytest -q test_arranque.py
+"""
+import pytest
+import medir_arranque
+
+pytest.importorskip("tkinter")
+
+@pytest.fixture(scope="module")
+def menu():
+    resultado = medir_arranque.medir_menu()
+    if "error" in resultado:
+        pytest.fail(f"No se pudo arrancar el menú: {resultado['error']}")
+    return resultado
+
+def test_arranque_dentro_del_presupuesto(menu):
+    assert menu["total"] <= medir_arranque.PRESUPUESTO_ARRANQUE_S
+
+def test_menu_no_importa_dependencias_pesadas(menu):
+    assert menu["pesados"] == []
@@ -0,0 +1,40 @@
+"""
+Verificación del esquema en memoria: los tipos compactos (float32) no deben
+llegar a los archivos que se guardan.
+
+Uso:
+    python -m pytest -q test_esquema.py
+"""
+import numpy as np
+import pandas as pd
+import utilidades
+
+def _tabla():
+    return utilidades.normalizar_columnas(pd.DataFrame({
+        "Numero de Semana Epidemiologica": [1, 2],
+        "Periodo": ["2025-01-05", "2025-01-12"],
+        "Indice": [45.3, 12.7],
+        "Indice t-1": [np.nan, 45.3],
+        "Casos Reportados": [12, 63],
+    }))
+
+def test_libro_conserva_decimales(tmp_path):
+    df = _tabla()
+    assert df[utilidades.COL_INDICE].dtype == np.float32
+
+    ruta = str(tmp_path / "datos.xlsx")
+    utilidades.escribir_libro(df, ruta)
+
+    crudo = pd.read_excel(ruta)
+    assert crudo["Indice"].tolist() == [45.3, 12.7]
+    assert crudo["Indice t-1"].tolist()[1] == 45.3
+    # Y al volver a leerlo da los mismos valores en memoria
+    releido = utilidades.cargar_tabla(ruta)
+    assert releido[utilidades.COL_INDICE].tolist() == df[utilidades.COL_INDICE].tolist()
+
+def test_para_archivo_csv(tmp_path):
+    ruta = tmp_path / "datos.csv"
+    utilidades.para_archivo(_tabla()).to_csv(ruta, index=False)
+    texto = ruta.read_text(encoding="utf-8")
+    assert "45.3," in texto and "12.7," in texto
+    assert "45.2999" not in texto
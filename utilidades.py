@@ -1,8 +1,11 @@
 import pandas as pd
 import numpy as np
-from sklearn.linear_model import LinearRegression
 import os
-from tkinter import filedialog, messagebox
+import re
+import unicodedata
+import motor_modelo_a
+import motor_modelo_b
+import cache_excel
 
 # ===================== CONSTANTES =====================
 COL_SEMANA = "Semana"
@@ -12,9 +15,179 @@ COL_INDICE_PREV = "Indice_t_1"
 COL_CASOS = "Casos_t"
 COL_EST_SIN = "Est_Sin_Int"
 COL_EST_CON = "Est_Con_Int"
+COL_REGION = "Region"    # Opcional: entidad federativa (formato largo)
+COL_TERMINO = "Termino"  # Opcional: término de búsqueda del índice
+COL_R_MOVIL = "r_movil"          # Modelo A: correlación de la ventana móvil
+COL_R_ACUMULADA = "r_acumulada"  # Modelo A: correlación desde el inicio
+
+# Encabezados aceptados en los archivos de entrada -> nombre interno
+MAPA_COLUMNAS = {
+    "Numero de Semana Epidemiologica": COL_SEMANA,
+    "No. Semana": COL_SEMANA,
+    "Indice": COL_INDICE,
+    "Indice t-1": COL_INDICE_PREV,
+    "Casos Reportados": COL_CASOS,
+    "Casos": COL_CASOS,
+    "Estado": COL_REGION,
+    "Entidad": COL_REGION,
+    "Entidad Federativa": COL_REGION,
+    "Región": COL_REGION,
+    "Término": COL_TERMINO
+}
+# Intervalos de predicción (diálogos de predicción y ejecución sin interfaz)
+NIVEL_INTERVALO = 0.95
+MUESTRAS_BOOTSTRAP = 2000
+SEMILLA_BOOTSTRAP = 2024    # Fija para que la misma tabla dé siempre el mismo intervalo
+
+# Correlación móvil del Modelo A (semanas por ventana)
+VENTANA_CORRELACION = 26
+
+# Proyección a varias semanas
+HORIZONTE_PROYECCION = 12
+ESCENARIOS_PROYECCION = 2000
+
+COLUMNAS_BASE = [COL_SEMANA, COL_PERIODO, COL_INDICE, COL_INDICE_PREV, COL_CASOS]
+COLUMNAS_GRUPO = [COL_REGION, COL_TERMINO]
+
+# ===================== ESQUEMA =====================
+# Tipo en memoria de cada columna. Todas las lecturas (ventanas, registro de
+# referencias, lote e importadores) pasan por normalizar_columnas, así que una
+# tabla cargada tiene siempre estos tipos sin importar de dónde venga.
+ESQUEMA = {
+    COL_SEMANA: "Int32",              # Entero de 32 bits que admite semanas faltantes
+    COL_PERIODO: "datetime64[s]",     # Resolución de días; en [ns] las series largas pasan del año 2262
+    COL_INDICE: "float32",
+    COL_INDICE_PREV: "float32",
+    COL_CASOS: "float32",             # Exacto para conteos de hasta 16 millones
+    COL_REGION: "category",
+    COL_TERMINO: "category",
+}
+# Columnas sin las que una tabla no sirve para los modelos; una tupla acepta cualquiera
+COLUMNAS_REQUERIDAS = (COL_SEMANA, COL_CASOS, (COL_INDICE, COL_INDICE_PREV))
+
+# Encabezados con que se escriben los libros (y se nombran en los errores)
+ENCABEZADOS_LIBRO = {
+    COL_SEMANA: "Numero de Semana Epidemiologica",
+    COL_INDICE: "Indice",
+    COL_INDICE_PREV: "Indice t-1",
+    COL_CASOS: "Casos Reportados"
+}
+
+def _clave_encabezado(nombre):
+    """Encabezado sin mayúsculas, acentos ni signos: "Índice t-1" -> "indice t 1"."""
+    texto = unicodedata.normalize("NFKD", str(nombre)).encode("ascii", "ignore").decode("ascii").lower()
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", texto).split())
+
+# Encabezado normalizado -> nombre interno (los internos también se aceptan: "Casos_t")
+_ENCABEZADOS = {_clave_encabezado(c): c for c in ESQUEMA}
+_ENCABEZADOS.update({_clave_encabezado(k): v for k, v in MAPA_COLUMNAS.items()})
+
+def aplicar_esquema(df):
+    """Convierte a su tipo de ESQUEMA cada columna presente que aún no lo tenga (una conversión vectorizada por columna)."""
+    convertidas = {}
+    for col, tipo in ESQUEMA.items():
+        if col not in df.columns or df[col].dtype == tipo:
+            continue
+        if tipo == "category":
+            convertidas[col] = df[col].astype(tipo)
+        elif tipo.startswith("datetime64"):
+            convertidas[col] = pd.to_datetime(df[col], errors="coerce").astype(tipo)
+        else:
+            numeros = pd.to_numeric(df[col], errors="coerce")
+            if tipo == "Int32":
+                numeros = numeros.where(numeros == np.floor(numeros))  # 5.5 no es una semana
+            convertidas[col] = numeros.astype(tipo)
+    return df.assign(**convertidas) if convertidas else df
+
+def para_archivo(df):
+    """
+    Copia lista para escribirse a disco: las columnas float32 pasan a float64
+    con el decimal más corto que las representa, para que un 45.3 capturado se
+    guarde como 45.3 y no como 45.29999923706055. Todo archivo que se escribe
+    (libros, CSV de los importadores y del lote) pasa por aquí.
+    """
+    convertidas = {c: df[c].to_numpy().astype(str).astype(np.float64)
+                   for c in df.columns if df[c].dtype == np.float32}
+    return df.assign(**convertidas) if convertidas else df
+
+def valor_esquema(col, valor):
+    """Un solo valor con el tipo de su columna (para ediciones en el lugar, sin armar un DataFrame)."""
+    tipo = ESQUEMA.get(col)
+    if tipo is None or tipo == "category":
+        return valor
+    if tipo.startswith("datetime64"):
+        fecha = pd.to_datetime(valor, errors="coerce")
+        return fecha if pd.isna(fecha) else fecha.as_unit(tipo[11:-1])
+    try:
+        numero = float(valor)
+    except (TypeError, ValueError):
+        numero = np.nan
+    if tipo == "Int32":
+        return int(numero) if np.isfinite(numero) and numero.is_integer() else pd.NA
+    return np.float32(numero)
+
+def fila_esquema(fila):
+    """Una fila (dict) como DataFrame de una fila con los tipos del esquema, lista para concatenar."""
+    return pd.DataFrame({col: pd.array([valor_esquema(col, v)], dtype=ESQUEMA[col]) if col in ESQUEMA else [v]
+                         for col, v in fila.items()})
+
+def tabla_vacia():
+    return aplicar_esquema(pd.DataFrame(columns=COLUMNAS_BASE))
 
 # ===================== UTILIDADES =====================
-def leer_excel(ruta_excel=None):
+def normalizar_columnas(df, requeridas=COLUMNAS_REQUERIDAS):
+    """
+    Lleva una tabla recién leída al esquema: reconoce los encabezados (sin
+    distinguir mayúsculas, acentos ni signos), valida las columnas requeridas
+    (ValueError si falta alguna), calcula Indice_t_1 si solo viene Indice_t,
+    agrega las demás columnas faltantes y convierte todo a los tipos de ESQUEMA.
+    Las columnas de grupo (Region/Termino) se conservan solo si vienen en el archivo.
+    """
+    df = df.rename(columns={c: _ENCABEZADOS.get(_clave_encabezado(c), c) for c in df.columns})
+    df = df.loc[:, ~df.columns.duplicated()]  # "Casos" y "Casos Reportados": gana la primera
+
+    faltantes = []
+    for requerida in requeridas:
+        opciones = requerida if isinstance(requerida, tuple) else (requerida,)
+        if not any(c in df.columns for c in opciones):
+            faltantes.append(" o ".join(ENCABEZADOS_LIBRO.get(c, c) for c in opciones))
+    if faltantes:
+        raise ValueError(f"Faltan columnas requeridas: {', '.join(faltantes)}.")
+
+    df = df[[c for c in COLUMNAS_BASE + COLUMNAS_GRUPO if c in df.columns]].copy()
+    if COL_INDICE_PREV not in df.columns and COL_INDICE in df.columns:
+        df[COL_INDICE_PREV] = df[COL_INDICE].shift(1)
+    for col in COLUMNAS_BASE:
+        if col not in df.columns:
+            df[col] = np.nan
+    return aplicar_esquema(df[COLUMNAS_BASE + columnas_grupo(df)])
+
+def columnas_grupo(df):
+    """Columnas de agrupación (región, término) presentes en el DataFrame."""
+    return [c for c in COLUMNAS_GRUPO if c in df.columns]
+
+def indice_previo(df):
+    """Indice de la fila anterior de la misma región/término, en el orden actual de las filas."""
+    claves = columnas_grupo(df)
+    if claves:
+        return df.groupby(claves, dropna=False, observed=True)[COL_INDICE].shift(1)
+    return df[COL_INDICE].shift(1)
+
+def cargar_tabla(ruta, requeridas=COLUMNAS_REQUERIDAS):
+    """
+    Lee un Excel (con caché) o un CSV y lo lleva al esquema (normalizar_columnas).
+    No muestra diálogos: los errores se propagan (apto para uso sin interfaz).
+    """
+    if ruta.lower().endswith(".csv"):
+        df = pd.read_csv(ruta)
+    else:
+        df = cache_excel.leer_excel(ruta, hoja=0)
+    return normalizar_columnas(df, requeridas)
+
+def pedir_ruta_excel(ruta_excel=None):
+    """Ruta del Excel de datos; si no se da, la pide con un diálogo. None si no existe."""
+    # tkinter solo en los ayudantes con diálogos: procesar_lote no necesita Tk
+    from tkinter import filedialog
     if not ruta_excel:
         ruta_excel = filedialog.askopenfilename(
             title="Selecciona el Excel de datos",
@@ -22,34 +195,34 @@ def leer_excel(ruta_excel=None):
         )
     if not ruta_excel or not os.path.exists(ruta_excel):
         return None
+    return ruta_excel
+
+def leer_excel(ruta_excel=None):
+    """
+    Pide (si hace falta) y lee el Excel en el hilo actual; (df, ruta) o None.
+    Las ventanas leen en segundo plano con pedir_ruta_excel + cargar_tabla
+    (ver tareas.py).
+    """
+    from tkinter import messagebox
+    ruta_excel = pedir_ruta_excel(ruta_excel)
+    if ruta_excel is None:
+        return None
 
     try:
-        df = pd.read_excel(ruta_excel, sheet_name=0)
+        df = cargar_tabla(ruta_excel)
     except Exception as e:
         messagebox.showerror("Error", f"No se pudo leer el Excel:\n{e}")
         return None
 
-    # Normalización de nombres
-    df = df.rename(columns={
-        "Numero de Semana Epidemiologica": COL_SEMANA,
-        "No. Semana": COL_SEMANA,
-        "Indice": COL_INDICE,
-        "Indice t-1": COL_INDICE_PREV,
-        "Casos Reportados": COL_CASOS,
-        "Casos": COL_CASOS
-    })
-
-    cols_necesarias = [COL_SEMANA, COL_PERIODO, COL_INDICE, COL_INDICE_PREV, COL_CASOS]
-    for col in cols_necesarias:
-        if col not in df.columns:
-            df[col] = np.nan
+    return df, ruta_excel
 
-    if COL_PERIODO in df.columns:
-        df[COL_PERIODO] = pd.to_datetime(df[COL_PERIODO], errors="coerce")
-
-    return df[cols_necesarias].copy(), ruta_excel
+def escribir_libro(df, ruta_excel):
+    """Escribe el libro sin columnas calculadas y con los encabezados de entrada. Sin diálogos (apto para hilos)."""
+    df_export = df.drop(columns=[c for c in (COL_EST_SIN, COL_EST_CON) if c in df.columns])
+    para_archivo(df_export).rename(columns=ENCABEZADOS_LIBRO).to_excel(ruta_excel, index=False)
 
 def guardar_excel(df, ruta_excel=None):
+    from tkinter import filedialog, messagebox
     if not ruta_excel:
         ruta_excel = filedialog.asksaveasfilename(
             defaultextension=".xlsx",
@@ -59,19 +232,8 @@ def guardar_excel(df, ruta_excel=None):
         return
 
     try:
-        df_export = df.copy()
-        # Limpiar columnas calculadas antes de guardar
-        for col in [COL_EST_SIN, COL_EST_CON]:
-            if col in df_export.columns:
-                df_export = df_export.drop(columns=[col])
-        
-        df_export = df_export.rename(columns={
-            COL_SEMANA: "Numero de Semana Epidemiologica",
-            COL_INDICE: "Indice",
-            COL_INDICE_PREV: "Indice t-1",
-            COL_CASOS: "Casos Reportados"
-        })
-        df_export.to_excel(ruta_excel, index=False)
+        escribir_libro(df, ruta_excel)
+        cache_excel.invalidar(ruta_excel)
         messagebox.showinfo("Guardado", f"Datos guardados en:\n{ruta_excel}")
         return ruta_excel
     except Exception as e:
@@ -82,24 +244,17 @@ def calcular_coeficientes(df):
     """Calcula alpha y beta para un dataframe dado."""
     if df is None or len(df) < 3:
         return None, None
-    
-    df_calc = df.copy()
-    df_calc[COL_INDICE_PREV] = df_calc[COL_INDICE].shift(1)
-    df_calc["Delta_Casos"] = df_calc[COL_CASOS].diff()
-    df_calc["Delta_Indice"] = df_calc[COL_INDICE_PREV].diff()
-
-    df_train = df_calc.dropna(subset=["Delta_Casos", "Delta_Indice"])
-    if df_train.empty:
-        return None, None
 
     try:
-        X = df_train[["Delta_Indice"]].values
-        y = df_train["Delta_Casos"].values
-        modelo = LinearRegression(fit_intercept=True)
-        modelo.fit(X, y)
-        return modelo.intercept_, modelo.coef_[0]
+        alpha, beta = motor_modelo_b.ajustar_modelo_b(
+            df[COL_INDICE].to_numpy(dtype=float, na_value=np.nan),
+            df[COL_CASOS].to_numpy(dtype=float, na_value=np.nan)
+        )
     except Exception:
         return None, None
+    if not (np.isfinite(alpha) and np.isfinite(beta)):
+        return None, None
+    return alpha, beta
 
 def calcular_modelo_b_completo(df):
     df[COL_EST_SIN] = 0.0
@@ -112,33 +267,302 @@ def calcular_modelo_b_completo(df):
     if alpha is None:
         return df
 
-    lista_sin = [0.0] * len(df)
-    lista_con = [0.0] * len(df)
-    
-    # Recalcular deltas para la proyección
-    df_calc = df.copy()
-    df_calc[COL_INDICE_PREV] = df_calc[COL_INDICE].shift(1)
-    
-    for i in range(1, len(df)):
-        casos_prev = df_calc.iloc[i - 1][COL_CASOS]
-        ind_t1_actual = df_calc.iloc[i][COL_INDICE_PREV]
-        ind_t1_prev = df_calc.iloc[i - 1][COL_INDICE_PREV]
-        
-        delta_ind = 0
-        if pd.notna(ind_t1_actual) and pd.notna(ind_t1_prev):
-            delta_ind = ind_t1_actual - ind_t1_prev
-            
-        est_sin = casos_prev + beta * delta_ind
-        est_con = casos_prev + alpha + beta * delta_ind
-        lista_sin[i] = est_sin
-        lista_con[i] = est_con
-
-    df[COL_EST_SIN] = lista_sin
-    df[COL_EST_CON] = lista_con
+    return aplicar_estimaciones(df, alpha, beta)
+
+def aplicar_estimaciones(df, alpha, beta):
+    """Escribe Est_Sin_Int/Est_Con_Int usando el motor vectorizado del Modelo B."""
+    est_sin, est_con = motor_modelo_b.calcular_estimaciones(
+        df[COL_INDICE].to_numpy(dtype=float, na_value=np.nan),
+        df[COL_CASOS].to_numpy(dtype=float, na_value=np.nan),
+        alpha, beta
+    )
+    df[COL_EST_SIN] = est_sin
+    df[COL_EST_CON] = est_con
     return df
 
+def calcular_modelo_a(df, ventana_corr=VENTANA_CORRELACION):
+    """
+    Modelo A: regresión Casos ~ Indice_t_1 desde la semana 2.
+    Agrega a df_a la correlación móvil (últimas `ventana_corr` semanas) y la
+    acumulada hasta cada semana, en orden de Periodo y sin cruzar de una
+    región/término a otra; df_a queda ordenado por grupo y Periodo.
+    Devuelve (df_a, resultados) o (None, None) si no hay datos en el rango.
+    """
+    claves = columnas_grupo(df)
+    df = df.sort_values(by=claves + [COL_PERIODO, COL_SEMANA], kind="stable").reset_index(drop=True)
+    if df[COL_INDICE_PREV].isna().all() and COL_INDICE in df.columns:
+        df[COL_INDICE_PREV] = (df.groupby(claves, dropna=False, observed=True)[COL_INDICE].shift(1)
+                               if claves else df[COL_INDICE].shift(1))
+    df[COL_SEMANA] = pd.to_numeric(df[COL_SEMANA], errors="coerce")
+    df_a = df[df[COL_SEMANA] >= 2].copy()
+    df_a = df_a.dropna(subset=[COL_INDICE_PREV, COL_CASOS]).reset_index(drop=True)
+    if df_a.empty:
+        return None, None
+
+    x = df_a[COL_INDICE_PREV].to_numpy(dtype=float)
+    y = df_a[COL_CASOS].to_numpy(dtype=float)
+    intercepto, pendiente = motor_modelo_b.ajustar_ols(x, y)
+    corr = np.corrcoef(x, y)[0, 1]
+    grupos, _ = codigos_grupo(df_a, claves)
+    df_a[COL_R_MOVIL] = motor_modelo_a.correlacion_movil(x, y, ventana_corr, grupos=grupos)
+    df_a[COL_R_ACUMULADA] = motor_modelo_a.correlacion_movil(x, y, grupos=grupos)
+    r_movil = df_a[COL_R_MOVIL]
+    return df_a, {
+        "pendiente": pendiente,
+        "intercepto": intercepto,
+        "corr": corr,
+        "r2": corr ** 2,
+        "n": len(df_a),
+        "ventana_corr": ventana_corr,
+        "r_movil_min": r_movil.min(),
+        "r_movil_max": r_movil.max(),
+        "r_movil_ultima": r_movil.iloc[-1],
+    }
+
+def intervalos_siguiente(df, nivel=NIVEL_INTERVALO, muestras=MUESTRAS_BOOTSTRAP, semilla=SEMILLA_BOOTSTRAP, procesos=1):
+    """Intervalos de predicción de la semana siguiente (ver motor_modelo_b.intervalos_siguiente)."""
+    return motor_modelo_b.intervalos_siguiente(
+        df[COL_INDICE].to_numpy(dtype=float, na_value=np.nan),
+        df[COL_CASOS].to_numpy(dtype=float, na_value=np.nan),
+        nivel, muestras, semilla, procesos
+    )
+
+def texto_intervalos(intervalos):
+    """Líneas del diálogo de predicción con los intervalos calculados."""
+    lineas = [f"INTERVALO DE PREDICCIÓN ({intervalos['nivel']:.0%}, casos reales):"]
+    inf, sup = intervalos["analitico"]
+    if np.isnan(inf):
+        return lineas + ["• Se necesitan al menos 3 pares de semanas para estimarlo."]
+    lineas.append(f"• OLS analítico:  {inf:.2f} a {sup:.2f}")
+    if intervalos["bootstrap"] is not None:
+        inf, sup = intervalos["bootstrap"]
+        lineas.append(f"• Bootstrap ({intervalos['muestras']:,} remuestras, semilla {intervalos['semilla']}):  {inf:.2f} a {sup:.2f}")
+    return lineas
+
+def escanear_retrasos(df, retraso_max=52, min_pares=10):
+    """
+    Correlación de los casos con el índice adelantado k semanas, para k en
+    -retraso_max..+retraso_max (el Modelo A usa k = 1), ordenando por Periodo.
+    En formato largo cada región/término se recorre por separado (un retraso
+    son semanas de la misma serie) y se agregan las sumas de todas.
+    Devuelve (tabla, mejor): tabla con retraso, r, r2 y pares por retraso;
+    mejor es el retraso con mayor |r| y al menos min_pares pares, como dict
+    (None si ninguno califica).
+    """
+    claves = columnas_grupo(df)
+    df = df.sort_values(by=claves + [COL_PERIODO, COL_SEMANA], kind="stable").reset_index(drop=True)
+    if COL_INDICE in df.columns and df[COL_INDICE].notna().any():
+        indice = df[COL_INDICE].to_numpy(dtype=float, na_value=np.nan)
+    else:
+        # Solo viene Indice_t_1: el índice de la semana t es el t-1 de la siguiente (de la misma serie)
+        previo = df.groupby(claves, dropna=False, observed=True)[COL_INDICE_PREV] if claves else df[COL_INDICE_PREV]
+        indice = previo.shift(-1).to_numpy(dtype=float, na_value=np.nan)
+    casos = df[COL_CASOS].to_numpy(dtype=float, na_value=np.nan)
+    grupos, _ = codigos_grupo(df, claves)
+
+    retrasos, r, pares = motor_modelo_a.correlacion_cruzada(indice, casos, retraso_max, grupos)
+    tabla = pd.DataFrame({"retraso": retrasos, "r": r, "r2": r ** 2, "pares": pares})
+    k = motor_modelo_a.mejor_retraso(r, pares, min_pares)
+    if k is None:
+        return tabla, None
+    return tabla, {"retraso": int(retrasos[k]), "r": float(r[k]), "r2": float(r[k] ** 2), "pares": int(pares[k])}
+
+def calcular_modelo_b(df, nivel=NIVEL_INTERVALO, muestras=0, semilla=SEMILLA_BOOTSTRAP):
+    """
+    Modelo B completo sin interfaz: ordena, ajusta alpha/beta, calcula las
+    estimaciones, la predicción de la siguiente semana y su intervalo de
+    predicción (analítico y, si muestras > 0, bootstrap).
+    Devuelve (df_b, resultados); resultados es None si no hay datos suficientes.
+    """
+    df_b = df.sort_values(by=COL_PERIODO, kind="stable").reset_index(drop=True)
+    df_b[COL_INDICE_PREV] = df_b[COL_INDICE].shift(1)
+    df_b[COL_EST_SIN] = 0.0
+    df_b[COL_EST_CON] = 0.0
+    alpha, beta = calcular_coeficientes(df_b)
+    if alpha is None:
+        return df_b, None
+
+    df_b = aplicar_estimaciones(df_b, alpha, beta)
+    pred_sin, pred_con, delta = motor_modelo_b.predecir_siguiente(
+        df_b[COL_INDICE].to_numpy(dtype=float, na_value=np.nan),
+        df_b[COL_CASOS].to_numpy(dtype=float, na_value=np.nan),
+        alpha, beta
+    )
+    semana = pd.to_numeric(df_b[COL_SEMANA], errors="coerce").iloc[-1]
+    intervalos = intervalos_siguiente(df_b, nivel, muestras, semilla)
+    resultados = {
+        "alpha": alpha,
+        "beta": beta,
+        "semana_siguiente": int(semana) + 1 if pd.notna(semana) else None,
+        "delta_indice": delta,
+        "pred_sin_int": pred_sin,
+        "pred_con_int": pred_con,
+        "intervalo_nivel": nivel,
+        "intervalo_inf": intervalos["analitico"][0],
+        "intervalo_sup": intervalos["analitico"][1],
+        "n": len(df_b)
+    }
+    if intervalos["bootstrap"] is not None:
+        resultados["bootstrap_inf"], resultados["bootstrap_sup"] = intervalos["bootstrap"]
+        resultados["bootstrap_muestras"] = muestras
+        resultados["bootstrap_semilla"] = semilla
+    return df_b, resultados
+
+def codigos_grupo(df, claves):
+    """Código 0..G-1 de la región/término de cada fila (todo es un grupo si no hay claves)."""
+    if claves:
+        grupos = df.groupby(claves, sort=True, dropna=False, observed=True).ngroup().to_numpy()
+        return grupos, int(grupos.max()) + 1 if len(grupos) else 0
+    return np.zeros(len(df), dtype=np.int64), 1 if len(df) else 0
+
+def proyectar_modelo_b(df, horizonte=HORIZONTE_PROYECCION, escenarios=ESCENARIOS_PROYECCION,
+                       semilla=SEMILLA_BOOTSTRAP, trayectorias=None):
+    """
+    Proyección del Modelo B para las próximas `horizonte` semanas desde la
+    última fila, bajo tres supuestos del índice: persistencia (se queda igual),
+    tendencia (recta de las últimas semanas) y escenarios (caminatas aleatorias
+    con cambios semanales históricos, o las `trayectorias` dadas, de forma
+    (escenarios, horizonte)).
+
+    Devuelve (tabla, caminos) o (None, None) si no hay modelo. tabla tiene una
+    fila por semana proyectada con las dos proyecciones fijas y los percentiles
+    5/50/95 de los escenarios (con intercepto); caminos trae las matrices
+    completas (escenarios × semanas) sin y con intercepto.
+    """
+    df_b = df.sort_values(by=COL_PERIODO, kind="stable").reset_index(drop=True)
+    alpha, beta = calcular_coeficientes(df_b)
+    if alpha is None:
+        return None, None
+    indice = df_b[COL_INDICE].to_numpy(dtype=float, na_value=np.nan)
+    casos = df_b[COL_CASOS].to_numpy(dtype=float, na_value=np.nan)
+
+    if trayectorias is None:
+        trayectorias = motor_modelo_b.escenarios_indice(indice, horizonte, escenarios, semilla)
+    trayectorias = np.atleast_2d(np.asarray(trayectorias, dtype=float))[:, :horizonte]
+    horizonte = trayectorias.shape[1]
+
+    fijas = np.vstack([motor_modelo_b.trayectoria_persistencia(indice, horizonte),
+                       motor_modelo_b.trayectoria_tendencia(indice, horizonte)])
+    _, pred_fijas = motor_modelo_b.proyectar_trayectorias(indice, casos, alpha, beta, fijas)
+    pred_sin, pred_con = motor_modelo_b.proyectar_trayectorias(indice, casos, alpha, beta, trayectorias)
+
+    semana = pd.to_numeric(df_b[COL_SEMANA], errors="coerce").iloc[-1]
+    pasos = np.arange(1, horizonte + 1)
+    p5, p50, p95 = np.percentile(pred_con, [5, 50, 95], axis=0)
+    tabla = pd.DataFrame({
+        "horizonte": pasos,
+        COL_SEMANA: semana + pasos if pd.notna(semana) else np.nan,
+        COL_PERIODO: df_b[COL_PERIODO].iloc[-1] + pd.to_timedelta(7 * pasos, unit="D"),
+        "pred_persistencia": pred_fijas[0],
+        "pred_tendencia": pred_fijas[1],
+        "escenarios_p5": p5,
+        "escenarios_p50": p50,
+        "escenarios_p95": p95,
+    })
+    return tabla, {"pred_sin": pred_sin, "pred_con": pred_con, "indice": trayectorias}
+
+def calcular_modelo_b_por_region(df, nivel=NIVEL_INTERVALO):
+    """
+    Modelo B de todas las regiones/términos en una sola pasada vectorizada.
+    Devuelve (df_b, resumen): df_b con Indice_t_1 y estimaciones por fila,
+    ordenado por grupo y fecha; resumen con una fila por grupo (alpha, beta,
+    predicción de la semana siguiente e intervalo analítico al `nivel` dado).
+    Sin columnas de grupo, todo es un grupo.
+    """
+    claves = columnas_grupo(df)
+    df_b = df.sort_values(by=claves + [COL_PERIODO], kind="stable").reset_index(drop=True)
+    grupos, n_grupos = codigos_grupo(df_b, claves)
+
+    res = motor_modelo_b.calcular_modelo_b_por_grupo(
+        df_b[COL_INDICE].to_numpy(dtype=float, na_value=np.nan),
+        df_b[COL_CASOS].to_numpy(dtype=float, na_value=np.nan),
+        grupos, n_grupos, nivel=nivel
+    )
+    df_b[COL_INDICE_PREV] = res["indice_prev"]
+    df_b[COL_EST_SIN] = res["est_sin"]
+    df_b[COL_EST_CON] = res["est_con"]
+
+    ultima = res["ultima_fila"]
+    semana = pd.to_numeric(df_b[COL_SEMANA], errors="coerce").to_numpy()[ultima]
+    resumen = df_b.iloc[ultima][claves].reset_index(drop=True)
+    resumen["filas"] = res["filas"]
+    resumen["alpha"] = res["alpha"]
+    resumen["beta"] = res["beta"]
+    resumen["ultimo_periodo"] = df_b[COL_PERIODO].to_numpy()[ultima]
+    resumen["semana_siguiente"] = semana + 1
+    resumen["delta_indice"] = res["delta_indice"]
+    resumen["pred_sin_int"] = res["pred_sin"]
+    resumen["pred_con_int"] = res["pred_con"]
+    resumen["intervalo_inf"] = res["pred_con"] - res["margen"]
+    resumen["intervalo_sup"] = res["pred_con"] + res["margen"]
+    return df_b, resumen
+
+def calcular_backtest_modelo_b(df, ventana=None, minimo=3, bloque=52):
+    """
+    Validación walk-forward del Modelo B: cada semana se pronostica con
+    alpha/beta ajustados solo con las semanas anteriores (ventana expansiva, o
+    móvil de `ventana` semanas). Funciona con una serie o por región/término.
+
+    Devuelve (detalle, bloques, total):
+      detalle: una fila por semana pronosticada.
+      bloques: MAE/RMSE/MAPE de cada bloque de `bloque` pronósticos por grupo.
+      total: métricas fuera de muestra de todo el archivo y, como referencia,
+             las del ajuste en muestra (estimaciones con alpha/beta de toda la serie).
+    """
+    df_b, resumen = calcular_modelo_b_por_region(df)
+    claves = columnas_grupo(df_b)
+    grupos, _ = codigos_grupo(df_b, claves)
+    casos = df_b[COL_CASOS].to_numpy(dtype=float, na_value=np.nan)
+    res = motor_modelo_b.pronosticos_walk_forward(
+        df_b[COL_INDICE].to_numpy(dtype=float, na_value=np.nan), casos,
+        grupos, ventana=ventana, minimo=minimo
+    )
+
+    objetivo = res["objetivo"]
+    detalle = df_b.iloc[objetivo][claves + [COL_SEMANA, COL_PERIODO, COL_CASOS]].reset_index(drop=True)
+    detalle["alpha"] = res["alpha"]
+    detalle["beta"] = res["beta"]
+    detalle["pares"] = res["pares"]
+    detalle["pred_sin_int"] = res["pred_sin"]
+    detalle["pred_con_int"] = res["pred_con"]
+
+    # Bloque = posición del pronóstico dentro de su grupo // bloque
+    g = grupos[objetivo]
+    inicio_g = motor_modelo_b.inicios_de_grupo(g)
+    posicion = np.arange(len(g)) - np.maximum.accumulate(np.where(inicio_g, np.arange(len(g)), 0))
+    numero = posicion // bloque
+    nuevo_bloque = inicio_g | motor_modelo_b.inicios_de_grupo(numero)
+    codigos = np.cumsum(nuevo_bloque) - 1
+    n_bloques = int(nuevo_bloque.sum())
+    detalle["bloque"] = numero + 1
+
+    primera = np.flatnonzero(nuevo_bloque)
+    ultima = np.append(primera[1:], len(codigos)) - 1
+    bloques = detalle.iloc[primera][claves + ["bloque"]].reset_index(drop=True)
+    bloques["desde"] = detalle[COL_PERIODO].to_numpy()[primera]
+    bloques["hasta"] = detalle[COL_PERIODO].to_numpy()[ultima]
+    bloques["pronosticos"] = np.bincount(codigos, minlength=n_bloques)
+
+    total = {"esquema": "expansiva" if ventana is None else f"móvil de {ventana} semanas",
+             "pronosticos": len(objetivo)}
+    for nombre, columna in (("sin_int", "pred_sin_int"), ("con_int", "pred_con_int")):
+        pred = detalle[columna].to_numpy()
+        por_bloque = motor_modelo_b.metricas_error(res["real"], pred, codigos, n_bloques)
+        for metrica in ("mae", "rmse", "mape"):
+            bloques[f"{metrica}_{nombre}"] = por_bloque[metrica]
+        total[nombre] = motor_modelo_b.metricas_error(res["real"], pred)
+
+    # Referencia: error de las estimaciones en muestra (lo que muestra la tabla)
+    con_modelo = ~np.isnan(resumen["alpha"].to_numpy()[grupos]) & ~motor_modelo_b.inicios_de_grupo(grupos)
+    for nombre, columna in (("sin_int", COL_EST_SIN), ("con_int", COL_EST_CON)):
+        est = df_b[columna].to_numpy(dtype=float)
+        usar = con_modelo & np.isfinite(est) & np.isfinite(casos)
+        total[f"en_muestra_{nombre}"] = motor_modelo_b.metricas_error(casos[usar], est[usar])
+    return detalle, bloques, total
+
 def generar_plantilla():
     """Genera una plantilla de Excel vacía con las columnas requeridas."""
+    from tkinter import filedialog, messagebox
     ruta = filedialog.asksaveasfilename(
         defaultextension=".xlsx",
         filetypes=[("Excel", "*.xlsx")],